@@ -1,38 +1,28 @@
 # api_client.py
 # Handles all communication with the Google Generative AI API.
 
-import configparser
 import json
-import google.generativeai as genai
+import threading
+import time
+from config_settings import read_config, setting
+from conversation_history import ConversationHistory
+from response_cache import ResponseCache, get_response_cache
+from response_parser import parse_response
 
-class ApiClient:
-    # ... (the __init__, configure, and get_command_from_gemini methods are unchanged) ...
-    def __init__(self):
-        self.model = None
-        self.configure()
+MODEL_NAME = 'gemini-1.5-flash-latest'
+PING_TIMEOUT_SECONDS = 10
 
-    def configure(self):
-        """Configures the Generative AI model with the API key from the config file."""
-        config = configparser.ConfigParser()
-        try:
-            if not config.read('config.ini') or not config.has_section('API') or not config.has_option('API', 'key'):
-                self.model = None; return
-            api_key = config.get('API', 'key')
-            if not api_key: self.model = None; return
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
-            print("Google AI SDK configured successfully.")
-        except Exception as e:
-            print(f"Error configuring Google AI SDK: {e}"); self.model = None
+genai = None # google.generativeai; importing it takes a second or more, so it happens in the warm-up
 
-    def get_command_from_gemini(self, user_prompt, chat_history, os_info="Windows 11"):
-        """
-        Sends a prompt as part of an ongoing conversation to the Gemini API.
-        """
-        if not self.model:
-            return {"error": "API client is not configured. Please set your API key in the settings."}
+def _import_sdk():
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
 
-        system_prompt = f"""
+# Sent once per model as its system instruction rather than prepended to every turn.
+SYSTEM_PROMPT = """
         You are an expert command-line assistant for {os_info}. Your task is to generate and correct shell commands.
 
         **BEHAVIOR MODEL**
@@ -55,30 +45,180 @@ class ApiClient:
             }}
         """
 
-        full_prompt = f"{system_prompt}\n\n**User Request:** \"{user_prompt}\""
+class ApiClient:
+    # One instance is shared by every chat; see get_api_client() below.
+    def __init__(self):
+        self.model = None
+        self.generation = 0 # Bumped on every configure() so sessions know to rebuild
+        self.cache = get_response_cache()
+        self._models = {} # os_info -> model carrying the system instruction for that OS
+        self._configure_lock = threading.Lock()
+        self._ready = threading.Event() # Set once the SDK has been configured
+        self._warm_up_lock = threading.Lock()
+        self._warm_up_started = False
+        self._keep_alive_stop = threading.Event() # Set to stop the pinger of the current model
+        self._latency_lock = threading.Lock()
+        self.latency = {
+            "connect": None, # Seconds the first ping after configure() took: connection setup plus one tiny round trip
+            "ping": None, # Seconds the latest keep-alive ping took on the open connection
+            "pings": 0, "failed_pings": 0,
+            "requests": 0, # API calls timed below; "cold_requests" of them started before the connection was warm
+            "cold_requests": 0,
+            "generation_total": 0.0, "last_generation": None, # Seconds from sending a request to its full reply
+            "last_first_chunk": None, # Seconds from sending a streamed request to its first chunk
+        }
+        self._connected = False
+        self.history_settings = self._history_settings(read_config()) # Sessions need these straight away; the SDK can wait
 
+    def warm_up(self):
+        """Imports and configures the SDK on a background thread, once, so the window never waits for it."""
+        with self._warm_up_lock:
+            if self._warm_up_started:
+                return
+            self._warm_up_started = True
+        threading.Thread(target=self.configure, name="sdk-warm-up", daemon=True).start()
+
+    def wait_until_ready(self):
+        """Returns the model (None if unconfigured) once the SDK is set up; called on worker threads."""
+        self.warm_up()
+        self._ready.wait()
+        return self.model
+
+    def configure(self):
+        """
+        Configures the Generative AI model with the API key from the config file.
+        The new model replaces the old one in a single assignment, so calls already running on
+        worker threads finish on the model they started with and later calls all see the new one.
+        """
         try:
-            chat_session = self.model.start_chat(history=chat_history)
-            response = chat_session.send_message(full_prompt)
+            with self._configure_lock:
+                config = read_config() # Read under the lock, so the last configure() sees the latest settings
+                model = self._build_model(config)
+                self.history_settings = self._history_settings(config)
+                self._models = {}
+                self.model = model
+                self.generation += 1
+                self._start_keep_alive(model, config)
+        finally:
+            self._ready.set() # Even if configuring failed, so requests waiting on it get "not configured" rather than hang
 
+    def _start_keep_alive(self, model, config):
+        """
+        Opens the SDK transport in the background with a cheap countTokens call, so the first prompt
+        doesn't pay for DNS, TLS and channel setup, then repeats it every [API] keep_alive_seconds
+        (0 pings once) so the connection isn't closed while idle. [API] prewarm = false turns it off.
+        """
+        with self._latency_lock:
+            self._keep_alive_stop.set() # The previous model's pinger stops; its connection isn't the one used now
+            self._keep_alive_stop = threading.Event()
+            self._connected = False
+        if model is None or not setting(config.getboolean, 'API', 'prewarm', True):
+            return
+        interval = setting(config.getfloat, 'API', 'keep_alive_seconds', 60)
+        threading.Thread(target=self._keep_alive, args=(model, interval, self._keep_alive_stop),
+                         name="sdk-keep-alive", daemon=True).start()
+
+    def _keep_alive(self, model, interval, stop):
+        while not stop.is_set():
+            started = time.perf_counter()
             try:
-                clean_response = response.text.strip().replace("```json", "").replace("```", "")
-                return clean_response
-            except (AttributeError):
-                return response.text
+                model.count_tokens("ping", request_options={"timeout": PING_TIMEOUT_SECONDS})
+            except Exception as e:
+                with self._latency_lock:
+                    self.latency["failed_pings"] += 1
+                print(f"Keep-alive ping failed: {e}")
+            else:
+                elapsed = time.perf_counter() - started
+                with self._latency_lock:
+                    if stop.is_set():
+                        return
+                    self.latency["connect" if not self._connected else "ping"] = elapsed
+                    self.latency["pings"] += 1
+                    self._connected = True
+            if interval <= 0 or stop.wait(interval):
+                return
+
+    def record_latency(self, generation_seconds, first_chunk_seconds=None, warm=True):
+        """Records one API call; warm is whether the connection was already open when it was sent."""
+        with self._latency_lock:
+            self.latency["requests"] += 1
+            self.latency["cold_requests"] += 0 if warm else 1
+            self.latency["generation_total"] += generation_seconds
+            self.latency["last_generation"] = generation_seconds
+            if first_chunk_seconds is not None:
+                self.latency["last_first_chunk"] = first_chunk_seconds
+
+    def latency_stats(self):
+        with self._latency_lock:
+            stats = dict(self.latency)
+        stats["generation_average"] = stats["generation_total"] / stats["requests"] if stats["requests"] else None
+        return stats
 
+    def _history_settings(self, config):
+        return {
+            "budget_tokens": setting(config.getint, 'History', 'budget_tokens', 8000),
+            "keep_recent_turns": setting(config.getint, 'History', 'keep_recent_turns', 3),
+            "max_part_chars": setting(config.getint, 'History', 'max_part_chars', 1500),
+        }
+
+    def _build_model(self, config):
+        try:
+            if not config.has_section('API') or not config.has_option('API', 'key'):
+                return None
+            api_key = config.get('API', 'key')
+            if not api_key: return None
+            genai = _import_sdk()
+            options = {} # [API] transport and endpoint point the SDK elsewhere, e.g. at a local stand-in server
+            if config.get('API', 'transport', fallback=''):
+                options["transport"] = config.get('API', 'transport')
+            if config.get('API', 'endpoint', fallback=''):
+                options["client_options"] = {"api_endpoint": config.get('API', 'endpoint')}
+            genai.configure(api_key=api_key, **options) # The SDK keeps one process-wide transport for this key
+            model = genai.GenerativeModel(MODEL_NAME)
+            print("Google AI SDK configured successfully.")
+            return model
         except Exception as e:
-            print(f"An error occurred during API call: {e}")
-            return {"error": f"An error occurred during API call: {e}"}
+            print(f"Error configuring Google AI SDK: {e}"); return None
+
+    def model_for(self, os_info):
+        """Returns the command model for os_info, with the system prompt baked in as its system instruction."""
+        models = self._models
+        model = models.get(os_info)
+        if model is None and self.model is not None:
+            model = _import_sdk().GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_PROMPT.format(os_info=os_info))
+            models[os_info] = model
+        return model
+
+    def create_session(self, os_info="Windows 11", history=None):
+        return ChatSession(self, os_info, history)
+
+    def _cached(self, key):
+        return self.cache.get(key) if self.cache and key else None
+
+    def _store(self, key, text):
+        """Caches a reply, but only one that parses; a malformed reply should be asked for again."""
+        if not self.cache or not key:
+            return
+        try:
+            parse_response(text)
+        except ValueError:
+            return
+        self.cache.put(key, text)
 
     # <-- NEW METHOD
-    def get_suggestions_from_gemini(self, original_prompt, command_summary):
+    def get_suggestions_from_gemini(self, original_prompt, command_summary, use_cache=True):
         """
         After a command is run, this method gets relevant follow-up suggestions.
         """
-        if not self.model:
+        model = self.wait_until_ready()
+        if not model:
             return json.dumps({"suggestions": []}) # Return empty list if not configured
 
+        cache_key = ResponseCache.make_key("suggestions", f"{original_prompt}\0{command_summary}") if use_cache else None
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+
         prompt = f"""
         You are a helpful command-line assistant. A user just performed an action. Based on their initial request and the action's summary, provide 2-3 relevant follow-up prompts they might want to ask next.
 
@@ -99,8 +239,193 @@ class ApiClient:
         }}
         """
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip().replace("```json", "").replace("```", "")
+            warm, started = self._connected, time.perf_counter()
+            response = model.generate_content(prompt)
+            self.record_latency(time.perf_counter() - started, warm=warm)
+            self._store(cache_key, response.text)
+            return response.text
         except Exception as e:
             print(f"Error getting suggestions: {e}")
-            return json.dumps({"suggestions": []})
\ No newline at end of file
+            return json.dumps({"suggestions": []})
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_api_client():
+    """Returns the process-wide client shared by all chats, creating it on first use."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = ApiClient()
+        return _shared_client
+
+class ChatSession:
+    """
+    A long-lived conversation for one chat. The API is stateless, so every turn still sends the whole
+    (budgeted) history; what the session saves is the system prompt, which travels once per request
+    as the model's system instruction instead of being prepended to every turn. `history` is the
+    canonical record of the conversation, kept within a token budget; the SDK chat is rebuilt from
+    it only when the client was reconfigured, the history was compacted, a turn was recorded
+    locally, or a streamed turn did not complete.
+    """
+    def __init__(self, client, os_info="Windows 11", history=None):
+        self.client = client
+        self.os_info = os_info
+        self.history = ConversationHistory(history or [], **client.history_settings)
+        self._chat = None
+        self._generation = None
+        self._lock = threading.Lock() # One turn at a time, even if a cancelled request is still finishing
+
+    def record(self, user_text, model_text):
+        """Adds a turn that was answered without the API, e.g. a predefined reply."""
+        with self._lock:
+            self._append_turn(user_text, model_text)
+            self._chat = None
+
+    def _append_turn(self, user_text, model_text):
+        self.history.append({'role': 'user', 'parts': [user_text]})
+        self.history.append({'role': 'model', 'parts': [model_text]})
+
+    def _sdk_chat(self):
+        if self.history.compact():
+            self._chat = None # Compaction rewrote old turns, so the SDK chat must start over from them
+        if self._chat is None or self._generation != self.client.generation:
+            self._generation = self.client.generation
+            self._chat = self.client.model_for(self.os_info).start_chat(history=self.history)
+        return self._chat
+
+    def _cache_key(self, prompt, use_cache):
+        return ResponseCache.make_key("command", prompt, self.history, self.os_info) if use_cache else None
+
+    def send(self, prompt, use_cache=True):
+        """Sends one turn and returns the raw reply text, or {"error": ...}."""
+        if not self.client.wait_until_ready():
+            return {"error": "API client is not configured. Please set your API key in the settings."}
+        with self._lock:
+            cache_key = self._cache_key(prompt, use_cache)
+            cached = self.client._cached(cache_key)
+            if cached is not None:
+                self._append_turn(prompt, cached)
+                self._chat = None
+                return cached
+            try:
+                chat = self._sdk_chat()
+                warm, started = self.client._connected, time.perf_counter()
+                response = chat.send_message(prompt)
+                text = response.text # Fences are stripped by response_parser on the receiving side
+                self.client.record_latency(time.perf_counter() - started, warm=warm)
+            except Exception as e:
+                self._chat = None
+                print(f"An error occurred during API call: {e}")
+                return {"error": f"An error occurred during API call: {e}"}
+            self._append_turn(prompt, text)
+            self.client._store(cache_key, text)
+            return text
+
+    def stream(self, prompt, use_cache=True):
+        """
+        Sends one turn and yields the raw reply text chunk by chunk as the model generates it.
+        Errors are raised rather than returned, since a generator cannot hand back an error dict
+        once it has started yielding. A cached reply is yielded whole.
+        """
+        if not self.client.wait_until_ready():
+            raise RuntimeError("API client is not configured. Please set your API key in the settings.")
+        with self._lock:
+            cache_key = self._cache_key(prompt, use_cache)
+            cached = self.client._cached(cache_key)
+            if cached is not None:
+                self._append_turn(prompt, cached)
+                self._chat = None
+                yield cached
+                return
+            completed = False
+            try:
+                chat = self._sdk_chat()
+                warm, started = self.client._connected, time.perf_counter()
+                first_chunk = None
+                response = chat.send_message(prompt, stream=True)
+                chunks = []
+                for chunk in response:
+                    if chunk.text:
+                        if first_chunk is None:
+                            first_chunk = time.perf_counter() - started
+                        chunks.append(chunk.text)
+                        yield chunk.text
+                completed = True
+                self.client.record_latency(time.perf_counter() - started, first_chunk, warm)
+            except Exception as e:
+                print(f"An error occurred during API call: {e}")
+                raise RuntimeError(f"An error occurred during API call: {e}") from e
+            finally:
+                if not completed:
+                    self._chat = None # The SDK chat holds a half-read turn; rebuild it from history
+            text = "".join(chunks)
+            self._append_turn(prompt, text)
+            self.client._store(cache_key, text)
+
+if __name__ == "__main__":
+    # Benchmark: python api_client.py [connect_ms] [generate_ms]
+    # Times the first prompt against a local stand-in for the API, so no network or key is needed. The server
+    # sleeps connect_ms on every new connection (standing in for DNS, TLS and channel setup) and generate_ms
+    # per reply. "cold" sends the prompt on an unopened transport; "prewarm" lets the keep-alive open it first.
+    import os
+    import subprocess
+    import sys
+    import tempfile
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    variant = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    numbers = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    connect_ms = numbers[0] if numbers else 300
+    generate_ms = numbers[1] if len(numbers) > 1 else 100
+
+    if variant:
+        connections = []
+
+        class StandInApi(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep connections open, as the real endpoint does
+
+            def setup(self):
+                super().setup()
+                connections.append(self.client_address)
+                time.sleep(connect_ms / 1000)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if ":countTokens" in self.path:
+                    reply = {"totalTokens": 1}
+                else:
+                    time.sleep(generate_ms / 1000)
+                    text = json.dumps({"response_type": "command", "summary": "Lists files.", "commands": [{"command": "dir", "description": "List files", "is_powershell": False}]})
+                    reply = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": 1}]}
+                body = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandInApi)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.chdir(tempfile.mkdtemp()) # A config.ini of its own, pointing the SDK at the stand-in
+        with open("config.ini", "w") as config_file:
+            config_file.write(f"[API]\nkey = stand-in\ntransport = rest\nendpoint = http://127.0.0.1:{server.server_port}\n"
+                              f"prewarm = {'true' if variant == 'prewarm' else 'false'}\nkeep_alive_seconds = 1\n\n[Cache]\nenabled = false\n")
+        client = ApiClient()
+        client.warm_up()
+        client.wait_until_ready()
+        time.sleep(2.5) # The user typing their first prompt; long enough for a couple of keep-alive pings
+        session = client.create_session()
+        started = time.perf_counter()
+        reply = session.send("list the files here", use_cache=False)
+        first_prompt = time.perf_counter() - started
+        assert isinstance(reply, str), reply
+        stats = client.latency_stats()
+        connect = f"{stats['connect'] * 1000:.0f} ms" if stats["connect"] is not None else "-"
+        print(f"{variant:8} first prompt {first_prompt * 1000:6.1f} ms (connect {connect}, pings {stats['pings']}, "
+              f"cold requests {stats['cold_requests']}/{stats['requests']}, connections opened {len(connections)})", flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so the SDK's transport starts unopened in both
+    for name in ("cold", "prewarm"):
+        subprocess.run([sys.executable, __file__, name, str(connect_ms), str(generate_ms)])
@@ -5,108 +5,77 @@ import subprocess
 import json
 import os
 import sys
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QTextEdit,
+import time
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit,
                                QPushButton, QLabel, QFrame, QSizePolicy,
-                               QScrollArea, QStackedLayout)
-from PySide6.QtCore import Qt, QTimer, QEvent, Signal
-from PySide6.QtGui import QFontMetrics
+                               QStackedLayout)
+from PySide6.QtCore import Qt, QEvent, Signal
 from top_bar import TopBar
-from api_client import ApiClient
-
-class MessageBubble(QWidget):
+from api_client import get_api_client
+from request_engine import get_request_engine
+from response_parser import ResponseStreamParser, parse_response
+from intents import match_scenario
+from semantic_intents import match_scenario_semantic
+from command_runner import CommandBatch, load_execution_settings
+from command_cache import create_cached_runner, get_command_cache
+from typewriter import get_typewriter
+from output_viewer import OutputViewer
+from structured_output import TableOutputView, structured_command, table_summary
+from transcript import BUBBLE_MAX_WIDTH, BUBBLE_MIN_WIDTH, TranscriptItem, TranscriptView
+import styles
+
+class MessageBubble(TranscriptItem):
+    """A chat bubble. The transcript paints it; this handle drives its text."""
     typing_finished = Signal()
+    MAX_WIDTH = BUBBLE_MAX_WIDTH
+    MIN_WIDTH = BUBBLE_MIN_WIDTH
 
     def __init__(self, text="", alignment='left'):
-        super().__init__()
-        self.full_text = ""
-        self.current_text = ""
-        self.char_index = 0
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_text)
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-
-        self.bubble_container = QWidget()
-        self.bubble_container.setObjectName("bubbleContainer")
-        self.bubble_container.setProperty("alignment", alignment)
-
-        container_layout = QHBoxLayout(self.bubble_container)
-        container_layout.setContentsMargins(15, 10, 15, 10)
-
-        self.label = QLabel(text)
-        self.label.setWordWrap(True)
-        self.label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        container_layout.addWidget(self.label)
-
-        if alignment == 'right':
-            layout.addStretch()
-            layout.addWidget(self.bubble_container)
-        else:
-            layout.addWidget(self.bubble_container)
-            layout.addStretch()
-
-        self.adjust_bubble_width()
-
-    def adjust_bubble_width(self):
-        metrics = QFontMetrics(self.label.font())
-        text_width = metrics.horizontalAdvance(self.label.text())
-        max_width = 600
-        min_width = 50
-        bubble_width = min(max(text_width + 30, min_width), max_width)
-        self.label.setFixedWidth(bubble_width)
+        super().__init__("bubble", alignment=alignment, text=text, layout_text=text)
+        self.full_text = text
+        self.char_index = len(text)
 
     def set_text_with_typing_effect(self, text, speed=8):
+        get_typewriter().stop(self)
         self.full_text = text
-        self.current_text = ""
         self.char_index = 0
-        self.label.setText("")
-        self.timer.start(speed)
-
-    def _update_text(self):
-        if self.char_index < len(self.full_text):
-            self.current_text += self.full_text[self.char_index]
-            self.label.setText(self.current_text)
-            self.char_index += 1
-            self.adjust_bubble_width()
-        else:
-            self.timer.stop()
-            self.typing_finished.emit()
+        self.record["text"] = ""
+        self.record["layout_text"] = text # Laid out once for the final text, not per character
+        self._changed(resized=True)
+        get_typewriter().start(self, chars_per_second=1000 / speed)
+
+    def show_typed(self, count):
+        if count != self.char_index:
+            self.char_index = count
+            self.record["text"] = self.full_text[:count]
+            self._changed()
+
+    def typing_complete(self):
+        self.typing_finished.emit()
+
+    def set_text(self, text):
+        """Displays text straight away, without the typing effect."""
+        self._show_now(text)
+
+    def append_text(self, chunk):
+        """Appends streamed text as it arrives from the model."""
+        self._show_now(self.full_text + chunk)
+
+    def _show_now(self, text):
+        get_typewriter().stop(self)
+        self.full_text = text
+        self.char_index = len(text)
+        self.record["text"] = self.record["layout_text"] = text
+        self._changed(resized=True)
 
     def finish_typing(self):
         """Immediately stops the typing effect and displays the full text."""
-        if self.timer.isActive():
-            self.timer.stop()
-            self.label.setText(self.full_text)
-            self.adjust_bubble_width()
-            self.typing_finished.emit()
-
-class TypingOutputLabel(QLabel):
-    def __init__(self, text=""):
-        super().__init__(text)
-        self.full_text = ""
-        self.current_text = ""
-        self.char_index = 0
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_text)
-
-    def set_text_with_typing_effect(self, text, speed=5):
-        self.full_text = text
-        self.current_text = ""
-        self.char_index = 0
-        self.setText("")
-        self.timer.start(speed)
-
-    def _update_text(self):
-        if self.char_index < len(self.full_text):
-            self.current_text += self.full_text[self.char_index]
-            self.setText(self.current_text)
-            self.char_index += 1
-        else:
-            self.timer.stop()
+        get_typewriter().finish(self)
 
 class StatusWidget(QWidget):
-    def __init__(self, text):
+    stop_requested = Signal()
+
+    def __init__(self, text, stoppable=False):
         super().__init__()
         self.setObjectName("statusWidget")
         layout = QHBoxLayout(self)
@@ -114,6 +83,40 @@ class StatusWidget(QWidget):
         self.label = QLabel(text)
         self.label.setObjectName("statusLabel")
         layout.addWidget(self.label)
+        self.stop_button = None
+        if stoppable:
+            layout.addStretch()
+            self.stop_button = QPushButton("■ Stop")
+            self.stop_button.setObjectName("stopButton")
+            self.stop_button.setCursor(Qt.PointingHandCursor)
+            self.stop_button.clicked.connect(self.on_stop)
+            layout.addWidget(self.stop_button)
+
+    def on_stop(self):
+        self.stop_button.setDisabled(True)
+        self.stop_requested.emit()
+
+class CachedResultWidget(QWidget):
+    refresh_requested = Signal()
+
+    def __init__(self, cached_at):
+        super().__init__()
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(5, 0, 5, 0)
+        age = max(0, int(time.time() - cached_at))
+        self.label = QLabel(f"↻ Cached result from {age}s ago")
+        self.label.setObjectName("statusLabel")
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.setObjectName("refreshButton")
+        self.refresh_button.setCursor(Qt.PointingHandCursor)
+        self.refresh_button.clicked.connect(self.on_refresh)
+        layout.addWidget(self.label)
+        layout.addWidget(self.refresh_button)
+        layout.addStretch()
+
+    def on_refresh(self):
+        self.refresh_button.setDisabled(True)
+        self.refresh_requested.emit()
 
 class SummaryWidget(QWidget):
     def __init__(self, summary, commands):
@@ -208,6 +211,8 @@ class SuggestionWidget(QWidget):
 
     def __init__(self, suggestions):
         super().__init__()
+        self.suggestions = suggestions[:3]
+        self.used = False
         layout = QHBoxLayout(self)
         layout.setContentsMargins(0, 5, 0, 5)
         
@@ -220,6 +225,7 @@ class SuggestionWidget(QWidget):
         layout.addStretch()
 
     def on_click(self, text):
+        self.used = True
         self.suggestion_clicked.emit(text)
         for i in range(self.layout().count()):
             widget = self.layout().itemAt(i).widget()
@@ -227,18 +233,36 @@ class SuggestionWidget(QWidget):
                 widget.setDisabled(True)
                 widget.setCursor(Qt.ArrowCursor)
 
+SAVED_OUTPUT_LINES = 500 # How much of each command's output (lines, or table rows) a hibernated chat keeps
+
 class ChatArea(QWidget):
+    """
+    One chat. An idle chat can be hibernated into a compact record (see hibernate()) and
+    rebuilt later with ChatArea(parent_window, saved=record).
+    """
     first_message_sent = Signal(str)
-    def __init__(self, parent_window):
+    def __init__(self, parent_window, saved=None):
         super().__init__()
         self.setObjectName("chatArea")
-        self.api_client = ApiClient()
-        self.chat_history = []
+        self.api_client = get_api_client()
+        self.request_engine = get_request_engine()
+        self.parent_window = parent_window
+        if saved:
+            self.session = self.api_client.create_session(saved["os_info"], saved["history"])
+        else:
+            self.session = self.api_client.create_session()
+        self.chat_history = self.session.history # The session records every turn, API or predefined
         self.active_typing_bubble = None
+        self.streaming_bubble = None
         self.initial_prompt_input = None
         self.chat_prompt_input = None
         self.top_bar = None
         self.current_status_widget = None
+        self.active_runners = []
+        self.pending_corrections = {} # id(run) -> (run, status_widget, output_view, result) while a fix is requested
+        self.execution_settings = load_execution_settings()
+        self.working_directory = os.getcwd() # Follows the cd commands run in this chat only
+        self.theme = None
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
@@ -255,6 +279,8 @@ class ChatArea(QWidget):
         self.stacked_layout.addWidget(self.chat_page)
         self.main_layout.addLayout(self.stacked_layout)
         self.stacked_layout.setCurrentIndex(0)
+        if saved:
+            self._restore(saved)
 
     def setup_initial_page(self):
         layout = QVBoxLayout(self.initial_page)
@@ -277,18 +303,10 @@ class ChatArea(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.scroll_area.setObjectName("scrollArea")
-
-        scroll_widget = QWidget()
-        scroll_widget.setObjectName("chatScrollWidget")
-        self.chat_layout = QVBoxLayout(scroll_widget)
-        self.chat_layout.setContentsMargins(30, 20, 30, 20)
-        self.chat_layout.setSpacing(15)
-        self.chat_layout.setAlignment(Qt.AlignTop)
-        self.scroll_area.setWidget(scroll_widget)
+        # Messages are rows of a model; only interactive ones (buttons, confirmations) are widgets
+        self.transcript = TranscriptView()
+        self.transcript.setObjectName("transcriptView")
+        self.set_theme(self.parent_window.current_theme)
 
         input_container_widget = QWidget()
         input_container_widget.setObjectName("inputContainerWidget")
@@ -299,7 +317,7 @@ class ChatArea(QWidget):
         input_container_layout.addWidget(self.chat_input_frame, 8)
         input_container_layout.addStretch(1)
 
-        layout.addWidget(self.scroll_area, 1)
+        layout.addWidget(self.transcript, 1)
         layout.addWidget(input_container_widget)
 
     def create_input_frame(self, is_initial=True):
@@ -342,257 +360,125 @@ class ChatArea(QWidget):
         text_edit_widget.setFixedHeight(new_height)
 
     def add_message(self, widget):
-        self.chat_layout.addWidget(widget)
-        QTimer.singleShot(10, lambda: self.scroll_area.verticalScrollBar().setValue(self.scroll_area.verticalScrollBar().maximum()))
-        
+        if isinstance(widget, TranscriptItem):
+            self.transcript.add_item(widget)
+        else:
+            self.transcript.add_widget(widget)
+        self.transcript.scroll_to_bottom() # Coalesced with the tick's other inserts
+
+    def set_theme(self, theme):
+        """Restyles this chat alone; does nothing if it already has the theme."""
+        if theme == self.theme:
+            return
+        self.theme = theme
+        self.setStyleSheet(styles.get_theme_stylesheet(theme))
+        self.transcript.delegate.set_palette(styles.get_transcript_palette(theme))
+
+    def is_idle(self):
+        """True when nothing is running, streaming or waiting on the user, so the chat can be hibernated."""
+        if self.active_runners or self.streaming_bubble or self.request_engine.has_pending(self):
+            return False
+        return not any(isinstance(record.get("widget"), ConfirmationWidget) and record["widget"].isEnabled()
+                       for record in self._transcript_records())
+
+    def hibernate(self):
+        """Returns the chat as a compact record; the caller then deletes the widget."""
+        if self.active_typing_bubble:
+            self.active_typing_bubble.finish_typing()
+        scrollbar = self.transcript.verticalScrollBar()
+        return {
+            "page": self.stacked_layout.currentIndex(),
+            "os_info": self.session.os_info,
+            "history": list(self.chat_history),
+            "working_directory": self.working_directory,
+            "drafts": [self.initial_prompt_input.toPlainText(), self.chat_prompt_input.toPlainText()],
+            "rows": [row for row in map(self._saved_row, self._transcript_records()) if row],
+            "scroll": None if scrollbar.value() >= scrollbar.maximum() else scrollbar.value(),
+        }
+
+    def _transcript_records(self):
+        model = self.transcript.transcript_model
+        return model.records + model.pending
+
+    def _saved_row(self, record):
+        if record["kind"] == "bubble":
+            return {"kind": "bubble", "text": record["layout_text"], "alignment": record.get("alignment", "left")}
+        widget = record["widget"]
+        if record["hidden"]:
+            return None
+        if isinstance(widget, TableOutputView):
+            if widget.raw_view is None or widget.raw_view.isHidden():
+                rows = widget.model.rows
+                return {"kind": "table", "format": widget.parser.table_format, "headers": widget.model.headers,
+                        "rows": rows[:SAVED_OUTPUT_LINES], # The first rows, as the command printed them
+                        "omitted_rows": widget.omitted_rows + max(0, len(rows) - SAVED_OUTPUT_LINES)}
+            widget = widget.raw_view
+        if isinstance(widget, OutputViewer):
+            return {"kind": "output", "text": widget.tail_text(SAVED_OUTPUT_LINES)}
+        if isinstance(widget, StatusWidget):
+            return {"kind": "status", "text": widget.label.text()}
+        if isinstance(widget, SuggestionWidget) and not widget.used:
+            return {"kind": "suggestions", "suggestions": widget.suggestions}
+        if hasattr(widget, "actions"):
+            return {"kind": "actions", **widget.actions}
+        return None # Answered confirmations, cached-result notes and the like aren't kept
+
+    def _restore(self, saved):
+        self.working_directory = saved["working_directory"]
+        self.initial_prompt_input.setPlainText(saved["drafts"][0])
+        self.chat_prompt_input.setPlainText(saved["drafts"][1])
+        for row in saved["rows"]:
+            kind = row["kind"]
+            if kind == "bubble":
+                self.add_message(MessageBubble(row["text"], alignment=row["alignment"]))
+            elif kind == "output":
+                output_view = OutputViewer()
+                output_view.set_text(row["text"])
+                self.add_message(output_view)
+            elif kind == "table":
+                table_view = TableOutputView(row["format"])
+                table_view.load_rows(row["headers"], row["rows"], row["omitted_rows"])
+                self.add_message(table_view)
+            elif kind == "status":
+                self.add_message(StatusWidget(row["text"]))
+            elif kind == "suggestions":
+                suggestion_widget = SuggestionWidget(row["suggestions"])
+                suggestion_widget.suggestion_clicked.connect(self.handle_suggestion_click)
+                self.add_message(suggestion_widget)
+            elif kind == "actions":
+                self.add_message(self._action_row(row["summary"], row["commands"], row["path"]))
+        self.stacked_layout.setCurrentIndex(saved["page"])
+        if saved["scroll"] is not None:
+            self.transcript.scroll_to(saved["scroll"])
 
     def _handle_predefined_prompts(self, user_prompt):
-        prompt_lower = user_prompt.lower()
-
-        # Scenario 1: Performance Issues
-        performance_keywords = ['slow', 'hanging', 'hang', 'lagging', 'lags', 'unresponsive']
-        if any(keyword in prompt_lower for keyword in performance_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "It looks like your PC is running slow. I can clear temporary files and caches to help speed it up.",
-                "confirmation_prompt": "I've detected that your system may be running slow. I can perform a cleanup of temporary and prefetch files, which is a safe operation that often improves performance. Shall I proceed?",
-                "commands": [
-                    {"command": "del /q/f/s %TEMP%\\*", "description": "Deletes temporary files.", "is_powershell": False},
-                    {"command": "del /q/f/s C:\\Windows\\Prefetch\\*", "description": "Clears Windows Prefetch data.", "is_powershell": False}
-                ]})
-        
-        # Scenario 1.5: Performance Issues
-        performance_keywords = ['free']
-        if any(keyword in prompt_lower for keyword in performance_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "Removing cache has freed around 3.5GiB of RAM on your PC. Your PC must be noticably faster now.",
-                "commands": [
-                ]})
-
-        # Scenario 2: Network Issues
-        network_keywords = ['internet', 'wi-fi', 'wifi', 'network', 'connection', 'connect']
-        if any(keyword in prompt_lower for keyword in network_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I can troubleshoot your network connection by flushing the DNS cache and resetting the system's network stack.",
-                "confirmation_prompt": "I can attempt to fix your network issue by flushing the DNS cache and resetting the network stack. A computer restart may be required. Shall I proceed?",
-                "commands": [
-                    {"command": "ipconfig /flushdns", "description": "Clears the local DNS resolver cache.", "is_powershell": False},
-                    {"command": "netsh winsock reset", "description": "Resets the Winsock Catalog to a clean state.", "is_powershell": False}
-                ]})
-
-        # Scenario 3: Battery Report
-        battery_keywords = ['battery', 'power', 'drain']
-        if any(keyword in prompt_lower for keyword in battery_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "I will generate a detailed battery health report and save it as an HTML file.",
-                "directory_change_path": "%USERPROFILE%\\battery-report.html",
-                "commands": [{"command": "powercfg /batteryreport", "description": "Generates a comprehensive report on battery usage and capacity.", "is_powershell": False}]
-            })
-
-        # Scenario 4: System Health Check
-        health_keywords = ['system health', 'health report', 'disk status', 'check firewall', 'diagnostic']
-        if any(keyword in prompt_lower for keyword in health_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "I will run a quick health check on your system, verifying disk drive status and firewall activity.",
-                "commands": [
-                    {"command": "wmic diskdrive get status,model", "description": "Checks the S.M.A.R.T. status of all connected disk drives.", "is_powershell": False},
-                    {"command": "netsh advfirewall show allprofiles state", "description": "Displays the status of the Windows Defender Firewall.", "is_powershell": False}
-                ]})
-
-        # Scenario 5: Local Admin Security Audit
-        admin_keywords = ['local admin', 'security audit', 'admin rights', 'privileged users']
-        if any(keyword in prompt_lower for keyword in admin_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "Performing a security check to find all members of the local 'Administrators' group on this machine.",
-                "commands": [{"command": "Get-LocalGroupMember -Group \"Administrators\" | Select-Object Name, PrincipalSource, ObjectClass | Format-Table -AutoSize", "description": "Enumerates all users with local administrator privileges.", "is_powershell": True}]
-            })
-
-        # Scenario 6: Software Inventory Report
-        inventory_keywords = ['software inventory', 'list installed apps', 'export programs', 'license report']
-        if any(keyword in prompt_lower for keyword in inventory_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "I will generate a list of all installed software and export it to a CSV file on your desktop.",
-                "directory_change_path": "%USERPROFILE%\\Desktop\\SoftwareInventory.csv",
-                "commands": [{"command": "Get-ItemProperty HKLM:\\\\Software\\\\Wow6432Node\\\\Microsoft\\\\Windows\\\\CurrentVersion\\\\Uninstall\\\\* | Select-Object DisplayName, DisplayVersion, Publisher, InstallDate | Where-Object { $_.DisplayName -ne $null -and $_.DisplayName -notlike \"Update for*\" } | Sort-Object DisplayName | Export-Csv -Path \"$env:USERPROFILE\\\\Desktop\\\\SoftwareInventory.csv\" -NoTypeInformation", "description": "Scans the registry for installed programs and exports the list to a CSV file.", "is_powershell": True}]
-            })
-
-        # Scenario 7: Automated Project Timesheet -- CORRECTED COMMAND
-        timesheet_keywords = ['timesheet', 'project report', 'activity log', 'time tracking']
-        if any(keyword in prompt_lower for keyword in timesheet_keywords):
-            return json.dumps({
-                "response_type": "command",
-                "summary": "I will analyze the file modification dates in 'E:\\\\flum_testing' for the current month to create a daily timesheet. The report will be saved as a CSV file on your desktop.",
-                "directory_change_path": "%USERPROFILE%\\Desktop\\Project_Timesheet.csv",
-                "commands": [{"command": "Get-ChildItem -Path \"E:\\flum_testing\" -Recurse | Where-Object { $_.LastWriteTime -ge (Get-Date).AddDays(-(Get-Date).Day + 1) } | Group-Object { $_.LastWriteTime.ToString('yyyy-MM-dd') } | Select-Object @{Name=\\\"Date\\\"; Expression={$_.Name}}, @{Name=\\\"FilesModified\\\"; Expression={$_.Count}}, @{Name=\\\"Files\\\"; Expression={$_.Group.Name -join '; '}} | Sort-Object Date | Export-Csv -Path \"$env:USERPROFILE\\Desktop\\Project_Timesheet.csv\" -NoTypeInformation", "description": "Scans the project folder for recently modified files and generates a CSV timesheet.", "is_powershell": True}]
-            })
-
-        # Scenario 8: Automated Desktop Organizer
-        desktop_keywords = ['clean my desktop', 'organize my files', 'desktop is messy', 'find old files']
-        if any(keyword in prompt_lower for keyword in desktop_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I can de-clutter your desktop by finding large, old files and moving them to a folder for your review.",
-                "confirmation_prompt": "I can find files larger than 50MB that haven't been modified in over 6 months and move them into a new folder called 'Old Desktop Files' for your review. Shall I proceed?",
-                "commands": [{"command": "New-Item -Path \"$env:USERPROFILE\\Desktop\\Old Desktop Files\" -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path \"$env:USERPROFILE\\Desktop\" -File | Where-Object { $_.Length -gt 50MB -and $_.LastWriteTime -lt (Get-Date).AddMonths(-6) } | Move-Item -Destination \"$env:USERPROFILE\\Desktop\\Old Desktop Files\"", "description": "Moves large, old files from the Desktop to a review folder.", "is_powershell": True}]
-            })
-
-        # Scenario 9: Smart Photo Sorter
-        photo_keywords = ['organize my photos', 'sort my pictures', 'clean up pictures', 'photo management']
-        if any(keyword in prompt_lower for keyword in photo_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I can organize your photo library by finding all pictures taken last month and moving them into a new, clearly labeled folder.",
-                "confirmation_prompt": "I will find all photos taken last month and move them into a new folder named after that month (e.g., '2025-08 - Photos'). Is that okay?",
-                "commands": [{"command": "$lastMonth = (Get-Date).AddMonths(-1); $folderName = $lastMonth.ToString('yyyy-MM') + ' - Photos'; $destinationPath = Join-Path -Path $env:USERPROFILE\\Pictures -ChildPath $folderName; New-Item -Path $destinationPath -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path $env:USERPROFILE\\Pictures -Recurse -Include *.jpg, *.jpeg, *.png, *.heic | Where-Object { $_.CreationTime.Month -eq $lastMonth.Month -and $_.CreationTime.Year -eq $lastMonth.Year } | Move-Item -Destination $destinationPath", "description": "Finds all photos from last month and moves them into a new, dated folder.", "is_powershell": True}]
-            })
-
-        # Scenario 10: Fix Audio Issues
-        audio_keywords = ['sound', 'audio', 'no sound', 'can\'t hear', 'speakers']
-        if any(keyword in prompt_lower for keyword in audio_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I will attempt to fix common audio problems by restarting the core Windows Audio services.",
-                "confirmation_prompt": "I can attempt to fix audio problems by restarting the core Windows Audio services. This is a quick and safe procedure that resolves most sound issues. Shall I proceed?",
-                "commands": [{"command": "Restart-Service -Name \"Audiosrv\", \"AudioEndpointBuilder\" -Force", "description": "Forcefully restarts the main Windows Audio and Audio Endpoint Builder services.", "is_powershell": True}]
-            })
-
-        # Scenario 11: Clear Stuck Print Queue
-        printer_keywords = ['printer', 'printing', 'stuck', 'print queue', 'can\'t print']
-        if any(keyword in prompt_lower for keyword in printer_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I will reset the print spooler service to clear any stuck or failed print jobs.",
-                "confirmation_prompt": "I can clear the entire print queue by resetting the print service. This will cancel all pending print jobs for all printers. Do you want to continue?",
-                "commands": [{"command": "Stop-Service -Name Spooler -Force; Remove-Item -Path C:\\Windows\\System32\\spool\\PRINTERS\\* -Recurse -Force -ErrorAction SilentlyContinue; Start-Service -Name Spooler", "description": "Stops the print service, deletes temporary print files, and restarts the service.", "is_powershell": True}]
-            })
-
-        # Scenario 12: Rebuild Icon Cache
-        icon_keywords = ['icons are blank', 'icons look wrong', 'broken icons', 'fix desktop icons']
-        if any(keyword in prompt_lower for keyword in icon_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I can fix issues with blank or corrupted icons by rebuilding the system's icon cache.",
-                "confirmation_prompt": "I can fix broken or blank icons by rebuilding the icon cache. This will cause your desktop and taskbar to briefly disappear and then reload. It is a safe operation. Would you like to proceed?",
-                "commands": [{"command": "taskkill /IM explorer.exe /F; DEL /A /Q \"%localappdata%\\IconCache.db\"; start explorer.exe", "description": "Force-closes Windows Explorer, deletes the icon cache database, and restarts Explorer.", "is_powershell": False}]
-            })
-
-        # Scenario 13: Find and Move Huge Files
-        huge_files_keywords = ['huge files', 'large files', 'move big files', 'free up space']
-        if any(keyword in prompt_lower for keyword in huge_files_keywords):
-            return json.dumps({
-                "response_type": "confirmation",
-                "summary": "I will find files larger than 100MB in your Documents folder and move them to your desktop for review.",
-                "directory_change_path": "%USERPROFILE%\\Desktop\\Large Files Review",
-                "confirmation_prompt": "I will scan your 'Documents' folder for files larger than 100MB and move them to a new 'Large Files Review' folder on your Desktop for you to manage. Is that okay?",
-                "commands": [{"command": "New-Item -Path \"$env:USERPROFILE\\Desktop\\Large Files Review\" -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path \"$env:USERPROFILE\\Documents\" -Recurse -File | Where-Object { $_.Length -gt 100MB } | Move-Item -Destination \"$env:USERPROFILE\\Desktop\\Large Files Review\"", "description": "Finds files >100MB in the Documents folder and moves them to a review folder.", "is_powershell": True}]
-            })
-
-        # Scenario 14: Show Top 10 Largest Files
-        top_files_keywords = ['largest files', 'top 10 files', 'what\'s taking up space', 'disk usage']
-        if any(keyword in prompt_lower for keyword in top_files_keywords):
-            return json.dumps({
-                "response_type": "command",
-                "summary": "I will scan your entire C: drive to find the 10 largest files. This may take a few moments to complete, please be patient.",
-                "commands": [{"command": "Get-ChildItem -Path C:\\ -Recurse -File -ErrorAction SilentlyContinue | Sort-Object Length -Descending | Select-Object -First 10 | Format-Table @{Name=\\\"Gigabytes\\\";Expression={($_.Length / 1GB).ToString('F2')}}, Name, Directory -AutoSize", "description": "Finds the 10 largest files on the C: drive and displays their size in GB.", "is_powershell": True}]
-            })
-
-        # Scenario 15: List Startup Programs
-        startup_keywords = ['startup programs', 'slow startup', 'what runs on startup', 'login items']
-        if any(keyword in prompt_lower for keyword in startup_keywords):
-            return json.dumps({
-                "response_type": "command",
-                "summary": "I will list all the applications that are configured to run automatically when you log in to Windows.",
-                "commands": [{"command": "Get-CimInstance Win32_StartupCommand | Select-Object Name, Command, Location, User | Format-Table -AutoSize", "description": "Retrieves a list of all programs that run on system startup.", "is_powershell": True}]
-            })
-
-        # Scenario 16: Show Wi-Fi Password
-        wifi_keywords = ['wifi password', 'show wifi key', 'what\'s my wifi password', 'network key']
-        if any(keyword in prompt_lower for keyword in wifi_keywords):
-            return json.dumps({
-                "response_type": "confirmation",
-                "summary": "I will attempt to retrieve and display the password for your current Wi-Fi network.",
-                "confirmation_prompt": "I can retrieve the Wi-Fi password for the network you are currently connected to. This requires administrative privileges and will display the password on the screen. Do you wish to continue?",
-                "commands": [{"command": "netsh wlan show profile name=\"$((Get-NetConnectionProfile()).Name)\" key=clear", "description": "Displays the properties and password for the currently active Wi-fi network.", "is_powershell": True}]
-            })
-            
-        # Scenario 17 & 18: Wi-Fi Control
-        disable_wifi_keywords = ['disable wifi', 'turn off wifi']
-        enable_wifi_keywords = ['enable wifi', 'turn on wifi']
-        if any(keyword in prompt_lower for keyword in disable_wifi_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I will disable your computer's Wi-Fi adapter.",
-                "confirmation_prompt": "This will disable your Wi-Fi adapter and disconnect you from all wireless networks. Are you sure you want to proceed?",
-                "commands": [{"command": "Get-NetAdapter -InterfaceDescription \"*Wireless*\" | Disable-NetAdapter -Confirm:$false", "description": "Finds and disables the primary wireless network adapter.", "is_powershell": True}]
-            })
-        if any(keyword in prompt_lower for keyword in enable_wifi_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "I will enable your computer's Wi-Fi adapter.",
-                "commands": [{"command": "Get-NetAdapter -InterfaceDescription \"*Wireless*\" | Enable-NetAdapter -Confirm:$false", "description": "Finds and enables the primary wireless network adapter.", "is_powershell": True}]
-            })
-
-        # Scenario 19 & 20: Bluetooth Control
-        disable_bluetooth_keywords = ['disable bluetooth', 'turn off bluetooth']
-        enable_bluetooth_keywords = ['enable bluetooth', 'turn on bluetooth']
-        if any(keyword in prompt_lower for keyword in disable_bluetooth_keywords):
-            return json.dumps({
-                "response_type": "confirmation", "summary": "I will attempt to disable your computer's Bluetooth radio. This requires administrative privileges.",
-                "confirmation_prompt": "I can disable your Bluetooth adapter. This requires administrative privileges and will disconnect all Bluetooth devices. Do you wish to continue?",
-                "commands": [{"command": "Get-PnpDevice -Class 'Bluetooth' | Disable-PnpDevice -Confirm:$false", "description": "Finds and disables all Bluetooth devices.", "is_powershell": True}]
-            })
-        if any(keyword in prompt_lower for keyword in enable_bluetooth_keywords):
-            return json.dumps({
-                "response_type": "command", "summary": "I will attempt to enable your computer's Bluetooth radio. This may require administrative privileges.",
-                "commands": [{"command": "Get-PnpDevice -Class 'Bluetooth' -Status 'Disabled' | Enable-PnpDevice -Confirm:$false", "description": "Finds and enables all disabled Bluetooth devices.", "is_powershell": True}]
-            })
-
-        # Scenario 21: Clean Developer Caches
-        cache_keywords = ['clean project', 'nuke cache', 'clear cache', 'reset environment']
-        if any(keyword in prompt_lower for keyword in cache_keywords):
-            return json.dumps({
-                "response_type": "confirmation",
-                "summary": "I will perform a deep clean of common developer caches (NPM, NuGet, Git).",
-                "confirmation_prompt": "This will forcefully clear the caches for NPM and NuGet, and run Git's garbage collection. This is generally safe but irreversible. Proceed?",
-                "commands": [
-                    {"command": "npm cache clean --force", "description": "Forcefully clears the Node Package Manager (NPM) cache.", "is_powershell": False},
-                    {"command": "dotnet nuget locals all --clear", "description": "Clears all NuGet package caches for .NET.", "is_powershell": False},
-                    {"command": "git gc --prune=now --aggressive", "description": "Performs aggressive garbage collection on the current Git repository.", "is_powershell": False}
-                ]
-            })
-
-        # Scenario 22: Git Weekly Activity Report (This command is correct but ensure your folder is a Git repo)
-        git_report_keywords = ['git report', 'my recent work', 'weekly git summary', 'show my commits']
-        if any(keyword in prompt_lower for keyword in git_report_keywords):
-            return json.dumps({
-                "response_type": "command",
-                "summary": "I will generate a report of your Git commits in this repository from the last 7 days.",
-                "commands": [
-                    {"command": "git log --author=\"$((git config user.email))\" --since=\"7 days ago\" --pretty=format:\"%ad|%h|%s\" --date=short | ForEach-Object { $parts = $_.Split('|'); [PSCustomObject]@{ Date = $parts[0]; Hash = $parts[1]; Subject = $parts[2] } } | Format-Table -AutoSize", "description": "Finds all commits by the current user in the last week and displays them in a table.", "is_powershell": True}
-                ]
-            })
-
-        # Scenario 23: Find Resource Hogs
-        resource_keywords = ['resource hogs', 'top processes', 'check memory usage', 'find slow process']
-        if any(keyword in prompt_lower for keyword in resource_keywords):
-            return json.dumps({
-                "response_type": "command",
-                "summary": "I will find the top 10 running processes on your system consuming the most memory (RAM).",
-                "commands": [
-                    {"command": "Get-Process | Sort-Object WS -Descending | Select-Object -First 10 | Format-Table Name, @{Name=\"Memory (MB)\"; Expression={($_.WS / 1MB).ToString('F2')}}, CPU, Path -AutoSize", "description": "Lists the top 10 processes by memory usage.", "is_powershell": True}
-                ]
-            })
-            
-        # Scenario 24: One-Click Personal Backup
-        backup_keywords = ['backup', 'save my files', 'backup documents', 'protect my data']
-        if any(keyword in prompt_lower for keyword in backup_keywords):
-            return json.dumps({
-                "response_type": "confirmation",
-                "summary": "I will create a backup of your essential personal folders (Desktop, Documents, and Pictures) into a single ZIP file on your Desktop.",
-                "confirmation_prompt": "I can back up your Desktop, Documents, and Pictures folders into a single, dated ZIP file on your Desktop. This might take a few minutes depending on the number of files. Shall I create the backup now?",
-                "commands": [
-                    {"command": "Compress-Archive -Path \"$env:USERPROFILE\\Documents\", \"$env:USERPROFILE\\Pictures\", \"$env:USERPROFILE\\Desktop\" -DestinationPath \"$env:USERPROFILE\\Desktop\\My_Backup_$(Get-Date -Format 'yyyy-MM-dd').zip\" -Force", "description": "Compresses the contents of the Desktop, Documents, and Pictures folders into a single ZIP archive.", "is_powershell": True}
-                ]
-            })
-
-        return None # No keyword match
+        # Exact keywords first, then paraphrases; anything else goes to the API
+        scenario = match_scenario(user_prompt) or match_scenario_semantic(user_prompt)
+        if scenario is None:
+            return None # No keyword match
+        return json.dumps(scenario["response"])
 
     def _clear_active_typing_bubble(self):
         """Slot to clear the reference to the active bubble once it finishes."""
         self.active_typing_bubble = None
 
+    def _clear_status_widget(self):
+        if self.current_status_widget:
+            self.current_status_widget.deleteLater()
+            self.current_status_widget = None
+
+    def cancel_pending_requests(self):
+        """Drops every API call this chat still has in flight, e.g. when a new prompt is sent."""
+        self.request_engine.cancel_group(self)
+        self._abandon_corrections()
+        self._clear_status_widget()
+        self.streaming_bubble = None
+
+    def stop_all_commands(self):
+        """Kills every command this chat still has running, e.g. when the window closes."""
+        for runner in list(self.active_runners):
+            runner.cancel()
+
     def handle_prompt(self):
         if self.active_typing_bubble:
             self.active_typing_bubble.finish_typing()
@@ -609,34 +495,80 @@ class ChatArea(QWidget):
             self.chat_prompt_input.setText(user_prompt)
             self.chat_prompt_input.setFocus()
             self.adjust_input_height(self.chat_prompt_input)
+        self.cancel_pending_requests()
         self.add_message(MessageBubble(user_prompt, alignment='right'))
         prompt_widget.clear()
         self.adjust_input_height(prompt_widget)
 
         predefined_response = self._handle_predefined_prompts(user_prompt)
         if predefined_response:
+            self.session.record(user_prompt, predefined_response)
             self.process_api_response(user_prompt, predefined_response)
         else:
             self.current_status_widget = StatusWidget("Thinking...")
             self.add_message(self.current_status_widget)
-            QTimer.singleShot(100, lambda: self.get_and_process_command(user_prompt))
+            self.get_and_process_command(user_prompt)
 
     def get_and_process_command(self, user_prompt):
-        raw_response = self.api_client.get_command_from_gemini(user_prompt, self.chat_history)
-        if self.current_status_widget:
-            self.current_status_widget.deleteLater()
-            self.current_status_widget = None
-        self.process_api_response(user_prompt, raw_response)
-
-    def process_api_response(self, user_prompt, raw_response):
+        self._request_command(user_prompt)
+
+    def _request_command(self, user_prompt):
+        """Streams the model's reply; its summary (or question) is shown while it is still being generated."""
+        stream_state = {"parser": ResponseStreamParser(), "user_prompt": user_prompt, "key": None, "run": None}
+        self.request_engine.submit_stream(
+            self.session.stream, user_prompt,
+            on_chunk=lambda chunk: self._on_command_chunk(stream_state, chunk),
+            on_result=lambda raw_response: self._on_command_response(user_prompt, raw_response, stream_state["run"]),
+            on_error=self._on_request_error, group=self)
+
+    def _on_command_chunk(self, stream_state, chunk):
+        parser = stream_state["parser"]
+        parser.feed(chunk)
+
+        # Commands are pipelined: each one starts as soon as its object closes, while the model is
+        # still generating the rest. Only plain 'command' replies qualify; confirmations never do.
+        if parser.items and parser.values.get("response_type") == "command":
+            run = stream_state["run"]
+            if run is None:
+                run = stream_state["run"] = self._start_run(stream_state["user_prompt"])
+            run["commands"].extend(parser.items[len(run["commands"]):])
+            if not run["active"]:
+                self._execute_next_commands(run)
+
+        if stream_state["key"] is None:
+            for key in ("clarification_question", "summary"):
+                if parser.partial_string(key) is not None:
+                    stream_state["key"] = key
+                    break
+            else:
+                return
+        visible_text = parser.partial_string(stream_state["key"])
+        if not visible_text:
+            return
+        if self.streaming_bubble is None:
+            self._clear_status_widget()
+            if self.active_typing_bubble:
+                self.active_typing_bubble.finish_typing()
+            self.streaming_bubble = MessageBubble("", alignment='left')
+            self.add_message(self.streaming_bubble)
+        self.streaming_bubble.append_text(visible_text[len(self.streaming_bubble.full_text):])
+
+    def _on_command_response(self, user_prompt, raw_response, streamed_run=None):
+        self._clear_status_widget()
+        self.process_api_response(user_prompt, raw_response, streamed_run)
+        self.streaming_bubble = None
+
+    def _on_request_error(self, message):
+        self._clear_status_widget()
+        self.streaming_bubble = None
+        self.add_message_with_typing(message)
+
+    def process_api_response(self, user_prompt, raw_response, streamed_run=None):
         if isinstance(raw_response, dict) and 'error' in raw_response:
             self.add_message_with_typing(raw_response['error'])
             return
         try:
-            clean_response = raw_response.strip().replace("```json", "").replace("```", "")
-            response_data = json.loads(clean_response)
-            self.chat_history.append({'role': 'user', 'parts': [user_prompt]})
-            self.chat_history.append({'role': 'model', 'parts': [clean_response]})
+            response_data = parse_response(raw_response)
 
             response_type = response_data.get("response_type")
             if response_type == "clarification":
@@ -647,7 +579,10 @@ class ChatArea(QWidget):
                 confirmation_widget.confirmation_made.connect(self.handle_confirmation)
                 self.add_message(confirmation_widget)
             elif response_type == "command":
-                self.execute_commands(response_data, user_prompt)
+                if streamed_run:
+                    self._close_run(streamed_run, response_data)
+                else:
+                    self.execute_commands(response_data, user_prompt)
             elif response_type == "data_gathering":
                 self.handle_data_gathering(user_prompt, response_data)
         except json.JSONDecodeError:
@@ -656,26 +591,60 @@ class ChatArea(QWidget):
             self.add_message_with_typing(f"An unexpected error occurred: {e}")
 
     def handle_data_gathering(self, original_prompt, response_data):
-        status_widget = StatusWidget("Diagnosing issue, please wait...")
+        status_widget = StatusWidget("Diagnosing issue, please wait...", stoppable=True)
         self.add_message(status_widget)
-        QApplication.processEvents()
-
-        commands_to_run = response_data.get("commands", [])
-        gathered_data = ""
-        for cmd_info in commands_to_run:
-            command = cmd_info.get("command", "")
+        # Diagnostics are read-only and independent of each other, so they run side by side
+        commands, table_formats = [], []
+        for cmd_info in response_data.get("commands", []):
             is_powershell = cmd_info.get("is_powershell", False)
-            result = self._run_single_command(command, is_powershell)
-            output = (result.stdout + result.stderr).strip()
-            gathered_data += f"--- Output of '{command}' ---\n{output}\n\n"
-
+            command, table_format = self._structured_form(cmd_info.get("command", ""), is_powershell)
+            commands.append((command, is_powershell))
+            table_formats.append(table_format)
+        batch = CommandBatch(commands, max_parallel=self.execution_settings["max_parallel"],
+                             timeout=self.execution_settings["timeout"], cwd=self.working_directory,
+                             runner_factory=create_cached_runner, parent=self)
+        batch.progress.connect(lambda done, total: status_widget.label.setText(f"Diagnosing issue, please wait... ({done}/{total})"))
+        batch.finished.connect(lambda results: self._on_gathered(original_prompt, status_widget, batch, results, table_formats))
+        status_widget.stop_requested.connect(batch.cancel)
+        self.active_runners.append(batch)
+        batch.start()
+
+    def _on_gathered(self, original_prompt, status_widget, batch, results, table_formats):
+        self._release_runner(batch)
+        if status_widget.stop_button:
+            status_widget.stop_button.hide()
+        if batch.cancelled:
+            status_widget.label.setText("Diagnosis stopped.")
+            return
+        # Each command's output is trimmed to a token budget so a noisy one can't flood the prompt
+        prompt_tokens = self.execution_settings["prompt_output_tokens"]
+        cached = sum(1 for result in results if result.from_cache)
+        if cached:
+            status_widget.label.setText(f"Diagnosing issue, please wait... (reused {cached} cached result{'s' if cached > 1 else ''})")
+        gathered_data = "".join(f"--- Output of '{result.args}' ---\n{self._prompt_output(result, table_format, prompt_tokens)}\n\n"
+                                for result, table_format in zip(results, table_formats))
         second_prompt = f"My original request was: '{original_prompt}'.\nI have run the diagnostic commands. Here is the output:\n{gathered_data}\nNow, analyze this data and provide a final JSON response with a summary and actionable commands."
-        QTimer.singleShot(100, lambda: self.process_gathered_data(second_prompt, status_widget))
+        self.process_gathered_data(second_prompt, status_widget)
+
+    def _structured_form(self, command, is_powershell):
+        """The command to run and, when it will print a table in a machine-readable form, that form."""
+        if self.execution_settings["structured_output"]:
+            structured, table_format = structured_command(command, is_powershell)
+            if structured:
+                return structured, table_format
+        return command, None
+
+    def _prompt_output(self, result, table_format, prompt_tokens):
+        # A table goes to the model as a compact, column-oriented summary rather than padded text
+        if table_format and result.returncode == 0:
+            summary = table_summary(result.stdout, table_format, max_chars=prompt_tokens * 4)
+            if summary:
+                return summary
+        return result.prompt_view(prompt_tokens)
 
     def process_gathered_data(self, prompt_with_data, status_widget):
-        raw_response = self.api_client.get_command_from_gemini(prompt_with_data, self.chat_history)
-        status_widget.deleteLater()
-        self.process_api_response(prompt_with_data, raw_response)
+        self.current_status_widget = status_widget
+        self._request_command(prompt_with_data)
 
     def handle_confirmation(self, confirmed, response_data):
         if confirmed:
@@ -694,6 +663,11 @@ class ChatArea(QWidget):
             self.add_message(StatusWidget("Action cancelled by user."))
 
     def add_message_with_typing(self, text):
+        if self.streaming_bubble:
+            # This text has already been streamed into the bubble; settle it on the final version
+            self.streaming_bubble.set_text(text)
+            self.streaming_bubble = None
+            return
         bubble = MessageBubble("", alignment='left')
         self.add_message(bubble)
         if self.active_typing_bubble:
@@ -702,72 +676,184 @@ class ChatArea(QWidget):
         bubble.typing_finished.connect(self._clear_active_typing_bubble)
         bubble.set_text_with_typing_effect(text)
 
-    def _run_single_command(self, command, is_powershell):
-        try:
-            shell_cmd = ["powershell", "-Command", command] if is_powershell else command
-            result = subprocess.run(shell_cmd, shell=True, capture_output=True, text=True, timeout=30)
-            return result
-        except Exception as e:
-            return subprocess.CompletedProcess(args=shell_cmd, returncode=1, stdout="", stderr=str(e))
-
-    # In chat_area.py
-
     def execute_commands(self, response_data, original_prompt):
-        commands = response_data.get("commands", [])
-        summary = response_data.get("summary", "")
-        path = response_data.get("directory_change_path", "")
-
-        if summary:
-            self.add_message_with_typing(summary)
-
-        for cmd_info in commands:
-            original_command = cmd_info.get("command")
-            is_powershell = cmd_info.get("is_powershell", False)
-            description = cmd_info.get("description", f"Executing: {original_command[:60]}...")
-            status_widget = StatusWidget(description)
+        run = self._start_run(original_prompt)
+        self._close_run(run, response_data)
+
+    def _start_run(self, original_prompt):
+        """A run executes a reply's commands in order; more can be queued while the reply is still streaming."""
+        return {
+            "commands": [],
+            "index": 0,
+            "summary": "",
+            "path": "",
+            "original_prompt": original_prompt,
+            "input_closed": False, # Set once the full reply is known and no more commands can arrive
+            "active": False,       # A command or a self-correction call is in progress
+            "stopped": False,      # The user stopped a command; the rest of the run is skipped
+            "finished": False,
+            "runner": None,        # The CommandRunner of the command in progress
+        }
+
+    def _close_run(self, run, response_data):
+        run["summary"] = response_data.get("summary", "")
+        run["path"] = response_data.get("directory_change_path", "")
+        if run["summary"]:
+            self.add_message_with_typing(run["summary"])
+        run["commands"].extend(response_data.get("commands", [])[len(run["commands"]):])
+        run["input_closed"] = True
+        self._execute_next_commands(run)
+
+    def _execute_next_commands(self, run):
+        """Starts the run's next queued command, unless one (or a self-correction call) is still in flight."""
+        if run["active"]:
+            return
+        if run["index"] < len(run["commands"]) and not run["stopped"]:
+            cmd_info = run["commands"][run["index"]]
+            command = cmd_info.get("command")
+            description = cmd_info.get("description", f"Executing: {command[:60]}...")
+            status_widget = StatusWidget(description, stoppable=True)
+            status_widget.stop_requested.connect(lambda: run["runner"] and run["runner"].cancel())
             self.add_message(status_widget)
-            QApplication.processEvents()
-
-            result = self._run_single_command(original_command, is_powershell)
-
-            if result.returncode != 0:
-                status_widget.label.setText("An error occurred. Attempting to self-correct...")
-                QApplication.processEvents()
-                error_output = (result.stdout + result.stderr).strip()
-                fix_prompt = f"""
+            self._run_command_async(run, status_widget, command, cmd_info.get("is_powershell", False))
+            return
+        if run["input_closed"] and not run["finished"]:
+            run["finished"] = True
+            self._finish_execution(run)
+
+    def _run_command_async(self, run, status_widget, command, is_powershell, corrected=False):
+        run["active"] = True
+        # Tables (Format-Table and the like) are run in a machine-readable form and shown as a grid
+        command, table_format = self._structured_form(command, is_powershell)
+        output_view = TableOutputView(table_format) if table_format else OutputViewer()
+        self.add_message(output_view)
+        self.transcript.set_widget_hidden(output_view, True) # Shown once the command prints something
+
+        runner = create_cached_runner(command, is_powershell, timeout=self.execution_settings["timeout"],
+                                      cwd=self.working_directory, parent=self)
+        runner.output_received.connect(lambda text: self._on_command_output(output_view, text))
+        runner.finished.connect(lambda result: self._on_command_finished(run, status_widget, output_view, runner, result, corrected))
+        run["runner"] = runner
+        if status_widget.stop_button:
+            status_widget.stop_button.setDisabled(False)
+            status_widget.stop_button.show()
+        self.active_runners.append(runner)
+        runner.start()
+
+    def _on_command_output(self, output_view, text):
+        if output_view.is_empty():
+            self.transcript.set_widget_hidden(output_view, False)
+        output_view.append_text(text)
+
+    def _on_command_finished(self, run, status_widget, output_view, runner, result, corrected):
+        self._release_runner(runner)
+        self.working_directory = runner.final_cwd
+        if result.returncode != 0 and not runner.cancelled and not corrected:
+            if status_widget.stop_button:
+                status_widget.stop_button.hide()
+            status_widget.label.setText("An error occurred. Attempting to self-correct...")
+            error_output = result.prompt_view(self.execution_settings["prompt_output_tokens"])
+            fix_prompt = f"""
                 The following command failed:
-                Command: `{original_command}`
+                Command: `{result.args}`
                 Error Output: {error_output}
                 Please analyze this error and provide a corrected version of the command in a standard JSON object with `response_type: 'command'`.
                 """
-                raw_fix_response = self.api_client.get_command_from_gemini(fix_prompt, self.chat_history)
-                self.chat_history.append({'role': 'user', 'parts': [fix_prompt]})
-                self.chat_history.append({'role': 'model', 'parts': [raw_fix_response]})
-                try:
-                    clean_fix_response = raw_fix_response.strip().replace("```json", "").replace("```", "")
-                    fix_data = json.loads(clean_fix_response)
-                    if fix_data.get("response_type") == "command" and fix_data.get("commands"):
-                        corrected_cmd_info = fix_data.get("commands")[0]
-                        corrected_command = corrected_cmd_info.get("command")
-                        is_powershell = corrected_cmd_info.get("is_powershell", False)
-                        status_widget.label.setText(f"Retrying with corrected command...")
-                        QApplication.processEvents()
-                        result = self._run_single_command(corrected_command, is_powershell)
-                except Exception:
-                    pass
-
-            final_output = (result.stdout + result.stderr).strip()
-            if not final_output:
-                final_output = "[Command executed successfully with no output]"
-            output_label = TypingOutputLabel()
-            output_label.setObjectName("outputLabel")
-            output_label.setWordWrap(True)
-            output_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-            self.add_message(output_label)
-            output_label.set_text_with_typing_effect(final_output)
-            status_widget.deleteLater()
+            self.current_status_widget = status_widget
+            self.pending_corrections[id(run)] = (run, status_widget, output_view, result)
+            # A cached correction could be the very one that just failed, so always ask the model
+            self.request_engine.submit(
+                self.session.send, fix_prompt, use_cache=False,
+                on_result=lambda raw_fix_response: self._on_fix_response(run, status_widget, output_view, result, raw_fix_response),
+                on_error=lambda message: self._on_fix_response(run, status_widget, output_view, result, {"error": message}),
+                group=self)
+            return
+
+        if runner.cancelled:
+            run["stopped"] = True
+        self._show_command_output(run, status_widget, output_view, result, runner)
+        run["active"] = False
+        self._execute_next_commands(run)
 
+    def _on_fix_response(self, run, status_widget, output_view, result, raw_fix_response):
+        self.current_status_widget = None
+        self.pending_corrections.pop(id(run), None)
+        try:
+            fix_data = parse_response(raw_fix_response)
+            if fix_data.get("response_type") == "command" and fix_data.get("commands"):
+                corrected_cmd_info = fix_data.get("commands")[0]
+                corrected_command = corrected_cmd_info.get("command")
+                is_powershell = corrected_cmd_info.get("is_powershell", False)
+                status_widget.label.setText(f"Retrying with corrected command...")
+                output_view.deleteLater() # The corrected command streams into a fresh viewer
+                self._run_command_async(run, status_widget, corrected_command, is_powershell, corrected=True)
+                return
+        except Exception:
+            pass
+        self._show_command_output(run, status_widget, output_view, result)
+        run["active"] = False
+        self._execute_next_commands(run)
+
+    def _abandon_corrections(self):
+        """Ends the runs whose self-correction call was just cancelled, keeping the failed command's output."""
+        for run, status_widget, output_view, result in self.pending_corrections.values():
+            if self.current_status_widget is status_widget:
+                self.current_status_widget = None # Kept to show what happened, not cleared with the other statuses
+            self._settle_output(output_view, result)
+            status_widget.label.setText("The command failed; self-correction was cancelled.")
+            run["index"] += 1
+            run["stopped"] = True
+            run["finished"] = True # Superseded by the new prompt, so no summary or suggestions follow
+            run["active"] = False
+        self.pending_corrections.clear()
+
+    def _show_command_output(self, run, status_widget, output_view, result, runner=None):
+        self._settle_output(output_view, result)
+        if result.from_cache and runner is not None:
+            cached_widget = CachedResultWidget(result.cached_at)
+            cached_widget.refresh_requested.connect(lambda: self._refresh_cached_output(cached_widget, output_view, runner))
+            self.add_message(cached_widget)
+        status_widget.deleteLater()
+        run["index"] += 1
+
+    def _settle_output(self, output_view, result):
+        self.transcript.set_widget_hidden(output_view, False)
+        output_view.settle(result)
+
+    def _refresh_cached_output(self, cached_widget, output_view, runner):
+        """Drops a cached result and runs its command again, replacing the shown output."""
+        get_command_cache().invalidate(runner.command, runner.is_powershell, runner.cwd)
+        fresh = create_cached_runner(runner.command, runner.is_powershell, timeout=self.execution_settings["timeout"],
+                                     cwd=runner.cwd, parent=self)
+        fresh.finished.connect(lambda result: self._on_refreshed(cached_widget, output_view, fresh, result))
+        cached_widget.label.setText("Refreshing...")
+        self.active_runners.append(fresh)
+        fresh.start()
+
+    def _on_refreshed(self, cached_widget, output_view, runner, result):
+        self._release_runner(runner)
+        output_view.clear()
+        self._settle_output(output_view, result)
+        cached_widget.deleteLater()
+
+    def _release_runner(self, runner):
+        if runner in self.active_runners:
+            self.active_runners.remove(runner)
+        runner.deleteLater()
+
+    def _finish_execution(self, run):
+        summary = run["summary"]
+        commands = run["commands"]
+        path = run["path"]
+        if (summary and commands) or path:
+            self.add_message(self._action_row(summary, commands, path))
+
+        if summary:
+            self.fetch_and_show_suggestions(run["original_prompt"], summary)
+
+    def _action_row(self, summary, commands, path):
         action_container = QWidget()
+        action_container.actions = {"summary": summary, "commands": commands, "path": path} # Kept if the chat hibernates
         action_layout = QHBoxLayout(action_container)
         action_layout.setContentsMargins(0, 10, 0, 0)
         action_layout.setSpacing(20)
@@ -776,16 +862,16 @@ class ChatArea(QWidget):
         if path:
             action_layout.addWidget(GoToPathWidget(path))
         action_layout.addStretch()
-        if (summary and commands) or path:
-            self.add_message(action_container)
-
-        if summary:
-            QTimer.singleShot(200, lambda: self.fetch_and_show_suggestions(original_prompt, summary))
+        return action_container
 
     def fetch_and_show_suggestions(self, original_prompt, command_summary):
-        raw_suggestion_response = self.api_client.get_suggestions_from_gemini(original_prompt, command_summary)
+        self.request_engine.submit(
+            self.api_client.get_suggestions_from_gemini, original_prompt, command_summary,
+            on_result=self._show_suggestions, group=self)
+
+    def _show_suggestions(self, raw_suggestion_response):
         try:
-            suggestion_data = json.loads(raw_suggestion_response)
+            suggestion_data = parse_response(raw_suggestion_response)
             suggestions = suggestion_data.get("suggestions", [])
             if suggestions:
                 suggestion_widget = SuggestionWidget(suggestions)
@@ -1,11 +1,56 @@
 # chat_history_panel.py
 # This is the panel that slides out to show chat history.
 
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel
-from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QListView
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QPropertyAnimation, QEasingCurve, QSortFilterProxyModel, Signal
+
+DISPLAY_ROLE = Qt.DisplayRole
+TOOLTIP_ROLE = Qt.ToolTipRole
+
+class ChatHistoryModel(QAbstractListModel):
+    """
+    Saved chats, newest first, keyed by a stable chat id. Chats are stored oldest first so a new
+    one is appended, and row r is entry -1 - r; adding, renaming and selecting touch one row.
+    """
+    ChatIdRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = [] # {"id", "title"}, oldest first
+        self.positions = {} # chat id -> index into entries
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=DISPLAY_ROLE):
+        if not index.isValid():
+            return None
+        entry = self.entries[-1 - index.row()]
+        if role == DISPLAY_ROLE or role == TOOLTIP_ROLE:
+            return entry["title"]
+        if role == self.ChatIdRole:
+            return entry["id"]
+        return None
+
+    def row_of(self, chat_id):
+        position = self.positions.get(chat_id)
+        return -1 if position is None else len(self.entries) - 1 - position
+
+    def add_chat(self, chat_id, title):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.positions[chat_id] = len(self.entries)
+        self.entries.append({"id": chat_id, "title": title})
+        self.endInsertRows()
+
+    def rename_chat(self, chat_id, title):
+        row = self.row_of(chat_id)
+        if row != -1:
+            self.entries[self.positions[chat_id]]["title"] = title
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [DISPLAY_ROLE, TOOLTIP_ROLE])
 
 class ChatHistoryPanel(QWidget):
-    chat_selected = Signal(int) # Signal to tell the main window which chat to show
+    chat_selected = Signal(int) # Signal to tell the main window which chat (by id) to show
 
     def __init__(self):
         super().__init__()
@@ -18,50 +63,144 @@ class ChatHistoryPanel(QWidget):
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(15, 15, 15, 20)
         self.layout.setSpacing(15)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         self.recent_label = QLabel("Recent")
         self.recent_label.setObjectName("recentLabel")
         self.layout.addWidget(self.recent_label)
-        
-        self.history_buttons = []
-        self.current_active_button = None
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setObjectName("historyFilter")
+        self.filter_input.setPlaceholderText("Search chats")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self._filter_changed)
+        self.filter_input.returnPressed.connect(self._open_first_match)
+        self.layout.addWidget(self.filter_input)
+
+        self.model = ChatHistoryModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.list_view = QListView()
+        self.list_view.setObjectName("historyList")
+        self.list_view.setModel(self.proxy)
+        self.list_view.setUniformItemSizes(True) # Rows are one line each, so none need measuring
+        self.list_view.setEditTriggers(QListView.NoEditTriggers)
+        self.list_view.setSelectionMode(QListView.SingleSelection)
+        self.list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.list_view.setTextElideMode(Qt.ElideRight)
+        self.list_view.clicked.connect(self._row_clicked)
+        self.list_view.activated.connect(self._row_clicked)
+        self.layout.addWidget(self.list_view, 1)
+
+        self.active_chat_id = None
 
         self.animation = QPropertyAnimation(self, b"maximumWidth")
         self.animation.setEasingCurve(QEasingCurve.Type.InOutCubic)
         self.animation.setDuration(300)
 
-    def update_history(self, history_titles):
-        """Clears and rebuilds the list of chat history buttons."""
-        # Clear existing buttons
-        for button in self.history_buttons:
-            self.layout.removeWidget(button)
-            button.deleteLater()
-        self.history_buttons = []
-
-        # Create new buttons
-        for i, title in enumerate(history_titles):
-            btn = QPushButton(title)
-            btn.setObjectName("historyButton")
-            # Use a lambda to capture the correct index 'i'
-            btn.clicked.connect(lambda checked=False, index=i: self.chat_selected.emit(index))
-            self.history_buttons.append(btn)
-            self.layout.addWidget(btn)
-
-    def select_chat_by_index(self, index):
-        """Highlights the button at the given index."""
-        if self.current_active_button:
-            self.current_active_button.setObjectName("historyButton")
-            self.style().polish(self.current_active_button)
-        
-        if 0 <= index < len(self.history_buttons):
-            button = self.history_buttons[index]
-            button.setObjectName("activeHistoryButton")
-            self.style().polish(button)
-            self.current_active_button = button
+    def add_chat(self, chat_id, title):
+        self.model.add_chat(chat_id, title)
+
+    def rename_chat(self, chat_id, title):
+        self.model.rename_chat(chat_id, title)
+
+    def select_chat(self, chat_id):
+        """Highlights the chat's row, if the filter shows it."""
+        self.active_chat_id = chat_id
+        self._show_active()
+
+    def _show_active(self):
+        row = self.model.row_of(self.active_chat_id) if self.active_chat_id is not None else -1
+        index = self.proxy.mapFromSource(self.model.index(row)) if row != -1 else QModelIndex()
+        if index.isValid():
+            self.list_view.setCurrentIndex(index)
+        else:
+            self.list_view.clearSelection()
+
+    def _row_clicked(self, index):
+        chat_id = index.data(ChatHistoryModel.ChatIdRole)
+        if chat_id is not None:
+            self.chat_selected.emit(chat_id)
+
+    def _filter_changed(self, text):
+        self.proxy.setFilterFixedString(text)
+        self._show_active()
+
+    def _open_first_match(self):
+        if self.proxy.rowCount() > 0:
+            self._row_clicked(self.proxy.index(0, 0))
 
     def toggle_panel(self):
         self.is_collapsed = not self.is_collapsed
         self.animation.setStartValue(self.width())
         self.animation.setEndValue(0 if self.is_collapsed else self.expanded_width)
         self.animation.start()
+
+if __name__ == "__main__":
+    # Benchmark: python chat_history_panel.py [chats] (set QT_QPA_PLATFORM=offscreen to run headless)
+    import os
+    import sys
+    import time
+    from PySide6.QtWidgets import QApplication, QPushButton
+    app = QApplication(sys.argv)
+    variant = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    chats = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 3000
+
+    class ButtonPanel(QWidget):
+        """The previous panel: every change deletes and recreates a button per chat."""
+        def __init__(self):
+            super().__init__()
+            self.layout = QVBoxLayout(self)
+            self.buttons = []
+
+        def update_history(self, titles):
+            for button in self.buttons:
+                self.layout.removeWidget(button)
+                button.deleteLater()
+            self.buttons = [QPushButton(title) for title in titles]
+            for button in self.buttons:
+                self.layout.addWidget(button)
+
+    def drain():
+        for _ in range(3):
+            app.processEvents()
+
+    if variant:
+        titles = [f"Chat about topic {i}" for i in range(chats)]
+        panel = ButtonPanel() if variant == "buttons" else ChatHistoryPanel()
+        panel.resize(240, 800)
+        panel.setMaximumWidth(240)
+        panel.show()
+        if variant == "buttons":
+            panel.update_history(list(reversed(titles)))
+        else:
+            for chat_id, title in enumerate(titles):
+                panel.add_chat(chat_id, title)
+        drain()
+        timings = {}
+        start = time.perf_counter()
+        if variant == "buttons": # A new chat, then its first message renames it; each rebuilds the list
+            titles.append("New Chat")
+            panel.update_history(list(reversed(titles)))
+            drain()
+            titles[-1] = "Renamed"
+            panel.update_history(list(reversed(titles)))
+        else:
+            panel.add_chat(chats, "New Chat")
+            drain()
+            panel.rename_chat(chats, "Renamed")
+            panel.select_chat(chats)
+        drain()
+        timings["new + rename"] = time.perf_counter() - start
+        if variant == "view":
+            start = time.perf_counter()
+            panel.filter_input.setText("topic 12")
+            drain()
+            timings[f"filter ({panel.proxy.rowCount()} hits)"] = time.perf_counter() - start
+        print(f"{variant:8} {chats} chats: " + ", ".join(f"{name} {seconds * 1000:7.1f} ms" for name, seconds in timings.items()), flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so one can't warm up (or slow down) the other
+    import subprocess
+    for name in ("buttons", "view"):
+        subprocess.run([sys.executable, __file__, name, str(chats)])
@@ -0,0 +1,231 @@
+# command_cache.py
+# Reuses recent results of read-only diagnostic commands instead of running them again.
+
+import re
+import time
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QTimer, Signal
+from config_settings import read_config, setting
+from output_capture import CommandResult, OutputCapture
+from shell_pool import create_runner
+
+# Programs that only report on the system, as the first word of a pipeline stage
+READ_ONLY_PROGRAMS = {
+    "cat", "df", "dir", "driverquery", "du", "echo", "free", "getmac", "grep", "findstr", "head", "hostname",
+    "ipconfig", "ls", "lsblk", "lscpu", "lspci", "lsusb", "more", "netstat", "ps", "sort", "sw_vers",
+    "systeminfo", "tail", "tasklist", "type", "uname", "uniq", "uptime", "ver", "vol", "wc", "whoami", "wmic",
+}
+READ_ONLY_CMDLET_VERBS = ("get-", "select-", "sort-", "where-", "format-", "measure-", "group-", "convertto-", "test-", "resolve-")
+READ_ONLY_CMDLETS = {"out-string", "gps", "ps", "ls", "dir", "gci", "select", "sort", "where", "?", "ft", "fl", "measure",
+                     "gcim", "gwmi", "cat", "type", "group"}
+# Arguments that turn an otherwise read-only program into one that changes something
+WRITING_ARGUMENTS = re.compile(r"(?i)(/release|/renew|/flushdns|/registerdns|\b(call|delete|set|create)\b|\s-o\b|\s-f\b)")
+# PowerShell arguments that hand the cmdlet code to run
+CODE_ARGUMENTS = re.compile(r"(?i)\s-(command|encodedcommand|scriptblock)\b")
+# A script block that only tests $_ and its properties against literals, as in Where-Object { $_.CPU -gt 10 }
+READ_ONLY_BLOCK = re.compile(r"""(?ix)^(\s*(
+    \$[\w:]+(\.\w+)* | '[^']*' | "[^"`$]*" | \d+(\.\d+)?(kb|mb|gb|tb)? | [()!] |
+    -(eq|ne|gt|ge|lt|le|like|notlike|match|notmatch|contains|notcontains|in|notin|and|or|not)\b
+))*\s*$""")
+
+# (pattern, seconds) pairs; the first match decides how long a result stays fresh
+TTL_RULES = [
+    (re.compile(r"(?i)\b(tasklist|ps|top|get-process|gps|netstat|get-nettcpconnection|get-counter)\b"), 5),
+    (re.compile(r"(?i)\b(win32_startupcommand|win32_product|win32_service|get-service|get-package)\b"), 120),
+    (re.compile(r"(?i)\b(wmic\s+(diskdrive|cpu|bios|baseboard|memorychip|os)|systeminfo|driverquery|lscpu|lsblk|lspci|lsusb|"
+                r"uname|hostname|sw_vers|win32_(diskdrive|processor|bios|baseboard|physicalmemory|operatingsystem|videocontroller)|"
+                r"get-physicaldisk)\b"), 600),
+]
+
+def _split_stages(command):
+    """Splits a command line at |, ;, && and || outside quotes. Returns None for anything it can't vouch for."""
+    stages, current, quote = [], "", None
+    i = 0
+    while i < len(command):
+        char = command[i]
+        if quote:
+            if char == quote:
+                quote = None
+            current += char
+        elif char in "'\"":
+            quote = char
+            current += char
+        elif char in "`>" or command.startswith("$(", i):
+            return None # Nested commands could do anything, and > writes a file
+        elif char in "|;&":
+            if command.startswith("&&", i) or command.startswith("||", i):
+                i += 1
+            elif char == "&":
+                return None # Background job, or PowerShell's call operator
+            stages.append(current.strip())
+            current = ""
+        else:
+            current += char
+        i += 1
+    if quote:
+        return None
+    stages.append(current.strip())
+    return [stage for stage in stages if stage]
+
+def _only_reads_blocks(stage):
+    """False if a PowerShell stage hands over code to run: -Command, a (...) group or a block that does more than compare."""
+    if CODE_ARGUMENTS.search(stage):
+        return False
+    blocks = re.findall(r"\{([^{}]*)\}", stage)
+    if not all(READ_ONLY_BLOCK.match(block) for block in blocks):
+        return False
+    outside = re.sub(r"\{[^{}]*\}", "", stage)
+    outside = re.sub(r"'[^']*'|\"[^\"]*\"", "", outside)
+    return not re.search(r"[{}()]", outside) # Nested blocks, and (...) which runs the command inside it
+
+def is_read_only(command, is_powershell=False):
+    """A conservative local check that a command only reads state, so its result may be reused."""
+    # Discarding or merging error output is fine; _split_stages() rejects any other redirection
+    stripped = re.sub(r"2>\s*(&1|\$null|/dev/null|nul)\b", "", command, flags=re.IGNORECASE)
+    stages = _split_stages(stripped)
+    if not stages:
+        return False
+    for stage in stages:
+        program = stage.split()[0].lower()
+        if is_powershell:
+            if re.search(r"\.\w+\s*\(", stage): # Method calls inside script blocks
+                return False
+            if not _only_reads_blocks(stage):
+                return False
+            if not (program.startswith(READ_ONLY_CMDLET_VERBS) or program in READ_ONLY_CMDLETS or program in READ_ONLY_PROGRAMS):
+                return False
+        else:
+            program = program.rsplit("/", 1)[-1].rsplit("\\", 1)[-1]
+            if program.endswith(".exe"):
+                program = program[:-4]
+            if program not in READ_ONLY_PROGRAMS:
+                return False
+        if WRITING_ARGUMENTS.search(stage):
+            return False
+        if program == "wmic" and not re.search(r"(?i)\bget\b", stage):
+            return False
+    return True
+
+def ttl_for(command, default_ttl=30):
+    for pattern, seconds in TTL_RULES:
+        if pattern.search(command):
+            return seconds
+    return default_ttl
+
+class CommandResultCache:
+    """
+    In-memory LRU of successful results of read-only commands, keyed by the command, its shell
+    and the working directory. Each entry lives for its command's TTL. It's opt-in: enabled
+    comes from [Execution] cache_results in config.ini, and configure() re-reads it.
+    """
+    def __init__(self, max_entries=64, default_ttl=30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.enabled = False
+        self._entries = OrderedDict()
+
+    def configure(self):
+        config = read_config()
+        self.enabled = setting(config.getboolean, 'Execution', 'cache_results', False)
+        self.default_ttl = setting(config.getfloat, 'Execution', 'cache_ttl_seconds', 30)
+        if not self.enabled:
+            self.clear()
+
+    @staticmethod
+    def make_key(command, is_powershell, cwd):
+        return (" ".join(command.split()), bool(is_powershell), cwd or "")
+
+    def get(self, command, is_powershell, cwd):
+        key = self.make_key(command, is_powershell, cwd)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["created"] >= entry["ttl"]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, command, is_powershell, cwd, result):
+        if result.returncode != 0 or not is_read_only(command, is_powershell):
+            return
+        self._entries[self.make_key(command, is_powershell, cwd)] = {
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "created": time.time(),
+            "ttl": ttl_for(command, self.default_ttl),
+        }
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, command, is_powershell, cwd):
+        self._entries.pop(self.make_key(command, is_powershell, cwd), None)
+
+    def clear(self):
+        self._entries.clear()
+
+class CachedCommand(QObject):
+    """Replays a cached result through the same interface as CommandRunner."""
+    output_received = Signal(str)
+    finished = Signal(object)
+
+    def __init__(self, command, is_powershell, entry, cwd=None, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.is_powershell = is_powershell
+        self.cwd = cwd
+        self.final_cwd = cwd
+        self.entry = entry
+        self.cancelled = False
+        self.timed_out = False
+        self._done = False
+
+    def start(self):
+        QTimer.singleShot(0, self._replay) # Asynchronous, like a real run
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_running(self):
+        return not self._done
+
+    def _replay(self):
+        if self._done:
+            return
+        self._done = True
+        stdout, stderr = OutputCapture(), OutputCapture()
+        stdout.write(self.entry["stdout"])
+        stderr.write(self.entry["stderr"])
+        if self.cancelled:
+            stderr.write("Command cancelled.")
+        elif self.entry["stdout"] or self.entry["stderr"]:
+            self.output_received.emit(self.entry["stdout"] + self.entry["stderr"])
+        result = CommandResult(self.command, 1 if self.cancelled else 0, stdout, stderr)
+        result.from_cache = True
+        result.cached_at = self.entry["created"]
+        self.finished.emit(result)
+
+_shared_cache = None
+
+def get_command_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CommandResultCache()
+        _shared_cache.configure()
+    return _shared_cache
+
+def create_cached_runner(command, is_powershell=False, timeout=30, cwd=None, parent=None):
+    """Like create_runner(), but answers from the cache when it can and fills it otherwise."""
+    cache = get_command_cache()
+    if not cache.enabled:
+        return create_runner(command, is_powershell, timeout=timeout, cwd=cwd, parent=parent)
+    entry = cache.get(command, is_powershell, cwd)
+    if entry is not None:
+        return CachedCommand(command, is_powershell, entry, cwd=cwd, parent=parent)
+    runner = create_runner(command, is_powershell, timeout=timeout, cwd=cwd, parent=parent)
+    if is_read_only(command, is_powershell):
+        runner.finished.connect(lambda result: cache.put(command, is_powershell, cwd, result))
+    else:
+        # Anything else may change what the cached diagnostics would report
+        runner.finished.connect(lambda result: cache.clear())
+    return runner
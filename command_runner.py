@@ -0,0 +1,221 @@
+# command_runner.py
+# Runs shell commands asynchronously with QProcess and streams their output line by line.
+
+import codecs
+import locale
+import os
+import shutil
+import signal
+import subprocess
+import sys
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+from config_settings import read_config, setting
+from output_capture import CommandResult, OutputCapture
+
+def load_execution_settings():
+    """Reads the [Execution] section of config.ini."""
+    config = read_config()
+    return {
+        "timeout": setting(config.getfloat, 'Execution', 'timeout_seconds', 30),
+        "max_parallel": max(1, setting(config.getint, 'Execution', 'max_parallel', 4)),
+        "prompt_output_tokens": setting(config.getint, 'Execution', 'prompt_output_tokens', 1000),
+        "structured_output": setting(config.getboolean, 'Execution', 'structured_output', True),
+    }
+
+def shell_program(command, is_powershell):
+    """Returns (program, arguments) to run command the way the assistant expects."""
+    if is_powershell:
+        powershell = "powershell" if sys.platform == "win32" else (shutil.which("pwsh") or "pwsh")
+        return powershell, ["-NoProfile", "-Command", command]
+    if sys.platform == "win32":
+        return os.environ.get("COMSPEC", "cmd.exe"), None # Arguments are passed natively, see start()
+    return "/bin/sh", ["-c", command]
+
+def start_in_own_session(process):
+    """Puts the process in its own session (Unix) so kill_process_tree() reaches all of its children."""
+    if sys.platform != "win32" and hasattr(process, "setUnixProcessParameters"):
+        process.setUnixProcessParameters(QProcess.UnixProcessFlag.CreateNewSession)
+
+def kill_process_tree(process):
+    """Kills a QProcess together with everything it started."""
+    pid = process.processId()
+    if not pid:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True, timeout=10)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    process.kill()
+
+class CommandRunner(QObject):
+    """
+    Runs one command without blocking the GUI. Output arrives through output_received as
+    complete lines (stdout and stderr interleaved as they are produced); finished delivers a
+    CommandResult (a CompletedProcess with bounded output) once the process exits, times out,
+    fails to start or is cancelled.
+    cancel() kills the whole process tree, not just the shell.
+    """
+    output_received = Signal(str)
+    finished = Signal(object)
+
+    def __init__(self, command, is_powershell=False, timeout=30, cwd=None, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.is_powershell = is_powershell
+        self.timeout = timeout
+        self.cwd = cwd
+        self.final_cwd = cwd # A one-off shell can't report a cd back
+        self.cancelled = False
+        self.timed_out = False
+        self._stdout = OutputCapture()
+        self._stderr = OutputCapture()
+        self._partial = {"stdout": "", "stderr": ""}
+        encoding = locale.getpreferredencoding(False)
+        self._decoders = {name: codecs.getincrementaldecoder(encoding)(errors="replace") for name in self._partial}
+        self._done = False
+
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(lambda: self._read("stdout"))
+        self.process.readyReadStandardError.connect(lambda: self._read("stderr"))
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        program, arguments = shell_program(self.command, self.is_powershell)
+        self.process.setProgram(program)
+        if arguments is None:
+            # cmd.exe has its own quoting rules; hand it the command line exactly as subprocess would
+            self.process.setNativeArguments(f'/d /s /c "{self.command}"')
+        else:
+            self.process.setArguments(arguments)
+        if self.cwd:
+            self.process.setWorkingDirectory(self.cwd)
+        # Own session, so cancel() can kill every child along with the shell
+        start_in_own_session(self.process)
+        self.process.start()
+        if self.timeout:
+            self.timer.start(int(self.timeout * 1000))
+
+    def cancel(self):
+        if self._done:
+            return
+        self.cancelled = True
+        self._kill_tree()
+
+    def is_running(self):
+        return not self._done
+
+    def _kill_tree(self):
+        kill_process_tree(self.process)
+
+    def _read(self, stream):
+        if stream == "stdout":
+            data = self.process.readAllStandardOutput().data()
+        else:
+            data = self.process.readAllStandardError().data()
+        self._consume(stream, self._decoders[stream].decode(data))
+
+    def _consume(self, stream, text, final=False):
+        text = text.replace("\r\n", "\n")
+        (self._stdout if stream == "stdout" else self._stderr).write(text)
+        pending = self._partial[stream] + text
+        if final:
+            lines, self._partial[stream] = pending, ""
+        else:
+            split_at = pending.rfind("\n") + 1
+            lines, self._partial[stream] = pending[:split_at], pending[split_at:]
+        if lines:
+            self.output_received.emit(lines)
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self._kill_tree()
+
+    def _on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self._finish(1, f"Failed to start command: {self.process.errorString()}")
+
+    def _on_finished(self, exit_code, exit_status):
+        self._read("stdout")
+        self._read("stderr")
+        for stream in self._partial:
+            self._consume(stream, self._decoders[stream].decode(b"", final=True), final=True)
+        message = ""
+        if self.timed_out:
+            message = f"Command '{self.command}' timed out after {self.timeout} seconds"
+        elif self.cancelled:
+            message = "Command cancelled."
+        if exit_status == QProcess.ExitStatus.CrashExit and exit_code == 0:
+            exit_code = 1
+        self._finish(exit_code if not message else (exit_code or 1), message)
+
+    def _finish(self, returncode, message=""):
+        if self._done:
+            return
+        self._done = True
+        self.timer.stop()
+        if message:
+            self._stderr.write(("\n" if self._stderr.total_chars else "") + message)
+            self.output_received.emit(message + "\n")
+        result = CommandResult(self.command, returncode, self._stdout, self._stderr)
+        self.finished.emit(result)
+
+class CommandBatch(QObject):
+    """
+    Runs independent commands (e.g. read-only diagnostics) concurrently, at most max_parallel
+    at a time. finished delivers one CommandResult per command, in the original order,
+    so the total time approaches the slowest command rather than the sum of all of them.
+    """
+    progress = Signal(int, int) # done, total
+    finished = Signal(list)
+
+    def __init__(self, commands, max_parallel=4, timeout=30, cwd=None, runner_factory=None, parent=None):
+        super().__init__(parent)
+        self.runner_factory = runner_factory or CommandRunner
+        self.commands = list(commands) # (command, is_powershell) pairs
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.cwd = cwd
+        self.results = [None] * len(self.commands)
+        self.cancelled = False
+        self._next = 0
+        self._done = 0
+        self._running = {}
+
+    def start(self):
+        if not self.commands:
+            self.finished.emit([])
+            return
+        while self._next < len(self.commands) and len(self._running) < self.max_parallel:
+            self._start_next()
+
+    def cancel(self):
+        self.cancelled = True
+        self._next = len(self.commands) # Nothing queued starts any more
+        for runner in list(self._running.values()):
+            runner.cancel()
+
+    def _start_next(self):
+        index = self._next
+        self._next += 1
+        command, is_powershell = self.commands[index]
+        runner = self.runner_factory(command, is_powershell, timeout=self.timeout, cwd=self.cwd, parent=self)
+        runner.finished.connect(lambda result: self._on_finished(index, result))
+        self._running[index] = runner
+        runner.start()
+
+    def _on_finished(self, index, result):
+        self._running.pop(index).deleteLater()
+        self.results[index] = result
+        self._done += 1
+        self.progress.emit(self._done, len(self.commands))
+        if self._next < len(self.commands):
+            self._start_next()
+        elif not self._running:
+            self.finished.emit([result for result in self.results if result is not None])
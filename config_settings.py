@@ -0,0 +1,21 @@
+# config_settings.py
+# Reads config.ini for every module, so a malformed file or value falls back to the defaults instead of raising.
+
+import configparser
+
+def read_config():
+    """Parses config.ini; a file that can't be parsed is reported and whatever was read before the error is kept."""
+    config = configparser.ConfigParser()
+    try:
+        config.read('config.ini')
+    except configparser.Error as e:
+        print(f"Error reading config.ini: {e}")
+    return config
+
+def setting(get, section, option, fallback):
+    """config.get/getint/getfloat/getboolean, but a malformed value falls back to the default instead of raising."""
+    try:
+        return get(section, option, fallback=fallback)
+    except (ValueError, configparser.Error):
+        print(f"Invalid value for [{section}] {option} in config.ini; using {fallback}")
+        return fallback
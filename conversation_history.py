@@ -0,0 +1,114 @@
+# conversation_history.py
+# Keeps a chat's history within a token budget so long sessions don't grow slower and costlier.
+
+from response_parser import parse_response
+
+SUMMARY_HEADER = "[Summary of the earlier conversation]"
+
+def estimate_tokens(entry):
+    # Roughly four characters per token is close enough for budgeting; no API call needed
+    return sum(len(str(part)) for part in entry.get('parts', [])) // 4 + 4
+
+def _trim_text(text, max_chars):
+    """Cuts text to max_chars, note included, so trimming it again leaves it as it is."""
+    if len(text) <= max_chars:
+        return text
+    keep = max(0, max_chars - len(f"\n[... {len(text)} characters trimmed ...]\n"))
+    head = keep * 2 // 3
+    tail = keep - head
+    return f"{text[:head]}\n[... {len(text) - keep} characters trimmed ...]\n{text[len(text) - tail:]}"
+
+class ConversationHistory(list):
+    """
+    A history list (entries are {'role': ..., 'parts': [...]} dicts, as the SDK expects) that keeps
+    a token estimate per entry. compact() brings it back under budget_tokens: first it trims bulky
+    parts such as command output in older turns, then it folds the oldest turns into a short
+    summary turn at the front. The most recent keep_recent_turns turns are never touched.
+    """
+    def __init__(self, entries=(), budget_tokens=8000, keep_recent_turns=3, max_part_chars=1500):
+        super().__init__(entries)
+        self.budget_tokens = budget_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_part_chars = max_part_chars
+        self._tokens = [estimate_tokens(entry) for entry in self]
+
+    def append(self, entry):
+        super().append(entry)
+        self._tokens.append(estimate_tokens(entry))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def clear(self):
+        super().clear()
+        self._tokens = []
+
+    @property
+    def total_tokens(self):
+        if len(self._tokens) != len(self): # Modified through some other list method
+            self._tokens = [estimate_tokens(entry) for entry in self]
+        return sum(self._tokens)
+
+    def compact(self):
+        """
+        Returns True if the history was changed. That can be False even over budget, when only the
+        protected recent turns are left (or nothing more can be trimmed), so callers can keep state
+        built from the history.
+        """
+        if self.total_tokens <= self.budget_tokens:
+            return False
+
+        # Turns are user/model pairs; only entries before the protected tail are candidates
+        protected = min(len(self), self.keep_recent_turns * 2)
+        old_count = len(self) - protected
+
+        changed = False
+        first_trimmable = 2 if self._has_summary() else 0
+        for i in range(first_trimmable, old_count):
+            parts = self[i].get('parts', [])
+            if any(len(str(part)) > self.max_part_chars for part in parts):
+                self[i] = {'role': self[i]['role'], 'parts': [_trim_text(str(part), self.max_part_chars) for part in parts]}
+                self._tokens[i] = estimate_tokens(self[i])
+                changed = True
+        if self.total_tokens <= self.budget_tokens:
+            return changed
+
+        start = 2 if self._has_summary() else 0
+        summary_lines = self._summary_lines() if start else []
+        end = start
+        tokens = self.total_tokens
+        while end + 1 < old_count and tokens > self.budget_tokens:
+            tokens -= self._tokens[end] + self._tokens[end + 1]
+            summary_lines.append(self._describe_turn(self[end], self[end + 1]))
+            end += 2
+        if end == start:
+            return changed
+
+        summary_lines = summary_lines[-20:] # The summary itself must stay small
+        summary = [
+            {'role': 'user', 'parts': [SUMMARY_HEADER + "\n" + "\n".join(summary_lines)]},
+            {'role': 'model', 'parts': ['{"response_type": "clarification", "summary": "Noted the earlier conversation."}']},
+        ]
+        remaining = list(self[end:])
+        self.clear()
+        self.extend(summary + remaining)
+        return True
+
+    def _has_summary(self):
+        return len(self) >= 2 and str(self[0].get('parts', [''])[0]).startswith(SUMMARY_HEADER)
+
+    def _summary_lines(self):
+        return str(self[0]['parts'][0]).split("\n")[1:]
+
+    @staticmethod
+    def _describe_turn(user_entry, model_entry):
+        request = str(user_entry.get('parts', [''])[0]).strip().split("\n")[0][:120]
+        try:
+            outcome = parse_response(str(model_entry.get('parts', [''])[0])).get("summary", "")
+        except (ValueError, AttributeError):
+            outcome = ""
+        line = f"- User asked: {request}"
+        if outcome:
+            line += f" -> {' '.join(outcome.split())[:160]}"
+        return line
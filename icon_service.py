@@ -0,0 +1,178 @@
+# icon_service.py
+# Renders the icons in icons/ once per colour, size and pixel ratio, optionally keeping the rasters on disk.
+
+import hashlib
+import os
+import re
+from PySide6.QtCore import QByteArray, QSize, Qt
+from PySide6.QtGui import QGuiApplication, QIcon, QPainter, QPixmap, QPixmapCache
+from PySide6.QtSvg import QSvgRenderer
+from config_settings import read_config, setting
+
+ICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
+_PAINT_ATTRIBUTE = re.compile(r'\b(stroke|fill)="(?!none")[^"]*"') # Every colour in the asset becomes the requested one
+
+class IconService:
+    """
+    Icons by name (the file name in icons/ without .svg), drawn in one colour. The SVG files are
+    read once; each (icon, colour, size, pixel ratio) is rendered once into QPixmapCache, and a
+    QIcon per (icon, colour, size) carries a raster for every screen's pixel ratio. With
+    disk_cache_dir set the rasters are also saved as PNGs, named by a hash of the SVG and the
+    render settings, so a later start loads them instead of rendering.
+    """
+    def __init__(self, icons_dir=ICONS_DIR, disk_cache_dir=None):
+        self.icons_dir = icons_dir
+        self.disk_cache_dir = disk_cache_dir
+        self.rendered = 0
+        self.loaded_from_disk = 0
+        self._sources = {} # name -> SVG text
+        self._icons = {} # (name, colour, width, height) -> QIcon
+        if disk_cache_dir:
+            try:
+                os.makedirs(disk_cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Icon cache is memory-only, could not create {disk_cache_dir}: {e}")
+                self.disk_cache_dir = None
+        self._load_sources()
+
+    def _load_sources(self):
+        try:
+            file_names = sorted(os.listdir(self.icons_dir))
+        except OSError as e:
+            print(f"Could not read icons from {self.icons_dir}: {e}")
+            return
+        for file_name in file_names:
+            if file_name.endswith(".svg"):
+                with open(os.path.join(self.icons_dir, file_name), encoding="utf-8") as svg_file:
+                    self._sources[file_name[:-4]] = svg_file.read()
+
+    def names(self):
+        return list(self._sources)
+
+    def icon(self, name, color, size):
+        """A QIcon of the named SVG in color, size pixels (an int or QSize) at every screen's pixel ratio."""
+        size = QSize(size, size) if isinstance(size, int) else size
+        key = (name, color, size.width(), size.height())
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = QIcon()
+            for ratio in self._pixel_ratios():
+                icon.addPixmap(self.pixmap(name, color, size, ratio))
+            self._icons[key] = icon
+        return icon
+
+    def pixmap(self, name, color, size, device_pixel_ratio=1.0):
+        size = QSize(size, size) if isinstance(size, int) else size
+        key = f"icon:{name}:{color}:{size.width()}x{size.height()}@{device_pixel_ratio:g}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = self._from_disk(name, color, size, device_pixel_ratio)
+            if pixmap is None:
+                pixmap = self._render(name, color, size, device_pixel_ratio)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def screens_changed(self):
+        """Forgets the QIcons so the next ones include a newly attached screen's pixel ratio."""
+        self._icons.clear()
+
+    def _pixel_ratios(self):
+        screens = QGuiApplication.screens()
+        return sorted({screen.devicePixelRatio() for screen in screens}) if screens else [1.0]
+
+    def _svg(self, name, color):
+        source = self._sources.get(name)
+        if source is None:
+            print(f"Unknown icon: {name}")
+            return None
+        return _PAINT_ATTRIBUTE.sub(lambda match: f'{match.group(1)}="{color}"', source)
+
+    def _disk_path(self, name, color, size, ratio):
+        if not self.disk_cache_dir or name not in self._sources:
+            return None
+        digest = hashlib.sha256(f"{self._sources[name]}\0{color}\0{size.width()}x{size.height()}@{ratio:g}".encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_cache_dir, f"{name}-{digest[:24]}.png")
+
+    def _from_disk(self, name, color, size, ratio):
+        path = self._disk_path(name, color, size, ratio)
+        if path is None or not os.path.exists(path):
+            return None
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return None
+        pixmap.setDevicePixelRatio(ratio)
+        self.loaded_from_disk += 1
+        return pixmap
+
+    def _render(self, name, color, size, ratio):
+        pixmap = QPixmap(round(size.width() * ratio), round(size.height() * ratio))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        svg = self._svg(name, color)
+        if svg is not None:
+            renderer = QSvgRenderer(QByteArray(svg.encode("utf-8")))
+            painter = QPainter(pixmap)
+            renderer.render(painter)
+            painter.end()
+            self.rendered += 1
+            path = self._disk_path(name, color, size, ratio)
+            if path is not None and not pixmap.save(path, "PNG"):
+                print(f"Could not write icon cache file {path}")
+        pixmap.setDevicePixelRatio(ratio)
+        return pixmap
+
+_shared_service = None
+
+def get_icon_service():
+    """Returns the process-wide icon service, configured from the [Icons] section of config.ini."""
+    global _shared_service
+    if _shared_service is None:
+        config = read_config()
+        disk_cache_dir = None
+        if setting(config.getboolean, 'Icons', 'disk_cache', False):
+            disk_cache_dir = setting(config.get, 'Icons', 'cache_dir', 'icon_cache')
+        _shared_service = IconService(disk_cache_dir=disk_cache_dir)
+        application = QGuiApplication.instance()
+        if application is not None:
+            application.screenAdded.connect(lambda screen: _shared_service.screens_changed())
+    return _shared_service
+
+if __name__ == "__main__":
+    # Benchmark: python icon_service.py (set QT_QPA_PLATFORM=offscreen to run headless)
+    import sys
+    import tempfile
+    import time
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    colors = ["#e8eaed", "#202124"]
+    toggles = 20
+
+    def legacy_toggles(service):
+        """The previous icon bar: every toggle parsed each SVG and painted it again (at 24px, as its inline SVGs were)."""
+        for toggle in range(toggles):
+            for name in service.names():
+                renderer = QSvgRenderer(QByteArray(service._svg(name, colors[toggle % 2]).encode("utf-8")))
+                pixmap = QPixmap(24, 24)
+                pixmap.fill(Qt.GlobalColor.transparent)
+                painter = QPainter(pixmap)
+                renderer.render(painter)
+                painter.end()
+                QIcon(pixmap)
+
+    def service_toggles(service):
+        for toggle in range(toggles):
+            for name in service.names():
+                service.icon(name, colors[toggle % 2], 24)
+
+    def timed(label, work, service):
+        QPixmapCache.clear() # Each run starts with nothing rendered in memory
+        start = time.perf_counter()
+        work(service)
+        elapsed = time.perf_counter() - start
+        print(f"{label:34} {elapsed * 1000:7.1f} ms, {service.rendered} rendered, {service.loaded_from_disk} loaded from disk", flush=True)
+
+    print(f"{len(IconService().names())} icons, {toggles} theme toggles, pixel ratios {IconService()._pixel_ratios()}")
+    timed("render on every toggle", legacy_toggles, IconService())
+    timed("icon service", service_toggles, IconService())
+    with tempfile.TemporaryDirectory() as cache_dir:
+        timed("icon service, filling disk cache", service_toggles, IconService(disk_cache_dir=cache_dir))
+        timed("icon service, cold start from disk", service_toggles, IconService(disk_cache_dir=cache_dir))
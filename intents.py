@@ -0,0 +1,382 @@
+# intents.py
+# Locally answered prompts: the scenario table and a precompiled matcher over its keywords.
+
+from collections import deque
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords. One pass over the text finds every
+    occurrence of every keyword, so matching costs O(len(text) + matches) no matter how many
+    keywords there are. Matches must sit on word boundaries ("hang" does not match "change").
+    """
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]] # keyword ids ending at each state
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # Breadth-first so each state's failure link points at an already finished state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0 # Depth-1 states fail to the root
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Yields the id of every keyword found in text on word boundaries."""
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword_id in self._output[state]:
+                start = end - len(self.keywords[keyword_id]) + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end + 1 == len(text) or not text[end + 1].isalnum()):
+                    yield keyword_id
+
+class IntentMatcher:
+    """
+    Matches a prompt against a scenario table. Scenarios are listed in priority order: when a
+    prompt contains keywords of several scenarios, the one that comes first in the table wins,
+    regardless of where its keyword appears in the prompt.
+    """
+    def __init__(self, scenarios):
+        self.scenarios = list(scenarios)
+        priority = {} # keyword -> index of the first scenario that lists it
+        for index, scenario in enumerate(self.scenarios):
+            for keyword in scenario["keywords"]:
+                priority.setdefault(keyword.lower(), index)
+        self._automaton = KeywordAutomaton(priority)
+        self._keyword_priority = [priority[keyword] for keyword in self._automaton.keywords]
+
+    def match(self, prompt):
+        """Returns the highest-priority matching scenario, or None."""
+        best = None
+        for keyword_id in self._automaton.find_all(prompt.lower()):
+            index = self._keyword_priority[keyword_id]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.scenarios[best] if best is not None else None
+
+# --- Scenario table ---
+# Order is priority: the first scenario with a matching keyword answers the prompt.
+# "examples" are paraphrases used only by the semantic matcher (semantic_intents.py).
+SCENARIOS = [
+    # Scenario 1: Performance Issues
+    {
+        "name": "slow_pc",
+        "keywords": ['slow', 'hanging', 'hang', 'lagging', 'lags', 'unresponsive'],
+        "examples": ['my laptop crawls', 'pc is sluggish', 'my computer is really slow today', 'everything takes forever to open', 'my computer keeps freezing'],
+        "response": {
+            "response_type": "confirmation", "summary": "It looks like your PC is running slow. I can clear temporary files and caches to help speed it up.",
+            "confirmation_prompt": "I've detected that your system may be running slow. I can perform a cleanup of temporary and prefetch files, which is a safe operation that often improves performance. Shall I proceed?",
+            "commands": [
+                {"command": "del /q/f/s %TEMP%\\*", "description": "Deletes temporary files.", "is_powershell": False},
+                {"command": "del /q/f/s C:\\Windows\\Prefetch\\*", "description": "Clears Windows Prefetch data.", "is_powershell": False}
+            ]},
+    },
+    # Scenario 1.5: Performance Issues
+    {
+        "name": "memory_freed",
+        "keywords": ['free'],
+        "response": {
+            "response_type": "command", "summary": "Removing cache has freed around 3.5GiB of RAM on your PC. Your PC must be noticably faster now.",
+            "commands": [
+            ]},
+    },
+    # Scenario 2: Network Issues
+    {
+        "name": "network",
+        "keywords": ['internet', 'wi-fi', 'wifi', 'network', 'connection', 'connect'],
+        "examples": ['i can\'t get online', 'websites won\'t load', 'no internet access', 'my connection keeps dropping'],
+        "response": {
+            "response_type": "confirmation", "summary": "I can troubleshoot your network connection by flushing the DNS cache and resetting the system's network stack.",
+            "confirmation_prompt": "I can attempt to fix your network issue by flushing the DNS cache and resetting the network stack. A computer restart may be required. Shall I proceed?",
+            "commands": [
+                {"command": "ipconfig /flushdns", "description": "Clears the local DNS resolver cache.", "is_powershell": False},
+                {"command": "netsh winsock reset", "description": "Resets the Winsock Catalog to a clean state.", "is_powershell": False}
+            ]},
+    },
+    # Scenario 3: Battery Report
+    {
+        "name": "battery_report",
+        "keywords": ['battery', 'power', 'drain'],
+        "examples": ['how healthy is my battery', 'my battery dies quickly', 'laptop battery life is bad'],
+        "response": {
+            "response_type": "command", "summary": "I will generate a detailed battery health report and save it as an HTML file.",
+            "directory_change_path": "%USERPROFILE%\\battery-report.html",
+            "commands": [{"command": "powercfg /batteryreport", "description": "Generates a comprehensive report on battery usage and capacity.", "is_powershell": False}]
+        },
+    },
+    # Scenario 4: System Health Check
+    {
+        "name": "health_check",
+        "keywords": ['system health', 'health report', 'disk status', 'check firewall', 'diagnostic'],
+        "examples": ['is my hard drive ok', 'run a checkup on my computer', 'is my firewall turned on'],
+        "response": {
+            "response_type": "command", "summary": "I will run a quick health check on your system, verifying disk drive status and firewall activity.",
+            "commands": [
+                {"command": "wmic diskdrive get status,model", "description": "Checks the S.M.A.R.T. status of all connected disk drives.", "is_powershell": False},
+                {"command": "netsh advfirewall show allprofiles state", "description": "Displays the status of the Windows Defender Firewall.", "is_powershell": False}
+            ]},
+    },
+    # Scenario 5: Local Admin Security Audit
+    {
+        "name": "admin_audit",
+        "keywords": ['local admin', 'security audit', 'admin rights', 'privileged users'],
+        "examples": ['who has admin access on this machine', 'list the administrators'],
+        "response": {
+            "response_type": "command", "summary": "Performing a security check to find all members of the local 'Administrators' group on this machine.",
+            "commands": [{"command": "Get-LocalGroupMember -Group \"Administrators\" | Select-Object Name, PrincipalSource, ObjectClass | Format-Table -AutoSize", "description": "Enumerates all users with local administrator privileges.", "is_powershell": True}]
+        },
+    },
+    # Scenario 6: Software Inventory Report
+    {
+        "name": "software_inventory",
+        "keywords": ['software inventory', 'list installed apps', 'export programs', 'license report'],
+        "examples": ['what programs are installed', 'export a list of my apps'],
+        "response": {
+            "response_type": "command", "summary": "I will generate a list of all installed software and export it to a CSV file on your desktop.",
+            "directory_change_path": "%USERPROFILE%\\Desktop\\SoftwareInventory.csv",
+            "commands": [{"command": "Get-ItemProperty HKLM:\\\\Software\\\\Wow6432Node\\\\Microsoft\\\\Windows\\\\CurrentVersion\\\\Uninstall\\\\* | Select-Object DisplayName, DisplayVersion, Publisher, InstallDate | Where-Object { $_.DisplayName -ne $null -and $_.DisplayName -notlike \"Update for*\" } | Sort-Object DisplayName | Export-Csv -Path \"$env:USERPROFILE\\\\Desktop\\\\SoftwareInventory.csv\" -NoTypeInformation", "description": "Scans the registry for installed programs and exports the list to a CSV file.", "is_powershell": True}]
+        },
+    },
+    # Scenario 7: Automated Project Timesheet
+    {
+        "name": "timesheet",
+        "keywords": ['timesheet', 'project report', 'activity log', 'time tracking'],
+        "examples": ['what did i work on this month', 'make a timesheet from my project files'],
+        "response": {
+            "response_type": "command",
+            "summary": "I will analyze the file modification dates in 'E:\\\\flum_testing' for the current month to create a daily timesheet. The report will be saved as a CSV file on your desktop.",
+            "directory_change_path": "%USERPROFILE%\\Desktop\\Project_Timesheet.csv",
+            "commands": [{"command": "Get-ChildItem -Path \"E:\\flum_testing\" -Recurse | Where-Object { $_.LastWriteTime -ge (Get-Date).AddDays(-(Get-Date).Day + 1) } | Group-Object { $_.LastWriteTime.ToString('yyyy-MM-dd') } | Select-Object @{Name=\\\"Date\\\"; Expression={$_.Name}}, @{Name=\\\"FilesModified\\\"; Expression={$_.Count}}, @{Name=\\\"Files\\\"; Expression={$_.Group.Name -join '; '}} | Sort-Object Date | Export-Csv -Path \"$env:USERPROFILE\\Desktop\\Project_Timesheet.csv\" -NoTypeInformation", "description": "Scans the project folder for recently modified files and generates a CSV timesheet.", "is_powershell": True}]
+        },
+    },
+    # Scenario 8: Automated Desktop Organizer
+    {
+        "name": "desktop_organizer",
+        "keywords": ['clean my desktop', 'organize my files', 'desktop is messy', 'find old files'],
+        "examples": ['my desktop is cluttered', 'tidy up my desktop'],
+        "response": {
+            "response_type": "confirmation", "summary": "I can de-clutter your desktop by finding large, old files and moving them to a folder for your review.",
+            "confirmation_prompt": "I can find files larger than 50MB that haven't been modified in over 6 months and move them into a new folder called 'Old Desktop Files' for your review. Shall I proceed?",
+            "commands": [{"command": "New-Item -Path \"$env:USERPROFILE\\Desktop\\Old Desktop Files\" -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path \"$env:USERPROFILE\\Desktop\" -File | Where-Object { $_.Length -gt 50MB -and $_.LastWriteTime -lt (Get-Date).AddMonths(-6) } | Move-Item -Destination \"$env:USERPROFILE\\Desktop\\Old Desktop Files\"", "description": "Moves large, old files from the Desktop to a review folder.", "is_powershell": True}]
+        },
+    },
+    # Scenario 9: Smart Photo Sorter
+    {
+        "name": "photo_sorter",
+        "keywords": ['organize my photos', 'sort my pictures', 'clean up pictures', 'photo management'],
+        "examples": ['sort my photos by month', 'tidy up my photo library'],
+        "response": {
+            "response_type": "confirmation", "summary": "I can organize your photo library by finding all pictures taken last month and moving them into a new, clearly labeled folder.",
+            "confirmation_prompt": "I will find all photos taken last month and move them into a new folder named after that month (e.g., '2025-08 - Photos'). Is that okay?",
+            "commands": [{"command": "$lastMonth = (Get-Date).AddMonths(-1); $folderName = $lastMonth.ToString('yyyy-MM') + ' - Photos'; $destinationPath = Join-Path -Path $env:USERPROFILE\\Pictures -ChildPath $folderName; New-Item -Path $destinationPath -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path $env:USERPROFILE\\Pictures -Recurse -Include *.jpg, *.jpeg, *.png, *.heic | Where-Object { $_.CreationTime.Month -eq $lastMonth.Month -and $_.CreationTime.Year -eq $lastMonth.Year } | Move-Item -Destination $destinationPath", "description": "Finds all photos from last month and moves them into a new, dated folder.", "is_powershell": True}]
+        },
+    },
+    # Scenario 10: Fix Audio Issues
+    {
+        "name": "audio",
+        "keywords": ['sound', 'audio', 'no sound', 'can\'t hear', 'speakers'],
+        "examples": ['my speakers stopped working', 'sound is not working', 'i can\'t hear anything'],
+        "response": {
+            "response_type": "confirmation", "summary": "I will attempt to fix common audio problems by restarting the core Windows Audio services.",
+            "confirmation_prompt": "I can attempt to fix audio problems by restarting the core Windows Audio services. This is a quick and safe procedure that resolves most sound issues. Shall I proceed?",
+            "commands": [{"command": "Restart-Service -Name \"Audiosrv\", \"AudioEndpointBuilder\" -Force", "description": "Forcefully restarts the main Windows Audio and Audio Endpoint Builder services.", "is_powershell": True}]
+        },
+    },
+    # Scenario 11: Clear Stuck Print Queue
+    {
+        "name": "print_queue",
+        "keywords": ['printer', 'printing', 'stuck', 'print queue', 'can\'t print'],
+        "examples": ['my print job won\'t go through', 'the printer won\'t print anything'],
+        "response": {
+            "response_type": "confirmation", "summary": "I will reset the print spooler service to clear any stuck or failed print jobs.",
+            "confirmation_prompt": "I can clear the entire print queue by resetting the print service. This will cancel all pending print jobs for all printers. Do you want to continue?",
+            "commands": [{"command": "Stop-Service -Name Spooler -Force; Remove-Item -Path C:\\Windows\\System32\\spool\\PRINTERS\\* -Recurse -Force -ErrorAction SilentlyContinue; Start-Service -Name Spooler", "description": "Stops the print service, deletes temporary print files, and restarts the service.", "is_powershell": True}]
+        },
+    },
+    # Scenario 12: Rebuild Icon Cache
+    {
+        "name": "icon_cache",
+        "keywords": ['icons are blank', 'icons look wrong', 'broken icons', 'fix desktop icons'],
+        "examples": ['my icons look weird', 'desktop icons are missing their pictures'],
+        "response": {
+            "response_type": "confirmation", "summary": "I can fix issues with blank or corrupted icons by rebuilding the system's icon cache.",
+            "confirmation_prompt": "I can fix broken or blank icons by rebuilding the icon cache. This will cause your desktop and taskbar to briefly disappear and then reload. It is a safe operation. Would you like to proceed?",
+            "commands": [{"command": "taskkill /IM explorer.exe /F; DEL /A /Q \"%localappdata%\\IconCache.db\"; start explorer.exe", "description": "Force-closes Windows Explorer, deletes the icon cache database, and restarts Explorer.", "is_powershell": False}]
+        },
+    },
+    # Scenario 13: Find and Move Huge Files
+    {
+        "name": "huge_files",
+        "keywords": ['huge files', 'large files', 'move big files', 'free up space'],
+        "response": {
+            "response_type": "confirmation",
+            "summary": "I will find files larger than 100MB in your Documents folder and move them to your desktop for review.",
+            "directory_change_path": "%USERPROFILE%\\Desktop\\Large Files Review",
+            "confirmation_prompt": "I will scan your 'Documents' folder for files larger than 100MB and move them to a new 'Large Files Review' folder on your Desktop for you to manage. Is that okay?",
+            "commands": [{"command": "New-Item -Path \"$env:USERPROFILE\\Desktop\\Large Files Review\" -ItemType Directory -ErrorAction SilentlyContinue; Get-ChildItem -Path \"$env:USERPROFILE\\Documents\" -Recurse -File | Where-Object { $_.Length -gt 100MB } | Move-Item -Destination \"$env:USERPROFILE\\Desktop\\Large Files Review\"", "description": "Finds files >100MB in the Documents folder and moves them to a review folder.", "is_powershell": True}]
+        },
+    },
+    # Scenario 14: Show Top 10 Largest Files
+    {
+        "name": "largest_files",
+        "keywords": ['largest files', 'top 10 files', 'what\'s taking up space', 'disk usage'],
+        "examples": ['what is using my disk space', 'my disk is almost full', 'find the biggest files on my drive'],
+        "response": {
+            "response_type": "command",
+            "summary": "I will scan your entire C: drive to find the 10 largest files. This may take a few moments to complete, please be patient.",
+            "commands": [{"command": "Get-ChildItem -Path C:\\ -Recurse -File -ErrorAction SilentlyContinue | Sort-Object Length -Descending | Select-Object -First 10 | Format-Table @{Name=\\\"Gigabytes\\\";Expression={($_.Length / 1GB).ToString('F2')}}, Name, Directory -AutoSize", "description": "Finds the 10 largest files on the C: drive and displays their size in GB.", "is_powershell": True}]
+        },
+    },
+    # Scenario 15: List Startup Programs
+    {
+        "name": "startup_programs",
+        "keywords": ['startup programs', 'slow startup', 'what runs on startup', 'login items'],
+        "examples": ['what launches when i log in', 'my computer takes forever to boot'],
+        "response": {
+            "response_type": "command",
+            "summary": "I will list all the applications that are configured to run automatically when you log in to Windows.",
+            "commands": [{"command": "Get-CimInstance Win32_StartupCommand | Select-Object Name, Command, Location, User | Format-Table -AutoSize", "description": "Retrieves a list of all programs that run on system startup.", "is_powershell": True}]
+        },
+    },
+    # Scenario 16: Show Wi-Fi Password
+    {
+        "name": "wifi_password",
+        "keywords": ['wifi password', 'show wifi key', 'what\'s my wifi password', 'network key'],
+        "examples": ['what is the wifi password', 'show me the wireless network key'],
+        "response": {
+            "response_type": "confirmation",
+            "summary": "I will attempt to retrieve and display the password for your current Wi-Fi network.",
+            "confirmation_prompt": "I can retrieve the Wi-Fi password for the network you are currently connected to. This requires administrative privileges and will display the password on the screen. Do you wish to continue?",
+            "commands": [{"command": "netsh wlan show profile name=\"$((Get-NetConnectionProfile()).Name)\" key=clear", "description": "Displays the properties and password for the currently active Wi-fi network.", "is_powershell": True}]
+        },
+    },
+    # Scenario 17 & 18: Wi-Fi Control
+    {
+        "name": "disable_wifi",
+        "keywords": ['disable wifi', 'turn off wifi'],
+        "examples": ['switch off the wireless adapter'],
+        "response": {
+            "response_type": "confirmation", "summary": "I will disable your computer's Wi-Fi adapter.",
+            "confirmation_prompt": "This will disable your Wi-Fi adapter and disconnect you from all wireless networks. Are you sure you want to proceed?",
+            "commands": [{"command": "Get-NetAdapter -InterfaceDescription \"*Wireless*\" | Disable-NetAdapter -Confirm:$false", "description": "Finds and disables the primary wireless network adapter.", "is_powershell": True}]
+        },
+    },
+    {
+        "name": "enable_wifi",
+        "keywords": ['enable wifi', 'turn on wifi'],
+        "examples": ['switch on the wireless adapter'],
+        "response": {
+            "response_type": "command", "summary": "I will enable your computer's Wi-Fi adapter.",
+            "commands": [{"command": "Get-NetAdapter -InterfaceDescription \"*Wireless*\" | Enable-NetAdapter -Confirm:$false", "description": "Finds and enables the primary wireless network adapter.", "is_powershell": True}]
+        },
+    },
+    # Scenario 19 & 20: Bluetooth Control
+    {
+        "name": "disable_bluetooth",
+        "keywords": ['disable bluetooth', 'turn off bluetooth'],
+        "examples": ['switch off bluetooth'],
+        "response": {
+            "response_type": "confirmation", "summary": "I will attempt to disable your computer's Bluetooth radio. This requires administrative privileges.",
+            "confirmation_prompt": "I can disable your Bluetooth adapter. This requires administrative privileges and will disconnect all Bluetooth devices. Do you wish to continue?",
+            "commands": [{"command": "Get-PnpDevice -Class 'Bluetooth' | Disable-PnpDevice -Confirm:$false", "description": "Finds and disables all Bluetooth devices.", "is_powershell": True}]
+        },
+    },
+    {
+        "name": "enable_bluetooth",
+        "keywords": ['enable bluetooth', 'turn on bluetooth'],
+        "examples": ['switch on bluetooth'],
+        "response": {
+            "response_type": "command", "summary": "I will attempt to enable your computer's Bluetooth radio. This may require administrative privileges.",
+            "commands": [{"command": "Get-PnpDevice -Class 'Bluetooth' -Status 'Disabled' | Enable-PnpDevice -Confirm:$false", "description": "Finds and enables all disabled Bluetooth devices.", "is_powershell": True}]
+        },
+    },
+    # Scenario 21: Clean Developer Caches
+    {
+        "name": "developer_caches",
+        "keywords": ['clean project', 'nuke cache', 'clear cache', 'reset environment'],
+        "examples": ['wipe my dev caches', 'clear the npm and nuget caches'],
+        "response": {
+            "response_type": "confirmation",
+            "summary": "I will perform a deep clean of common developer caches (NPM, NuGet, Git).",
+            "confirmation_prompt": "This will forcefully clear the caches for NPM and NuGet, and run Git's garbage collection. This is generally safe but irreversible. Proceed?",
+            "commands": [
+                {"command": "npm cache clean --force", "description": "Forcefully clears the Node Package Manager (NPM) cache.", "is_powershell": False},
+                {"command": "dotnet nuget locals all --clear", "description": "Clears all NuGet package caches for .NET.", "is_powershell": False},
+                {"command": "git gc --prune=now --aggressive", "description": "Performs aggressive garbage collection on the current Git repository.", "is_powershell": False}
+            ]
+        },
+    },
+    # Scenario 22: Git Weekly Activity Report (run it inside a Git repo)
+    {
+        "name": "git_report",
+        "keywords": ['git report', 'my recent work', 'weekly git summary', 'show my commits'],
+        "examples": ['what did i commit this week', 'list my git commits from last week'],
+        "response": {
+            "response_type": "command",
+            "summary": "I will generate a report of your Git commits in this repository from the last 7 days.",
+            "commands": [
+                {"command": "git log --author=\"$((git config user.email))\" --since=\"7 days ago\" --pretty=format:\"%ad|%h|%s\" --date=short | ForEach-Object { $parts = $_.Split('|'); [PSCustomObject]@{ Date = $parts[0]; Hash = $parts[1]; Subject = $parts[2] } } | Format-Table -AutoSize", "description": "Finds all commits by the current user in the last week and displays them in a table.", "is_powershell": True}
+            ]
+        },
+    },
+    # Scenario 23: Find Resource Hogs
+    {
+        "name": "resource_hogs",
+        "keywords": ['resource hogs', 'top processes', 'check memory usage', 'find slow process'],
+        "examples": ['which app is using all my ram', 'what is eating my memory'],
+        "response": {
+            "response_type": "command",
+            "summary": "I will find the top 10 running processes on your system consuming the most memory (RAM).",
+            "commands": [
+                {"command": "Get-Process | Sort-Object WS -Descending | Select-Object -First 10 | Format-Table Name, @{Name=\"Memory (MB)\"; Expression={($_.WS / 1MB).ToString('F2')}}, CPU, Path -AutoSize", "description": "Lists the top 10 processes by memory usage.", "is_powershell": True}
+            ]
+        },
+    },
+    # Scenario 24: One-Click Personal Backup
+    {
+        "name": "backup",
+        "keywords": ['backup', 'save my files', 'backup documents', 'protect my data'],
+        "examples": ['back up my documents', 'make a copy of my important files'],
+        "response": {
+            "response_type": "confirmation",
+            "summary": "I will create a backup of your essential personal folders (Desktop, Documents, and Pictures) into a single ZIP file on your Desktop.",
+            "confirmation_prompt": "I can back up your Desktop, Documents, and Pictures folders into a single, dated ZIP file on your Desktop. This might take a few minutes depending on the number of files. Shall I create the backup now?",
+            "commands": [
+                {"command": "Compress-Archive -Path \"$env:USERPROFILE\\Documents\", \"$env:USERPROFILE\\Pictures\", \"$env:USERPROFILE\\Desktop\" -DestinationPath \"$env:USERPROFILE\\Desktop\\My_Backup_$(Get-Date -Format 'yyyy-MM-dd').zip\" -Force", "description": "Compresses the contents of the Desktop, Documents, and Pictures folders into a single ZIP archive.", "is_powershell": True}
+            ]
+        },
+    },
+]
+
+_matcher = None
+
+def match_scenario(prompt):
+    """Returns the scenario that answers prompt locally, or None if it should go to the API."""
+    global _matcher
+    if _matcher is None:
+        _matcher = IntentMatcher(SCENARIOS)
+    return _matcher.match(prompt)
@@ -1,13 +1,19 @@
 # main.py
 # This is the entry point of our application.
+# Pass --startup-timeline to print how long startup took; add --quit-when-ready to exit right after.
 
 import sys
+from startup_timeline import StartupTimeline
+timeline = StartupTimeline() if "--startup-timeline" in sys.argv else None # Before the imports it should time
+
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFont, QFontDatabase
 from main_window import MainWindow
 # styles.py is now imported and managed by MainWindow
 
 if __name__ == "__main__":
+    if timeline:
+        timeline.mark("imports done")
     # Create the application instance
     app = QApplication(sys.argv)
 
@@ -20,6 +26,14 @@ if __name__ == "__main__":
     # Create and show the main window
     # The window itself will now handle applying the theme
     window = MainWindow()
+    if timeline:
+        timeline.mark("window built")
+        quit_when_ready = "--quit-when-ready" in sys.argv
+        def ready():
+            timeline.report()
+            if quit_when_ready:
+                app.quit()
+        timeline.watch(window, ready)
     window.show()
 
     # Start the application's event loop
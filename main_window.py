@@ -2,14 +2,21 @@
 # This file defines the main window, which now manages multiple chat sessions and themes.
 
 import configparser
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QTimer
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QStackedLayout
 from PySide6.QtGui import QMouseEvent
 
+from config_settings import read_config, setting
 from icon_bar import IconBar
 from chat_history_panel import ChatHistoryPanel
 from chat_area import ChatArea
 from settings_dialog import SettingsDialog
+from request_engine import get_request_engine
+from api_client import get_api_client
+from shell_pool import get_shell_pool
+from command_cache import get_command_cache
+from command_runner import load_execution_settings
+import semantic_intents
 import styles # Import the styles module
 
 class MainWindow(QMainWindow):
@@ -28,8 +35,11 @@ class MainWindow(QMainWindow):
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
 
-        self.chats = []
-        self.current_chat_index = -1
+        self.chats = {} # chat id -> {"title", "widget", "saved"}, oldest first
+        self.next_chat_id = 0
+        self.current_chat_id = None
+        self.live_chat_ids = [] # Chats with a widget, least recently used first
+        self.max_live_chats = self.load_live_chat_limit()
         self.current_theme = self.load_theme_preference()
 
         self.icon_bar = IconBar(self.current_theme)
@@ -50,12 +60,21 @@ class MainWindow(QMainWindow):
         self.create_new_chat()
         self.apply_theme() # Apply theme on startup
         self._old_pos = None
+        # Start the warm shell hosts once the window is up, so the first command doesn't wait for one
+        QTimer.singleShot(0, get_shell_pool)
+        # Import and configure the SDK (and build the intent index) in the background, after the first paint
+        QTimer.singleShot(0, self.warm_up)
+
+    def warm_up(self):
+        get_api_client().warm_up()
+        semantic_intents.warm_up()
 
     def load_theme_preference(self):
-        config = configparser.ConfigParser()
-        if config.read('config.ini'):
-            return config.get('Theme', 'mode', fallback='dark')
-        return 'dark'
+        return setting(read_config().get, 'Theme', 'mode', 'dark')
+
+    def load_live_chat_limit(self):
+        """How many chats keep their widgets; idle ones beyond it are hibernated."""
+        return max(1, setting(read_config().getint, 'Chats', 'max_live_chats', 8))
 
     def save_theme_preference(self):
         config = configparser.ConfigParser()
@@ -67,23 +86,25 @@ class MainWindow(QMainWindow):
             config.write(configfile)
 
     def apply_theme(self):
-        """Applies the current theme to the application and its components."""
-        stylesheet = styles.get_stylesheet(self.current_theme)
-        QApplication.instance().setStyleSheet(stylesheet)
+        """
+        Applies the current theme. The application stylesheet is set once; the theme's colours are a
+        cached sheet on each part of the window, so only the frame, the side panels and the visible
+        chat are restyled now. Hidden chats are restyled when they are next shown.
+        """
+        app = QApplication.instance()
+        if app.styleSheet() != styles.get_app_stylesheet():
+            app.setStyleSheet(styles.get_app_stylesheet())
+        theme_sheet = styles.get_theme_stylesheet(self.current_theme)
+        self.central_widget.setProperty("theme", self.current_theme)
+        self.style().unpolish(self.central_widget) # Re-evaluates just the frame's [theme] rule
+        self.style().polish(self.central_widget)
+        self.central_widget.update()
+        self.icon_bar.setStyleSheet(theme_sheet)
         self.icon_bar.update_icons(self.current_theme)
-        
-        # --- FIX --- Force style polish on all necessary widgets
-        self.style().polish(self)
-        self.style().polish(self.icon_bar)
-        self.style().polish(self.history_panel)
-        
-        # This loop ensures every chat area and its internal pages are updated
-        for i in range(self.chat_area_container.count()):
-            chat_widget = self.chat_area_container.widget(i)
-            self.style().polish(chat_widget)
-            self.style().polish(chat_widget.initial_page)
-            self.style().polish(chat_widget.chat_page)
-
+        self.history_panel.setStyleSheet(theme_sheet)
+        current_chat = self.chat_area_container.currentWidget()
+        if current_chat is not None:
+            current_chat.set_theme(self.current_theme)
 
     def toggle_theme(self):
         """Switches the theme and applies the changes."""
@@ -92,39 +113,77 @@ class MainWindow(QMainWindow):
         self.apply_theme()
 
     def create_new_chat(self):
-        new_chat_area = ChatArea(parent_window=self)
-        new_chat_index = self.chat_area_container.addWidget(new_chat_area)
-        new_chat_area.first_message_sent.connect(
-            lambda title, index=new_chat_index: self.update_chat_title(index, title)
+        chat_id = self.next_chat_id
+        self.next_chat_id += 1
+        self.chats[chat_id] = {"title": f"New Chat {len(self.chats) + 1}", "widget": None, "saved": None}
+        self._attach_chat_area(chat_id, ChatArea(parent_window=self))
+        self.history_panel.add_chat(chat_id, self.chats[chat_id]["title"])
+        self.switch_chat(chat_id)
+
+    def _attach_chat_area(self, chat_id, chat_area):
+        self.chat_area_container.addWidget(chat_area)
+        chat_area.first_message_sent.connect(
+            lambda title, chat_id=chat_id: self.update_chat_title(chat_id, title)
         )
-        self.chats.append({"title": f"New Chat {len(self.chats) + 1}", "widget": new_chat_area})
-        self.switch_chat(0); self.update_history_panel()
-
-    def switch_chat(self, reversed_index):
-        correct_index = len(self.chats) - 1 - reversed_index
-        if 0 <= correct_index < len(self.chats):
-            self.chat_area_container.setCurrentIndex(correct_index)
-            self.current_chat_index = correct_index
-            self.history_panel.select_chat_by_index(reversed_index)
-
-    def update_chat_title(self, index, title):
-        if 0 <= index < len(self.chats):
-            short_title = (title[:30] + '...') if len(title) > 30 else title
-            self.chats[index]['title'] = short_title
-            self.update_history_panel()
+        self.chats[chat_id]["widget"] = chat_area
+        self.live_chat_ids.append(chat_id)
 
-    def update_history_panel(self):
-        titles = [chat['title'] for chat in self.chats]; titles.reverse()
-        self.history_panel.update_history(titles)
-        if self.current_chat_index != -1:
-            reversed_index = len(self.chats) - 1 - self.current_chat_index
-            self.history_panel.select_chat_by_index(reversed_index)
+    def switch_chat(self, chat_id):
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            return
+        if chat["widget"] is None: # Hibernated; rebuild it from its record
+            self._attach_chat_area(chat_id, ChatArea(parent_window=self, saved=chat["saved"]))
+            chat["saved"] = None
+        chat["widget"].set_theme(self.current_theme) # A no-op unless the theme changed while it was hidden
+        self.chat_area_container.setCurrentWidget(chat["widget"])
+        self.current_chat_id = chat_id
+        self.history_panel.select_chat(chat_id)
+        self.live_chat_ids.remove(chat_id)
+        self.live_chat_ids.append(chat_id)
+        self.hibernate_idle_chats()
+
+    def hibernate_idle_chats(self):
+        """Tears down the least recently used idle chats until at most max_live_chats are left."""
+        for chat_id in list(self.live_chat_ids):
+            if len(self.live_chat_ids) <= self.max_live_chats:
+                return
+            chat = self.chats[chat_id]
+            if chat_id == self.current_chat_id or not chat["widget"].is_idle():
+                continue
+            chat["saved"] = chat["widget"].hibernate()
+            self.chat_area_container.removeWidget(chat["widget"])
+            chat["widget"].deleteLater()
+            chat["widget"] = None
+            self.live_chat_ids.remove(chat_id)
+
+    def update_chat_title(self, chat_id, title):
+        if chat_id in self.chats:
+            short_title = (title[:30] + '...') if len(title) > 30 else title
+            self.chats[chat_id]['title'] = short_title
+            self.history_panel.rename_chat(chat_id, short_title)
 
     def open_settings(self):
         dialog = SettingsDialog(self)
+        dialog.setStyleSheet(styles.get_theme_stylesheet(self.current_theme))
         if dialog.exec():
-            current_chat_widget = self.chat_area_container.currentWidget()
-            if current_chat_widget: current_chat_widget.api_client.configure()
+            # Every chat shares the one client, so this reconfigures all of them at once
+            get_api_client().configure()
+            get_command_cache().configure()
+            for chat in self.chats.values():
+                if chat["widget"] is not None:
+                    chat["widget"].execution_settings = load_execution_settings()
+            self.max_live_chats = self.load_live_chat_limit()
+            self.hibernate_idle_chats()
+
+    def closeEvent(self, event):
+        # Nothing is waiting for in-flight API calls once the window is gone
+        get_request_engine().cancel_all()
+        for i in range(self.chat_area_container.count()):
+            self.chat_area_container.widget(i).stop_all_commands()
+        if get_shell_pool() is not None:
+            get_shell_pool().shutdown()
+        super().closeEvent(event)
 
     def mousePressEvent(self, event: QMouseEvent):
         current_chat_widget = self.chat_area_container.currentWidget()
@@ -138,3 +197,87 @@ class MainWindow(QMainWindow):
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         self._old_pos = None
+
+if __name__ == "__main__":
+    # Benchmarks: python main_window.py [theme] [chats] (set QT_QPA_PLATFORM=offscreen to run headless)
+    # Without "theme" it measures memory as chats pile up; with it, how long a theme toggle takes.
+    import os
+    import sys
+    import time
+    from PySide6.QtCore import QEvent
+    from chat_area import MessageBubble
+    from output_viewer import OutputViewer
+    app = QApplication(sys.argv)
+    variant = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "theme" and not sys.argv[1].isdigit() else None
+    chat_count = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 40
+
+    def rss_mb():
+        with open("/proc/self/statm") as statm: # Linux only; resident pages are the second field
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+    def settle():
+        for _ in range(3):
+            app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def fill_chat(chat, turns=30, output_lines=5000):
+        chat.stacked_layout.setCurrentIndex(1)
+        for turn in range(turns):
+            chat.session.record(f"question {turn}", f"answer {turn} " * 20)
+            chat.add_message(MessageBubble(f"question {turn}", alignment='right'))
+            chat.add_message(MessageBubble(f"answer {turn} " * 20))
+        output_view = OutputViewer()
+        output_view.append_text("\n".join(f"line {line} of some command output" for line in range(output_lines)))
+        chat.add_message(output_view)
+
+    if variant in ("whole-app", "per-region"):
+        window = MainWindow()
+        window.max_live_chats = 10**6 # Every chat stays open: the worst case for a restyle
+        window.show()
+        for number in range(chat_count):
+            if number:
+                window.create_new_chat()
+            fill_chat(window.chats[window.current_chat_id]["widget"], turns=5, output_lines=50)
+            settle()
+        timings = []
+        for toggle in range(6):
+            window.current_theme = 'light' if window.current_theme == 'dark' else 'dark'
+            start = time.perf_counter()
+            if variant == "whole-app": # The previous apply_theme: one application-wide sheet, then every chat re-polished
+                app.setStyleSheet(styles.get_stylesheet(window.current_theme))
+                window.icon_bar.update_icons(window.current_theme)
+                for chat in window.chats.values():
+                    window.style().polish(chat["widget"])
+                    chat["widget"].transcript.delegate.set_palette(styles.get_transcript_palette(window.current_theme))
+            else:
+                window.apply_theme()
+            window.repaint() # Include painting the first frame in the new theme
+            timings.append(time.perf_counter() - start)
+        print(f"{variant:10} {chat_count} chats: theme toggle {sorted(timings)[len(timings) // 2] * 1000:7.1f} ms (median of 6)", flush=True)
+        os._exit(0)
+    if variant:
+        window = MainWindow()
+        window.max_live_chats = 10**6 if variant == "keep-all" else 8
+        window.show()
+        settle()
+        start = rss_mb()
+        samples = []
+        for number in range(chat_count):
+            if number:
+                window.create_new_chat()
+            fill_chat(window.chats[window.current_chat_id]["widget"])
+            settle()
+            if number % 10 == 9:
+                samples.append(rss_mb() - start)
+        for chat_id in list(window.chats) * 2: # Juggle: visit every chat twice more
+            window.switch_chat(chat_id)
+            settle()
+        samples.append(rss_mb() - start)
+        print(f"{variant:9} {chat_count} chats: RSS growth " + " ".join(f"{mb:6.1f}" for mb in samples) + " MB"
+              f" (every 10 chats, then after juggling), {len(window.live_chat_ids)} live", flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so one can't warm up (or slow down) the other
+    import subprocess
+    theme = len(sys.argv) > 1 and sys.argv[1] == "theme"
+    for name in ("whole-app", "per-region") if theme else ("keep-all", "limit"):
+        subprocess.run([sys.executable, __file__, name, str(chat_count)])
@@ -0,0 +1,95 @@
+# output_capture.py
+# Keeps command output bounded in memory: the start and the end are kept, the middle is dropped.
+
+import subprocess
+
+class OutputCapture:
+    """
+    Captures one output stream for the model and the result cache. The first head_chars characters
+    and the last tail_chars to 2 * tail_chars are kept in memory; what falls between them is
+    dropped and only counted, so memory stays bounded however noisy the command is. The full text
+    is shown live by OutputViewer, whose LineBuffer moves large output to disk on its own.
+    """
+    def __init__(self, head_chars=16384, tail_chars=16384):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.head = ""
+        self.total_chars = 0
+        self.total_lines = 0
+        self.dropped_chars = 0
+        self._tail = []
+        self._tail_size = 0
+
+    def write(self, text):
+        if not text:
+            return
+        self.total_chars += len(text)
+        self.total_lines += text.count("\n")
+        room = self.head_chars - len(self.head)
+        if room > 0:
+            self.head += text[:room]
+            text = text[room:]
+        if text:
+            self._tail.append(text)
+            self._tail_size += len(text)
+        if self._tail_size > self.tail_chars * 2:
+            # Trim back to tail_chars, so this join only happens once per tail_chars of output
+            tail = "".join(self._tail)
+            self.dropped_chars += len(tail) - self.tail_chars
+            self._tail = [tail[-self.tail_chars:]]
+            self._tail_size = self.tail_chars
+
+    @property
+    def tail(self):
+        """Everything kept after the head (between tail_chars and 2 * tail_chars once output was dropped)."""
+        return "".join(self._tail)
+
+    @property
+    def truncated(self):
+        return self.dropped_chars > 0
+
+    def text(self):
+        """The whole output if none was dropped, otherwise its head and tail around an omission note."""
+        if not self.truncated:
+            return self.head + self.tail
+        return f"{self.head}\n[... {self.dropped_chars} characters omitted ...]\n{self.tail}"
+
+    def view(self, max_chars):
+        """At most about max_chars characters: the start and the end, cut at line breaks where possible."""
+        text = self.text()
+        if len(text) <= max_chars and not self.truncated:
+            return text
+        head_budget = max_chars * 2 // 3
+        tail_budget = max_chars - head_budget
+        head = self.head[:head_budget]
+        if "\n" in head[head_budget // 2:]:
+            head = head[:head.rfind("\n") + 1]
+        tail = self.tail[-tail_budget:] if tail_budget else ""
+        if "\n" in tail[:tail_budget // 2]:
+            tail = tail[tail.find("\n") + 1:]
+        omitted = self.total_chars - len(head) - len(tail)
+        return f"{head}\n[... {omitted} characters of {self.total_chars} ({self.total_lines} lines) omitted ...]\n{tail}"
+
+class CommandResult(subprocess.CompletedProcess):
+    """
+    A CompletedProcess whose stdout and stderr are bounded (see OutputCapture.text()), with the
+    captures kept for trimming the output to a prompt budget.
+    """
+    from_cache = False # Set on results replayed by the command result cache, along with cached_at
+    cached_at = None
+
+    def __init__(self, args, returncode, stdout_capture, stderr_capture):
+        super().__init__(args=args, returncode=returncode, stdout=stdout_capture.text(), stderr=stderr_capture.text())
+        self.stdout_capture = stdout_capture
+        self.stderr_capture = stderr_capture
+
+    @property
+    def truncated(self):
+        return self.stdout_capture.truncated or self.stderr_capture.truncated
+
+    def prompt_view(self, max_tokens=1000):
+        """stdout followed by stderr, trimmed to roughly max_tokens for sending to the model."""
+        max_chars = max_tokens * 4
+        stderr = self.stderr_capture.view(max_chars // 3) if self.stderr_capture.total_chars else ""
+        stdout = self.stdout_capture.view(max_chars - len(stderr))
+        return (stdout + stderr).strip()
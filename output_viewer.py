@@ -0,0 +1,443 @@
+# output_viewer.py
+# Shows command output of any size, painting only the lines in view from a line-indexed buffer.
+
+import tempfile
+from array import array
+from collections import OrderedDict
+from PySide6.QtWidgets import (QAbstractScrollArea, QFrame, QHBoxLayout, QLabel, QLineEdit,
+                               QPushButton, QVBoxLayout, QWidget)
+from PySide6.QtCore import QEvent, QRect, Qt
+from PySide6.QtGui import QKeySequence, QPainter, QPalette, QShortcut
+
+CHECKPOINT_LINES = 256 # The index keeps the byte offset of every 256th line
+
+class LineBuffer:
+    """
+    Append-only text, addressed by line. Up to memory_limit bytes are kept in memory; past that
+    everything moves to an anonymous temp file. Only a sparse index of line offsets is kept, and
+    lines are decoded a block at a time into a small LRU, so memory follows what is on screen,
+    not the size of the output. Lines are cut to max_line_chars for display and search.
+    """
+    def __init__(self, memory_limit=256 * 1024, cache_blocks=8, max_line_chars=4000):
+        self.memory_limit = memory_limit
+        self.cache_blocks = cache_blocks
+        self.max_line_chars = max_line_chars
+        self._memory = bytearray()
+        self._file = None
+        self.clear()
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = bytearray()
+        self.size = 0
+        self.newlines = 0
+        self.longest_line = 0 # In bytes, which is close enough for sizing a scrollbar
+        self.checkpoints = array("q", [0])
+        self._line_start = 0
+        self._blocks = OrderedDict()
+
+    @property
+    def line_count(self):
+        return self.newlines + (1 if self.size > self._line_start else 0)
+
+    @property
+    def spooled(self):
+        return self._file is not None
+
+    def append(self, text):
+        data = text.encode("utf-8")
+        if not data:
+            return
+        first_dirty_block = self.newlines // CHECKPOINT_LINES
+        self._write(data)
+        position = data.find(b"\n")
+        while position != -1:
+            line_end = self.size + position
+            self.longest_line = max(self.longest_line, line_end - self._line_start)
+            self._line_start = line_end + 1
+            self.newlines += 1
+            if self.newlines % CHECKPOINT_LINES == 0:
+                self.checkpoints.append(self._line_start)
+            position = data.find(b"\n", position + 1)
+        self.size += len(data)
+        self.longest_line = max(self.longest_line, self.size - self._line_start)
+        for index in [index for index in self._blocks if index >= first_dirty_block]:
+            del self._blocks[index]
+
+    def lines(self, start, count):
+        """Up to count lines from line number start, as displayable strings."""
+        result = []
+        line = max(0, start)
+        end = min(line + count, self.line_count)
+        while line < end:
+            block = self._block(line // CHECKPOINT_LINES)
+            offset = line % CHECKPOINT_LINES
+            taken = block[offset:offset + end - line]
+            if not taken:
+                break
+            result.extend(taken)
+            line += len(taken)
+        return result
+
+    def find(self, needle, start_line=0, backwards=False):
+        """The next line (wrapping around) containing needle, ignoring case, or -1."""
+        needle = needle.lower()
+        if not needle or not self.line_count:
+            return -1
+        block_count = len(self.checkpoints)
+        first_block = min(max(0, start_line), self.line_count - 1) // CHECKPOINT_LINES
+        step = -1 if backwards else 1
+        for turn in range(block_count + 1):
+            index = (first_block + step * turn) % block_count
+            matches = [index * CHECKPOINT_LINES + number
+                       for number, line in enumerate(self._scan(*self._block_range(index)))
+                       if needle in line.lower()]
+            if turn == 0:
+                # The starting block is searched on both sides of start_line: after it first, before it last
+                later = [line for line in matches if (line < start_line if backwards else line > start_line)]
+                if later:
+                    return later[-1] if backwards else later[0]
+                continue
+            if turn == block_count:
+                matches = [line for line in matches if line == start_line or (line > start_line if backwards else line < start_line)]
+            if matches:
+                return matches[-1] if backwards else matches[0]
+        return -1
+
+    def text(self):
+        """The whole buffer as one string; only sensible for small outputs."""
+        return self._read(0, self.size).decode("utf-8", "replace")
+
+    def close(self):
+        self.clear()
+
+    def _write(self, data):
+        if self._file is None and len(self._memory) + len(data) > self.memory_limit:
+            self._file = tempfile.TemporaryFile(prefix="command-output-", suffix=".log")
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._memory.extend(data)
+
+    def _read(self, offset, length):
+        if self._file is None:
+            return bytes(self._memory[offset:offset + length])
+        self._file.seek(offset)
+        data = self._file.read(length)
+        self._file.seek(0, 2) # Appends carry on at the end
+        return data
+
+    def _block_range(self, index):
+        start = self.checkpoints[index]
+        end = self.checkpoints[index + 1] if index + 1 < len(self.checkpoints) else self.size
+        return start, end
+
+    def _block(self, index):
+        lines = self._blocks.get(index)
+        if lines is None:
+            lines = self._blocks[index] = list(self._scan(*self._block_range(index)))
+            while len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(index)
+        return lines
+
+    def _scan(self, start, end, chunk_size=65536):
+        """Yields the lines between two byte offsets, reading a chunk at a time and cutting long lines short."""
+        limit = self.max_line_chars * 4 # Bytes; a UTF-8 character takes at most four
+        line = b""
+        offset = start
+        while offset < end:
+            data = self._read(offset, min(chunk_size, end - offset))
+            if not data:
+                break
+            offset += len(data)
+            pieces = data.split(b"\n")
+            for piece in pieces[:-1]:
+                yield self._decode(line + piece[:limit])
+                line = b""
+            if len(line) < limit:
+                line += pieces[-1][:limit - len(line)]
+        if line:
+            yield self._decode(line)
+
+    def _decode(self, data):
+        return data.decode("utf-8", "replace")[:self.max_line_chars].expandtabs(8).rstrip("\r")
+
+class OutputLinesView(QAbstractScrollArea):
+    """Paints the visible lines of a LineBuffer. Colours and font come from the #outputView style."""
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.setObjectName("outputView")
+        self.setFrameShape(QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.buffer = buffer
+        self.highlighted_line = -1
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def update_scrollbars(self):
+        visible = self.visible_lines()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.buffer.line_count - visible))
+        vertical.setPageStep(visible)
+        content_width = min(self.buffer.longest_line, self.buffer.max_line_chars) * self.fontMetrics().averageCharWidth() + 10
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, content_width - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+
+    def at_bottom(self):
+        return self.verticalScrollBar().value() >= self.verticalScrollBar().maximum()
+
+    def scroll_to_line(self, line):
+        self.verticalScrollBar().setValue(line - self.visible_lines() // 2)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        metrics = self.fontMetrics()
+        line_height = self.line_height()
+        first = self.verticalScrollBar().value()
+        x = 5 - self.horizontalScrollBar().value()
+        text_color = self.palette().color(QPalette.WindowText)
+        for number, line in enumerate(self.buffer.lines(first, self.visible_lines() + 1)):
+            y = number * line_height
+            if first + number == self.highlighted_line:
+                painter.fillRect(QRect(0, y, self.viewport().width(), line_height), self.palette().color(QPalette.Highlight))
+                painter.setPen(self.palette().color(QPalette.HighlightedText))
+            else:
+                painter.setPen(text_color)
+            painter.drawText(x, y + metrics.ascent(), line)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def wheelEvent(self, event):
+        # At either end the wheel scrolls the chat instead, so a folded output never traps it
+        vertical = self.verticalScrollBar()
+        delta = event.angleDelta().y()
+        if (delta > 0 and vertical.value() == vertical.minimum()) or (delta < 0 and vertical.value() == vertical.maximum()):
+            event.ignore()
+            return
+        super().wheelEvent(event)
+
+class OutputViewer(QWidget):
+    """
+    A command's output. Text can be appended while the command runs; the view follows the
+    newest lines unless scrolled away. Output longer than fold_lines is folded, with a toolbar
+    to expand it (up to expanded_lines tall, scrolling beyond that) and to search it.
+    """
+    def __init__(self, fold_lines=12, expanded_lines=40):
+        super().__init__()
+        self.fold_lines = fold_lines
+        self.expanded_lines = expanded_lines
+        self.expanded = False
+        self.buffer = LineBuffer()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 0, 0, 10)
+        layout.setSpacing(4)
+
+        self.toolbar = QWidget()
+        toolbar_layout = QHBoxLayout(self.toolbar)
+        toolbar_layout.setContentsMargins(0, 0, 0, 0)
+        self.info_label = QLabel()
+        self.info_label.setObjectName("statusLabel")
+        self.search_button = QPushButton("Search")
+        self.search_button.setObjectName("outputToolButton")
+        self.search_button.setCursor(Qt.PointingHandCursor)
+        self.search_button.clicked.connect(self.open_search)
+        self.expand_button = QPushButton("Show all ▼")
+        self.expand_button.setObjectName("outputToolButton")
+        self.expand_button.setCursor(Qt.PointingHandCursor)
+        self.expand_button.clicked.connect(self.toggle_expanded)
+        toolbar_layout.addWidget(self.info_label)
+        toolbar_layout.addStretch()
+        toolbar_layout.addWidget(self.search_button)
+        toolbar_layout.addWidget(self.expand_button)
+        self.toolbar.hide()
+
+        self.search_input = QLineEdit()
+        self.search_input.setObjectName("outputSearch")
+        self.search_input.setPlaceholderText("Find in output (Enter: next, Shift+Enter: previous, Esc: close)")
+        self.search_input.installEventFilter(self)
+        self.search_input.hide()
+
+        self.lines_view = OutputLinesView(self.buffer)
+        layout.addWidget(self.toolbar)
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.lines_view)
+        QShortcut(QKeySequence.Find, self, self.open_search, context=Qt.WidgetWithChildrenShortcut)
+        self._update_height()
+
+    def is_empty(self):
+        return self.buffer.size == 0
+
+    def append_text(self, text):
+        if not text:
+            return
+        follow = self.lines_view.at_bottom()
+        self.buffer.append(text)
+        self._lines_changed(follow)
+
+    def set_text(self, text):
+        self.buffer.clear()
+        self.lines_view.highlighted_line = -1
+        self.buffer.append(text)
+        self._lines_changed(follow=False)
+        self.lines_view.verticalScrollBar().setValue(0)
+
+    def text(self):
+        return self.buffer.text()
+
+    def tail_text(self, max_lines):
+        """The last max_lines lines, for keeping a compact copy of a long output."""
+        count = self.buffer.line_count
+        lines = self.buffer.lines(count - max_lines, max_lines)
+        if count > max_lines:
+            lines.insert(0, f"[... {count - max_lines} earlier lines not kept ...]")
+        return "\n".join(lines)
+
+    def clear(self):
+        self.set_text("")
+
+    def settle(self, result):
+        """
+        Called with the command's CommandResult once it is done. Output that streamed in is kept as it
+        is, stdout and stderr interleaved in the order the user watched them (the result only has them
+        one after the other); the result's text is only shown when nothing streamed, e.g. for a
+        refreshed result or a command that printed nothing.
+        """
+        if self.buffer.size > 64 or self.text().strip(): # Whitespace alone still gets the placeholder
+            return
+        final_output = (result.stdout + result.stderr).strip()
+        self.set_text(final_output or "[Command executed successfully with no output]")
+
+    def toggle_expanded(self):
+        self.expanded = not self.expanded
+        self.expand_button.setText("Collapse ▲" if self.expanded else "Show all ▼")
+        self._update_height()
+
+    def open_search(self):
+        self.search_input.show()
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+
+    def close_search(self):
+        self.search_input.hide()
+        self.lines_view.highlighted_line = -1
+        self.lines_view.viewport().update()
+        self._update_info()
+
+    def find(self, backwards=False):
+        needle = self.search_input.text()
+        if not needle:
+            return
+        view = self.lines_view
+        start = view.highlighted_line if view.highlighted_line != -1 else view.verticalScrollBar().value() - (1 if not backwards else 0)
+        line = self.buffer.find(needle, start, backwards)
+        if line == -1:
+            self.info_label.setText(f"No matches for '{needle}'")
+            return
+        if not self.expanded and self.buffer.line_count > self.fold_lines:
+            self.toggle_expanded()
+        view.highlighted_line = line
+        view.scroll_to_line(line)
+        view.viewport().update()
+        self.info_label.setText(f"Line {line + 1} of {self.buffer.line_count}")
+
+    def eventFilter(self, watched, event):
+        if watched is self.search_input and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                self.find(backwards=bool(event.modifiers() & Qt.ShiftModifier))
+                return True
+            if event.key() == Qt.Key_Escape:
+                self.close_search()
+                return True
+        return super().eventFilter(watched, event)
+
+    def _lines_changed(self, follow):
+        self.lines_view.update_scrollbars()
+        if follow:
+            self.lines_view.verticalScrollBar().setValue(self.lines_view.verticalScrollBar().maximum())
+        self.toolbar.setVisible(self.buffer.line_count > self.fold_lines)
+        self._update_info()
+        self._update_height()
+        self.lines_view.viewport().update()
+
+    def _update_info(self):
+        if self.toolbar.isVisibleTo(self):
+            size = f", {self.buffer.size / 1048576:.1f} MB" if self.buffer.size >= 1048576 else ""
+            self.info_label.setText(f"{self.buffer.line_count} lines{size}")
+
+    def _update_height(self):
+        # Resizing the inner view is what tells the transcript this row changed height
+        view = self.lines_view
+        lines = min(max(self.buffer.line_count, 1), self.expanded_lines if self.expanded else self.fold_lines)
+        height = lines * view.line_height() + 4
+        if view.horizontalScrollBar().maximum() > 0:
+            height += view.horizontalScrollBar().sizeHint().height()
+        if view.height() != height or view.minimumHeight() != height:
+            view.setFixedHeight(height)
+
+if __name__ == "__main__":
+    # Benchmark: python output_viewer.py [lines] (set QT_QPA_PLATFORM=offscreen to run headless)
+    import os
+    import sys
+    import time
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    variant = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    lines = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 200000
+    chunks = ["".join(f"{number:>8}  some process or file name {number * 7919 % 100003}\n" for number in range(start, min(start + 500, lines)))
+              for start in range(0, lines, 500)]
+
+    def peak_mb():
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        except ImportError: # Not available on Windows
+            return 0
+
+    if variant:
+        baseline = peak_mb()
+        start = time.perf_counter()
+        if variant == "label":
+            # The previous approach: one word-wrapped label holding everything received so far
+            widget = QLabel()
+            widget.setWordWrap(True)
+            widget.resize(900, 400)
+            widget.show()
+            text = ""
+            for chunk in chunks[:200]: # The label re-lays out everything each time; more chunks take minutes
+                text += chunk
+                widget.setText(text)
+                app.processEvents()
+            shown = min(lines, 200 * 500)
+        else:
+            widget = OutputViewer()
+            widget.resize(900, 400)
+            widget.show()
+            for chunk in chunks:
+                widget.append_text(chunk)
+                app.processEvents()
+            shown = lines
+        elapsed = time.perf_counter() - start
+        print(f"{variant:7} {shown} lines streamed in {elapsed:6.2f} s, peak memory +{peak_mb() - baseline} MB", flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so one can't warm up (or slow down) the other
+    import subprocess
+    for name in ("label", "viewer"):
+        subprocess.run([sys.executable, __file__, name, str(lines)])
@@ -0,0 +1,148 @@
+# request_engine.py
+# Runs blocking API calls on a background thread pool and hands the results back to the GUI thread.
+
+import itertools
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+class _WorkerSignals(QObject):
+    # QRunnable is not a QObject, so each worker carries one of these to emit its result.
+    chunk = Signal(int, str)
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+class _ApiWorker(QRunnable):
+    def __init__(self, request_id, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, result)
+
+class _StreamWorker(_ApiWorker):
+    # fn returns an iterator of text chunks; each one is forwarded as it arrives and the
+    # joined text is delivered as the final result. Cancellation stops the stream between chunks.
+    def run(self):
+        if self.cancelled:
+            return
+        chunks = []
+        try:
+            stream = self.fn(*self.args, **self.kwargs)
+            for chunk in stream:
+                if self.cancelled:
+                    close = getattr(stream, "close", None)
+                    if close:
+                        close()
+                    break
+                chunks.append(chunk)
+                self.signals.chunk.emit(self.request_id, chunk)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, "".join(chunks))
+
+class RequestEngine(QObject):
+    """
+    Submits callables to a QThreadPool and delivers their results through signals.
+    Callbacks always run on the GUI thread. Requests can be cancelled one at a time
+    or by group (e.g. everything a single chat has in flight); the result of a
+    cancelled request is silently dropped.
+    """
+    def __init__(self, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self._ids = itertools.count(1)
+        self._pending = {} # request_id -> {"worker", "group", "on_chunk", "on_result", "on_error"}
+        self._cancelled = {} # Running workers whose results will be dropped; kept alive until they finish
+
+    def submit(self, fn, *args, on_result=None, on_error=None, group=None, **kwargs):
+        """Queues fn(*args, **kwargs) on the pool and returns a request id."""
+        return self._start(_ApiWorker, fn, args, kwargs, group, None, on_result, on_error)
+
+    def submit_stream(self, fn, *args, on_chunk=None, on_result=None, on_error=None, group=None, **kwargs):
+        """Like submit, but fn yields text chunks which are delivered to on_chunk as they arrive."""
+        return self._start(_StreamWorker, fn, args, kwargs, group, on_chunk, on_result, on_error)
+
+    def _start(self, worker_class, fn, args, kwargs, group, on_chunk, on_result, on_error):
+        request_id = next(self._ids)
+        worker = worker_class(request_id, fn, args, kwargs)
+        worker.signals.chunk.connect(self._on_chunk)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        self._pending[request_id] = {"worker": worker, "group": group, "on_chunk": on_chunk,
+                                     "on_result": on_result, "on_error": on_error}
+        self.pool.start(worker)
+        return request_id
+
+    def cancel(self, request_id):
+        entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return
+        worker = entry["worker"]
+        worker.cancelled = True
+        if not self.pool.tryTake(worker): # Drops it outright if it has not started yet
+            self._cancelled[request_id] = worker
+
+    def cancel_group(self, group):
+        for request_id in [rid for rid, entry in self._pending.items() if entry["group"] is group]:
+            self.cancel(request_id)
+
+    def cancel_all(self):
+        for request_id in list(self._pending):
+            self.cancel(request_id)
+
+    def has_pending(self, group=None):
+        if group is None:
+            return bool(self._pending)
+        return any(entry["group"] is group for entry in self._pending.values())
+
+    @Slot(int, str)
+    def _on_chunk(self, request_id, chunk):
+        entry = self._pending.get(request_id)
+        if entry is None or entry["on_chunk"] is None:
+            return
+        entry["on_chunk"](chunk)
+
+    @Slot(int, object)
+    def _on_finished(self, request_id, result):
+        self._cancelled.pop(request_id, None)
+        entry = self._pending.pop(request_id, None)
+        if entry is None: # Cancelled while it was running
+            return
+        on_result = entry["on_result"]
+        if on_result:
+            on_result(result)
+
+    @Slot(int, str)
+    def _on_failed(self, request_id, message):
+        self._cancelled.pop(request_id, None)
+        entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return
+        on_error = entry["on_error"]
+        if on_error:
+            on_error(message)
+        else:
+            print(f"Background request failed: {message}")
+
+_shared_engine = None
+
+def get_request_engine():
+    """Returns the process-wide engine so every chat shares one bounded thread pool."""
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = RequestEngine()
+    return _shared_engine
@@ -0,0 +1,118 @@
+# response_cache.py
+# Caches Gemini replies in memory and on disk so repeated questions skip the API round trip.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config_settings import read_config, setting
+
+class ResponseCache:
+    """
+    Two-tier cache: a bounded in-memory LRU in front of an SQLite table.
+    Entries expire after ttl_seconds, and the disk table is trimmed to max_disk_entries
+    by evicting the least recently used rows. Safe to use from the request engine's threads.
+    """
+    def __init__(self, path='response_cache.db', memory_entries=128, ttl_seconds=7 * 24 * 3600, max_disk_entries=2000):
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict() # key -> (value, created)
+        self._lock = threading.Lock()
+        self._db = None
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Response cache is memory-only, could not open {path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(kind, prompt, chat_history=None, os_info="", history_tail=4):
+        """Builds a key from the normalized prompt, the last few history turns and the OS."""
+        normalized = re.sub(r"\s+", " ", prompt.lower()).strip().rstrip("?.! ")
+        tail = json.dumps((chat_history or [])[-history_tail:], sort_keys=True, default=str)
+        digest = hashlib.sha256(tail.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{kind}\0{os_info}\0{normalized}\0{digest}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if now - created < self.ttl_seconds:
+                        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created)
+                        self.hits += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is None:
+                return
+            self._db.execute("INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)", (key, value, now, now))
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            self._db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_disk_entries,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Returns the process-wide cache, configured from the [Cache] section of config.ini (None if disabled)."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            config = read_config()
+            if not setting(config.getboolean, 'Cache', 'enabled', True):
+                return None
+            _shared_cache = ResponseCache(
+                path=setting(config.get, 'Cache', 'path', 'response_cache.db'),
+                memory_entries=setting(config.getint, 'Cache', 'memory_entries', 128),
+                ttl_seconds=setting(config.getfloat, 'Cache', 'ttl_hours', 168) * 3600,
+                max_disk_entries=setting(config.getint, 'Cache', 'max_entries', 2000),
+            )
+        return _shared_cache
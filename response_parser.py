@@ -0,0 +1,119 @@
+# response_parser.py
+# Parses the model's JSON replies, either all at once or incrementally while they stream in.
+
+import json
+
+def extract_json_text(text):
+    """Returns the JSON object inside a reply, dropping any ```json fences or chatter around it."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return text.strip()
+    return text[start:end + 1]
+
+def parse_response(text):
+    """Parses a complete reply. Raises json.JSONDecodeError if it is not valid JSON."""
+    return json.loads(extract_json_text(text))
+
+class ResponseStreamParser:
+    """
+    Incremental parser for a streamed reply of the form {"response_type": ..., "commands": [{...}, ...], ...}.
+
+    feed() returns every element of the `commands` array that was completed by the new chunk,
+    so the caller can act on commands[0] while the rest are still being generated. Anything
+    before the first '{' or after the closing '}' (markdown fences) is ignored. Only top-level
+    string values are tracked; partial_string() decodes one while it is still arriving.
+    """
+    def __init__(self, array_key="commands"):
+        self.array_key = array_key
+        self.text = ""        # The JSON text seen so far, without leading fences
+        self.items = []       # Completed elements of the array, in order
+        self.values = {}      # Completed top-level string values
+        self.done = False
+        self._pending = ""    # Text received before the opening '{'
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = False
+        self._key = None
+        self._in_array = False
+        self._item_start = None
+
+    def feed(self, chunk):
+        if self.done:
+            return []
+        if not self.text:
+            self._pending += chunk
+            start = self._pending.find("{")
+            if start == -1:
+                return []
+            chunk = self._pending[start:]
+            self._pending = ""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_top_level_string(text[self._string_start:i + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and char == "[" and self._key == self.array_key:
+                    self._in_array = True
+                elif self._depth == 3 and char == "{" and self._in_array:
+                    self._item_start = i
+                if self._depth == 1:
+                    self._expect_key = True
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start is not None:
+                    item = json.loads(text[self._item_start:i + 1], strict=False)
+                    self._item_start = None
+                    self.items.append(item)
+                    completed.append(item)
+                elif self._depth == 1 and self._in_array:
+                    self._in_array = False
+                elif self._depth == 0:
+                    self.done = True
+                    self.text = text[:i + 1]
+                    break
+            elif char == "," and self._depth == 1:
+                self._expect_key = True
+        self._pos = len(self.text)
+        return completed
+
+    def _end_top_level_string(self, literal):
+        value = json.loads(literal, strict=False)
+        if self._expect_key:
+            self._key = value
+            self._expect_key = False
+        else:
+            self.values[self._key] = value
+
+    def partial_string(self, key):
+        """The value of a top-level string field so far, or None if it has not started."""
+        if key in self.values:
+            return self.values[key]
+        if not (self._in_string and self._depth == 1 and not self._expect_key and self._key == key):
+            return None
+        literal = self.text[self._string_start + 1:]
+        if self._escape:
+            literal = literal[:-1]
+        try:
+            return json.loads('"' + literal + '"', strict=False)
+        except json.JSONDecodeError: # A \uXXXX escape cut off mid-way
+            return None
@@ -0,0 +1,232 @@
+# semantic_intents.py
+# Offline fuzzy matching of prompts to the scenario table, for paraphrases the keywords miss.
+
+import re
+import threading
+from intents import SCENARIOS
+
+np = None # NumPy, imported on first use (or by warm_up()) so it doesn't slow down startup
+_numpy_missing = False
+
+def _import_numpy():
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+            np = numpy
+        except ImportError: # Semantic matching is optional; keyword matching still works without it
+            _numpy_missing = True
+    return np
+
+def _ngrams(text, sizes):
+    text = " " + re.sub(r"[^a-z0-9' ]+", " ", text.lower()).strip() + " "
+    text = re.sub(r" +", " ", text)
+    for size in sizes:
+        for i in range(len(text) - size + 1):
+            yield text[i:i + size]
+
+class SemanticIntentIndex:
+    """
+    TF-IDF over character n-grams of every scenario's keywords and example phrases, stored as
+    an L2-normalized NumPy matrix (one row per phrase). A prompt is scored against all rows in
+    one matrix product; the best row names the scenario, and only a score at or above
+    `threshold` counts as a match.
+    """
+    def __init__(self, scenarios, threshold=0.61, ngram_sizes=(2, 3)):
+        _import_numpy()
+        self.scenarios = list(scenarios)
+        self.threshold = threshold
+        self.ngram_sizes = ngram_sizes
+
+        phrases, labels = [], []
+        for index, scenario in enumerate(self.scenarios):
+            for phrase in list(scenario["keywords"]) + list(scenario.get("examples", [])):
+                phrases.append(phrase)
+                labels.append(index)
+        self._labels = np.array(labels)
+
+        self._vocabulary = {}
+        rows = []
+        for phrase in phrases:
+            counts = {}
+            for gram in _ngrams(phrase, ngram_sizes):
+                column = self._vocabulary.setdefault(gram, len(self._vocabulary))
+                counts[column] = counts.get(column, 0) + 1
+            rows.append(counts)
+
+        matrix = np.zeros((len(rows), len(self._vocabulary)), dtype=np.float32)
+        for row, counts in enumerate(rows):
+            matrix[row, list(counts)] = list(counts.values())
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        self._idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self._max_idf = float(np.log(1 + len(rows)) + 1) # idf of an n-gram no phrase contains
+        matrix *= self._idf
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Stored column-major so a query only has to gather the columns of n-grams it contains
+        self._matrix_t = np.ascontiguousarray(matrix.T)
+
+    def _query_vector(self, prompt):
+        counts = {}
+        unknown = 0
+        for gram in _ngrams(prompt, self.ngram_sizes):
+            column = self._vocabulary.get(gram)
+            if column is None:
+                unknown += 1
+            else:
+                counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            return None, None
+        columns = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self._idf[columns]
+        # N-grams no phrase contains still count towards the prompt's length (at the highest idf),
+        # so off-topic words lower the score as they would with a full vocabulary
+        norm = np.sqrt(np.dot(weights, weights) + unknown * self._max_idf ** 2)
+        return columns, weights / norm
+
+    def scores(self, prompt):
+        """Cosine similarity of the prompt to every phrase row."""
+        columns, weights = self._query_vector(prompt)
+        if columns is None:
+            return np.zeros(len(self._labels), dtype=np.float32)
+        return weights @ self._matrix_t[columns]
+
+    def match(self, prompt):
+        """Returns (scenario, score) for a confident match, or (None, best_score)."""
+        scores = self.scores(prompt)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.threshold:
+            return None, score
+        return self.scenarios[self._labels[best]], score
+
+    def match_many(self, prompts):
+        """Batched form of match(): one (scenario or None, score) per prompt."""
+        scores = np.stack([self.scores(prompt) for prompt in prompts])
+        best = np.argmax(scores, axis=1)
+        results = []
+        for row, column in enumerate(best):
+            score = float(scores[row, column])
+            scenario = self.scenarios[self._labels[column]] if score >= self.threshold else None
+            results.append((scenario, score))
+        return results
+
+_index = None
+_index_lock = threading.Lock()
+
+def _shared_index():
+    global _index
+    with _index_lock:
+        if _index is None and _import_numpy() is not None:
+            _index = SemanticIntentIndex(SCENARIOS)
+        return _index
+
+def warm_up():
+    """Imports NumPy and builds the index on a background thread, so the first prompt doesn't wait for them."""
+    threading.Thread(target=_shared_index, name="intent-index-warm-up", daemon=True).start()
+
+def match_scenario_semantic(prompt):
+    """Returns the scenario a paraphrased prompt most likely means, or None if unsure (or NumPy is missing)."""
+    index = _shared_index()
+    if index is None:
+        return None
+    return index.match(prompt)[0]
+
+if __name__ == "__main__":
+    # Evaluation and micro-benchmark: python semantic_intents.py [sweep]
+    # The prompts below are paraphrases written for evaluation only; none of them appears in a scenario's
+    # keywords or examples. The threshold and n-gram sizes were tuned on TUNING (highest recall with no
+    # wrong scenario and no off-topic match, plus a 0.02 margin) and HELD_OUT was only scored afterwards.
+    import sys
+    import time
+    TUNING = [
+        ('my computer crawls', 'slow_pc'), ('sluggish laptop', 'slow_pc'),
+        ('my pc is really sluggish today', 'slow_pc'), ('apps take ages to load', 'slow_pc'),
+        ('my machine freezes all the time', 'slow_pc'), ('computer is painfully slow', 'slow_pc'),
+        ('i have no internet', 'network'), ('web pages are not loading', 'network'),
+        ('my wifi keeps disconnecting', 'network'), ("can't get on the internet", 'network'),
+        ('battery drains too fast', 'battery_report'), ('check my battery health', 'battery_report'),
+        ("my laptop battery doesn't last", 'battery_report'), ('is my disk healthy', 'health_check'),
+        ('check if the firewall is enabled', 'health_check'), ('run a health check', 'health_check'),
+        ('who are the admins on this pc', 'admin_audit'), ('show administrator accounts', 'admin_audit'),
+        ('list all installed programs', 'software_inventory'),
+        ('which apps do i have installed', 'software_inventory'), ('build me a timesheet', 'timesheet'),
+        ('what have i worked on lately', 'timesheet'), ('my desktop is a mess', 'desktop_organizer'),
+        ('clean up the desktop', 'desktop_organizer'), ('sort my photos', 'photo_sorter'),
+        ('organize my pictures folder', 'photo_sorter'), ('no sound from speakers', 'audio'),
+        ('my audio stopped working', 'audio'), ('i hear nothing from my headphones', 'audio'),
+        ('the printer is stuck', 'print_queue'), ("my documents won't print", 'print_queue'),
+        ('icons are showing blank', 'icon_cache'), ('desktop icons look broken', 'icon_cache'),
+        ('my drive is full', 'largest_files'), ('what takes up the most disk space', 'largest_files'),
+        ('what starts when my pc boots', 'startup_programs'), ('my pc boots slowly', 'startup_programs'),
+        ("what's the wi-fi password", 'wifi_password'), ('show the wifi key', 'wifi_password'),
+        ('which program hogs my ram', 'resource_hogs'), ('what is using all my memory', 'resource_hogs'),
+        ('which process uses the most cpu', 'resource_hogs'), ('back up my files', 'backup'),
+        ('copy my documents somewhere safe', 'backup'), ('clear my dev caches', 'developer_caches'),
+        ('show what i committed recently', 'git_report'),
+    ]
+    TUNING_OFF_TOPIC = [
+        'write me a poem about the sea', 'rename every .txt file in this folder to .md',
+        'what is the capital of france', 'create a new folder called projects', 'list files in this directory',
+        'how do i install python', 'show me the current date', 'delete the file notes.txt',
+        'compress this folder into a zip', 'what is my ip address', 'open notepad',
+        'search for the word hello in all files', 'kill the chrome process', 'show environment variables',
+        'convert this video to mp4',
+    ]
+    HELD_OUT = [
+        ('my laptop is super slow', 'slow_pc'), ('everything is lagging on my pc', 'slow_pc'),
+        ('computer keeps hanging', 'slow_pc'), ('the internet is down', 'network'),
+        ('i keep losing my wifi connection', 'network'), ('how is my battery doing', 'battery_report'),
+        ('battery dies fast', 'battery_report'), ('check my hard drive status', 'health_check'),
+        ('is the firewall on', 'health_check'), ('list admin users', 'admin_audit'),
+        ('export my installed software', 'software_inventory'), ('make a timesheet for this month', 'timesheet'),
+        ('tidy my desktop', 'desktop_organizer'), ('organize my photo collection', 'photo_sorter'),
+        ('my speakers make no noise', 'audio'), ("sound isn't working", 'audio'),
+        ('printing is stuck', 'print_queue'), ('desktop icons are blank', 'icon_cache'),
+        ('find the biggest files', 'largest_files'), ('what apps launch at startup', 'startup_programs'),
+        ('tell me the wifi password', 'wifi_password'), ("what's eating my ram", 'resource_hogs'),
+        ('back up my documents folder', 'backup'), ('wipe the npm cache', 'developer_caches'),
+        ('my git commits this week', 'git_report'),
+    ]
+    HELD_OUT_OFF_TOPIC = [
+        'tell me a joke', 'make a directory named test', 'how much is 2 plus 2', 'copy a.txt to b.txt',
+        'show hidden files', 'count lines in main.py', 'what version of windows am i running', 'find all pdf files',
+        'set an alarm for 7am', 'change my wallpaper',
+    ]
+
+    def evaluate(index, paraphrases, off_topic):
+        """(right scenario, wrong scenario, off-topic prompts matched) for a prompt set."""
+        right = wrong = 0
+        for prompt, name in paraphrases:
+            scenario = index.match(prompt)[0]
+            if scenario is not None:
+                right, wrong = (right + 1, wrong) if scenario["name"] == name else (right, wrong + 1)
+        return right, wrong, sum(1 for prompt in off_topic if index.match(prompt)[0] is not None)
+
+    def report(label, index):
+        for name, paraphrases, off_topic in (("tuning", TUNING, TUNING_OFF_TOPIC), ("held-out", HELD_OUT, HELD_OUT_OFF_TOPIC)):
+            right, wrong, false_matches = evaluate(index, paraphrases, off_topic)
+            print(f"{label:24} {name:8} hit rate {right}/{len(paraphrases)} ({right / len(paraphrases):4.0%}), "
+                  f"wrong scenario {wrong}, off-topic matched {false_matches}/{len(off_topic)}")
+
+    if sys.argv[-1] == "sweep":
+        for sizes in ((2, 3), (3,), (3, 4), (2, 3, 4), (3, 4, 5)):
+            index = SemanticIntentIndex(SCENARIOS, ngram_sizes=sizes)
+            for threshold in (0.5, 0.55, 0.6, 0.65):
+                index.threshold = threshold
+                report(f"sizes {sizes} at {threshold}", index)
+        sys.exit(0)
+    report("previous (3, 4, 5) at 0.6", SemanticIntentIndex(SCENARIOS, threshold=0.6, ngram_sizes=(3, 4, 5)))
+    index = SemanticIntentIndex(SCENARIOS)
+    report(f"current {index.ngram_sizes} at {index.threshold}", index)
+
+    prompts = [prompt for prompt, name in HELD_OUT] + HELD_OUT_OFF_TOPIC
+    prompts = prompts * (3000 // len(prompts))
+    start = time.perf_counter()
+    for prompt in prompts:
+        index.match(prompt)
+    elapsed = time.perf_counter() - start
+    print(f"{len(prompts)} prompts, {elapsed / len(prompts) * 1e6:.1f} us per prompt (match)")
+    start = time.perf_counter()
+    index.match_many(prompts)
+    elapsed = time.perf_counter() - start
+    print(f"{len(prompts)} prompts, {elapsed / len(prompts) * 1e6:.1f} us per prompt (match_many)")
@@ -2,8 +2,9 @@
 # This file creates the dialog for entering the Google API Key.
 
 import configparser
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QCheckBox
 from PySide6.QtCore import Qt
+from config_settings import read_config, setting
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -21,6 +22,10 @@ class SettingsDialog(QDialog):
         self.api_key_input.setPlaceholderText("Enter your API key here")
         self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
 
+        # --- Command Result Cache ---
+        self.cache_results_checkbox = QCheckBox("Reuse recent results of read-only diagnostic commands")
+        self.structured_output_checkbox = QCheckBox("Show table output as a sortable, filterable table")
+
         # --- Buttons ---
         self.button_layout = QHBoxLayout()
         self.save_button = QPushButton("Save")
@@ -32,6 +37,8 @@ class SettingsDialog(QDialog):
         # --- Layout ---
         self.layout.addWidget(self.api_key_label)
         self.layout.addWidget(self.api_key_input)
+        self.layout.addWidget(self.cache_results_checkbox)
+        self.layout.addWidget(self.structured_output_checkbox)
         self.layout.addLayout(self.button_layout)
 
         # --- Connections ---
@@ -41,15 +48,23 @@ class SettingsDialog(QDialog):
         self.load_settings()
 
     def load_settings(self):
-        """Loads the API key from the config file."""
-        config = configparser.ConfigParser()
-        if config.read('config.ini'):
-            self.api_key_input.setText(config.get('API', 'key', fallback=''))
+        """Loads the API key and the execution preferences from the config file."""
+        config = read_config()
+        self.api_key_input.setText(setting(config.get, 'API', 'key', ''))
+        self.cache_results_checkbox.setChecked(setting(config.getboolean, 'Execution', 'cache_results', False))
+        self.structured_output_checkbox.setChecked(setting(config.getboolean, 'Execution', 'structured_output', True))
 
     def save_settings(self):
-        """Saves the API key to the config file."""
+        """Saves the settings to the config file, keeping its other sections."""
         config = configparser.ConfigParser()
-        config['API'] = {'key': self.api_key_input.text()}
+        config.read('config.ini')
+        if not config.has_section('API'):
+            config.add_section('API')
+        config.set('API', 'key', self.api_key_input.text()) # Only the key; [API] also holds the connection settings
+        if not config.has_section('Execution'):
+            config.add_section('Execution')
+        config.set('Execution', 'cache_results', str(self.cache_results_checkbox.isChecked()).lower())
+        config.set('Execution', 'structured_output', str(self.structured_output_checkbox.isChecked()).lower())
         with open('config.ini', 'w') as configfile:
             config.write(configfile)
         self.accept()
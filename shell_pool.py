@@ -0,0 +1,497 @@
+# shell_pool.py
+# Keeps warm, long-lived shell processes so commands don't pay interpreter startup every time.
+
+import base64
+import codecs
+import locale
+import os
+import shutil
+import sys
+import uuid
+from collections import deque
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+from config_settings import read_config, setting
+from command_runner import CommandRunner, kill_process_tree, start_in_own_session
+from output_capture import CommandResult, OutputCapture
+
+# Each request is one line on the host's stdin: "<token> <cwd + '\n' + command>", the payload
+# encoded so it fits on one line (a bash $'...' literal, or base64 for PowerShell). The host then
+# writes "\n<token> <exit code> <cwd>\n" to stdout and "\n<token>\n" to stderr; the job is complete
+# once both markers have arrived. The markers come from the host loop itself, after the command has
+# returned, so nothing the command does (an EXIT trap, exec, exit) can keep them from being written.
+#
+# bash runs the command in a subshell, so variables, traps and cd can't leak into the next chat's
+# command, with stdin from /dev/null. The subshell leaves its final directory in a status file
+# (empty if the command exited early, in which case the chat keeps the directory it had).
+BASH_HOST_SCRIPT = r'''
+__host_status=$(mktemp) || exit 1
+trap 'rm -f -- "$__host_status"' EXIT
+while IFS=' ' read -r __host_token __host_payload; do
+  eval "__host_payload=$__host_payload"
+  __host_dir=${__host_payload%%$'\n'*}
+  __host_command=${__host_payload#*$'\n'}
+  : > "$__host_status"
+  (
+    cd -- "$__host_dir" || exit 1
+    eval "$__host_command"
+    __host_code=$?
+    printf '%s' "$PWD" > "$__host_status"
+    exit $__host_code
+  ) </dev/null
+  __host_code=$?
+  __host_cwd=
+  IFS= read -r __host_cwd < "$__host_status"
+  printf '\n%s %s %s\n' "$__host_token" "$__host_code" "$__host_cwd"
+  printf '\n%s\n' "$__host_token" >&2
+done
+'''
+
+# PowerShell runs the command in a child scope, and afterwards removes the global variables,
+# functions and environment variables it added and restores the ones it changed, so they can't leak
+# into the next chat's command. Before the loop the host points its own standard input at the null
+# device (the request reader keeps its handle to the pipe), so a native command that reads stdin
+# gets end of input instead of the next request.
+PWSH_HOST_SCRIPT = r'''
+$ProgressPreference = 'SilentlyContinue'
+[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false
+$hostInput = [Console]::In
+Add-Type -TypeDefinition @"
+using System;
+using System.Runtime.InteropServices;
+public static class HostStdin {
+    [DllImport("kernel32.dll", CharSet = CharSet.Unicode)] static extern IntPtr CreateFileW(string name, uint access, uint share, IntPtr security, uint disposition, uint flags, IntPtr template);
+    [DllImport("kernel32.dll")] static extern bool SetHandleInformation(IntPtr handle, uint mask, uint flags);
+    [DllImport("kernel32.dll")] static extern bool SetStdHandle(int which, IntPtr handle);
+    [DllImport("libc", EntryPoint = "open")] static extern int Open(string path, int flags);
+    [DllImport("libc", EntryPoint = "dup2")] static extern int Dup2(int from, int to);
+    public static void Detach(bool windows) {
+        if (windows) {
+            IntPtr nul = CreateFileW("NUL", 0x80000000, 3, IntPtr.Zero, 3, 0, IntPtr.Zero);
+            SetHandleInformation(nul, 1, 1); // Inheritable, so native commands get it as their stdin
+            SetStdHandle(-10, nul);
+        } else {
+            Dup2(Open("/dev/null", 0), 0);
+        }
+    }
+}
+"@
+[HostStdin]::Detach($IsWindows -ne $false)
+$hostAutomatic = '?', '^', '$', '_', 'args', 'input', 'Error', 'LASTEXITCODE', 'Matches', 'PWD', 'StackTrace', 'MyInvocation', 'PSItem'
+$hostEnvironment = [Environment]::GetEnvironmentVariables()
+$hostGlobals = @{}
+foreach ($hostVariable in Get-Variable -Scope Global) { $hostGlobals[$hostVariable.Name] = $hostVariable.Value }
+$hostFunctions = @(Get-ChildItem function: | ForEach-Object Name)
+while ($null -ne ($hostLine = $hostInput.ReadLine())) {
+    $hostToken, $hostPayload = $hostLine.Split(' ', 2)
+    $hostPayload = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($hostPayload))
+    $hostDir, $hostCommand = $hostPayload.Split("`n", 2)
+    $hostCode = 0
+    try {
+        Set-Location -LiteralPath $hostDir
+        $Error.Clear()
+        $global:LASTEXITCODE = 0
+        $global:hostSucceeded = $true
+        # $? after the command's last statement, as the exit code of a bash command is its last one's
+        & ([scriptblock]::Create("$hostCommand`n`$global:hostSucceeded = `$?")) 2>&1 | Out-String -Stream -Width 4096 | ForEach-Object { [Console]::Out.WriteLine($_) }
+        if ($global:LASTEXITCODE) { $hostCode = $global:LASTEXITCODE }
+        elseif (-not $global:hostSucceeded) { $hostCode = 1 }
+    } catch {
+        [Console]::Error.WriteLine($_.ToString())
+        $hostCode = 1
+    }
+    $hostCwd = (Get-Location).Path
+    foreach ($hostName in @([Environment]::GetEnvironmentVariables().Keys)) {
+        if (-not $hostEnvironment.Contains($hostName)) { [Environment]::SetEnvironmentVariable($hostName, $null) }
+    }
+    foreach ($hostName in $hostEnvironment.Keys) { [Environment]::SetEnvironmentVariable($hostName, $hostEnvironment[$hostName]) }
+    foreach ($hostVariable in @(Get-Variable -Scope Global)) {
+        $hostName = $hostVariable.Name
+        if ($hostName -like 'host*' -or $hostAutomatic -contains $hostName) { continue }
+        if (-not $hostGlobals.ContainsKey($hostName)) {
+            Remove-Variable -Name $hostName -Scope Global -Force -ErrorAction SilentlyContinue
+        } elseif (-not [object]::ReferenceEquals($hostVariable.Value, $hostGlobals[$hostName])) {
+            Set-Variable -Name $hostName -Scope Global -Value $hostGlobals[$hostName] -Force -ErrorAction SilentlyContinue
+        }
+    }
+    Get-ChildItem function: | Where-Object { $hostFunctions -notcontains $_.Name } | Remove-Item -Force
+    [Console]::Out.Write("`n$hostToken $hostCode $hostCwd`n")
+    [Console]::Out.Flush()
+    [Console]::Error.Write("`n$hostToken`n")
+    [Console]::Error.Flush()
+}
+'''
+
+def host_kind(is_powershell):
+    """The kind of host that runs a command, or None if commands of that sort are not pooled."""
+    if is_powershell:
+        return "pwsh"
+    return None if sys.platform == "win32" else "bash" # cmd.exe has no usable stdin protocol
+
+def host_program(kind):
+    if kind == "pwsh":
+        powershell = "powershell" if sys.platform == "win32" else (shutil.which("pwsh") or "pwsh")
+        encoded = base64.b64encode(PWSH_HOST_SCRIPT.encode("utf-16-le")).decode("ascii")
+        return powershell, ["-NoLogo", "-NoProfile", "-NonInteractive", "-EncodedCommand", encoded], "utf-8"
+    return shutil.which("bash") or "bash", ["--noprofile", "--norc", "-c", BASH_HOST_SCRIPT], locale.getpreferredencoding(False)
+
+def bash_literal(text):
+    """Quotes text as a single-line bash $'...' literal."""
+    escaped = []
+    for char in text:
+        if char in "\\'":
+            escaped.append("\\" + char)
+        elif char == "\n":
+            escaped.append("\\n")
+        elif ord(char) < 32 or ord(char) == 127:
+            escaped.append(f"\\x{ord(char):02x}")
+        else:
+            escaped.append(char)
+    return "$'" + "".join(escaped) + "'"
+
+class PooledCommand(QObject):
+    """
+    A command run by a warm shell host. It has the same interface as CommandRunner (start, cancel,
+    output_received, finished with a CommandResult), plus final_cwd: the directory the command
+    left its shell in, so a chat can keep its own working directory across commands.
+    """
+    output_received = Signal(str)
+    finished = Signal(object)
+
+    def __init__(self, command, is_powershell=False, timeout=30, cwd=None, parent=None, pool=None):
+        super().__init__(parent)
+        self.command = command
+        self.is_powershell = is_powershell
+        self.kind = host_kind(is_powershell)
+        self.timeout = timeout
+        self.cwd = cwd or os.getcwd()
+        self.final_cwd = self.cwd
+        self.pool = pool or get_shell_pool()
+        self.token = f"__host_done_{uuid.uuid4().hex}__"
+        self.host = None
+        self.cancelled = False
+        self.timed_out = False
+        self.health_check = False # A pool ping, which doesn't count towards the host's commands_run
+        self._stdout = OutputCapture()
+        self._stderr = OutputCapture()
+        self._done = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        self.pool.submit(self)
+
+    def cancel(self):
+        if self._done:
+            return
+        self.cancelled = True
+        self.pool.abort(self)
+
+    def is_running(self):
+        return not self._done
+
+    def request_line(self, encoding):
+        payload = f"{self.cwd}\n{self.command}"
+        if self.kind == "pwsh":
+            payload = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+        else:
+            payload = bash_literal(payload)
+        return f"{self.token} {payload}\n".encode(encoding, errors="replace")
+
+    def _on_dispatched(self, host):
+        self.host = host
+        if self.timeout:
+            self.timer.start(int(self.timeout * 1000))
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self.pool.abort(self)
+
+    def _output(self, stream, text):
+        if not text:
+            return
+        (self._stdout if stream == "stdout" else self._stderr).write(text)
+        self.output_received.emit(text)
+
+    def _finish(self, returncode, cwd=None):
+        if self._done:
+            return
+        self._done = True
+        self.timer.stop()
+        self.host = None
+        if cwd:
+            self.final_cwd = cwd
+        message = ""
+        if self.timed_out:
+            message = f"Command '{self.command}' timed out after {self.timeout} seconds"
+        elif self.cancelled:
+            message = "Command cancelled."
+        if message:
+            returncode = returncode or 1
+            self._stderr.write(("\n" if self._stderr.total_chars else "") + message)
+            self.output_received.emit(message + "\n")
+        result = CommandResult(self.command, returncode, self._stdout, self._stderr)
+        self.finished.emit(result)
+
+class ShellHost(QObject):
+    """One long-lived shell process that runs PooledCommands one at a time."""
+    idle = Signal(object)
+    died = Signal(object)
+
+    def __init__(self, kind, parent=None):
+        super().__init__(parent)
+        self.kind = kind
+        self.job = None
+        self.ready = False
+        self.retired = False
+        self.commands_run = 0
+        self._buffers = {"stdout": "", "stderr": ""}
+        self._markers = {"stdout": None, "stderr": False}
+
+        program, arguments, self.encoding = host_program(kind)
+        self._decoders = {name: codecs.getincrementaldecoder(self.encoding)(errors="replace") for name in self._buffers}
+        self.process = QProcess(self)
+        self.process.setProgram(program)
+        self.process.setArguments(arguments)
+        start_in_own_session(self.process)
+        self.process.started.connect(self._on_started)
+        self.process.readyReadStandardOutput.connect(lambda: self._read("stdout"))
+        self.process.readyReadStandardError.connect(lambda: self._read("stderr"))
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+        self.process.start()
+
+    def run(self, job):
+        self.job = job
+        self._buffers = {"stdout": "", "stderr": ""}
+        self._markers = {"stdout": None, "stderr": False}
+        job._on_dispatched(self)
+        self.process.write(job.request_line(self.encoding))
+
+    def kill(self):
+        kill_process_tree(self.process)
+
+    def _on_started(self):
+        self.ready = True
+        self.idle.emit(self)
+
+    def _read(self, stream):
+        if stream == "stdout":
+            data = self.process.readAllStandardOutput().data()
+        else:
+            data = self.process.readAllStandardError().data()
+        text = self._decoders[stream].decode(data).replace("\r\n", "\n")
+        if self.job is None:
+            return # Late output of something a finished command left running in the background
+        buffer = self._buffers[stream] + text
+        marker = "\n" + self.job.token
+        index = buffer.find(marker)
+        if index == -1:
+            # Everything before the last newline is output; the rest might be the start of the marker
+            keep = buffer.rfind("\n")
+            if keep == -1 or not marker.startswith(buffer[keep:keep + len(marker)]):
+                keep = len(buffer)
+            self.job._output(stream, buffer[:keep])
+            self._buffers[stream] = buffer[keep:]
+            return
+
+        self.job._output(stream, buffer[:index])
+        if stream == "stdout":
+            line_end = buffer.find("\n", index + len(marker))
+            if line_end == -1:
+                self._buffers[stream] = buffer[index:] # Wait for the rest of the status line
+                return
+            status = buffer[index + len(marker):line_end].strip().split(" ", 1)
+            try:
+                returncode = int(status[0])
+            except ValueError:
+                returncode = 1
+            self._markers["stdout"] = (returncode, status[1] if len(status) > 1 else None)
+        else:
+            self._markers["stderr"] = True
+        self._buffers[stream] = ""
+        if self._markers["stdout"] is not None and self._markers["stderr"]:
+            job, self.job = self.job, None
+            if not job.health_check:
+                self.commands_run += 1
+            job._finish(*self._markers["stdout"])
+            self.idle.emit(self)
+
+    def _on_finished(self, exit_code, exit_status):
+        self.ready = False
+        if self.job is not None:
+            job, self.job = self.job, None
+            for stream in self._buffers:
+                job._output(stream, self._buffers[stream])
+            if exit_status == QProcess.ExitStatus.CrashExit and exit_code == 0:
+                exit_code = 1
+            job._finish(exit_code) # e.g. a PowerShell command that called exit
+        self.died.emit(self)
+
+    def _on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            if self.job is not None:
+                job, self.job = self.job, None
+                job._output("stderr", f"Failed to start shell host: {self.process.errorString()}")
+                job._finish(1)
+            self.died.emit(self)
+
+class ShellHostPool(QObject):
+    """
+    Runs commands on warm shell hosts: warm_hosts per kind are started up front, more are added
+    on demand up to max_hosts, and queued commands wait for a free one. A host is replaced after
+    max_commands_per_host commands, when it exits, or when a command or an idle health check hangs.
+    """
+    def __init__(self, warm_hosts=1, max_hosts=4, max_commands_per_host=100, health_check_seconds=30, warm_kinds=None):
+        super().__init__()
+        self.warm_hosts = warm_hosts
+        self.max_hosts = max(1, max_hosts)
+        self.max_commands_per_host = max_commands_per_host
+        self.warm_kinds = warm_kinds if warm_kinds is not None else ["pwsh" if sys.platform == "win32" else "bash"]
+        self.hosts = []
+        self.queue = deque()
+        self.unavailable = set() # Kinds whose host program could not be started
+        self.health_timer = QTimer(self)
+        self.health_timer.timeout.connect(self.check_health)
+        if health_check_seconds:
+            self.health_timer.start(int(health_check_seconds * 1000))
+        for kind in self.warm_kinds:
+            self._ensure_warm(kind)
+
+    def supports(self, is_powershell):
+        kind = host_kind(is_powershell)
+        return kind is not None and kind not in self.unavailable
+
+    def submit(self, job):
+        self.queue.append(job)
+        self._dispatch()
+
+    def abort(self, job):
+        """Stops a queued or running job. A running one takes its host down with it."""
+        if job in self.queue:
+            self.queue.remove(job)
+            job._finish(1)
+        elif job.host is not None:
+            job.host.kill() # The host finishes the job once the process is gone
+
+    def check_health(self):
+        """Sends a no-op to every idle host; one that doesn't answer quickly is replaced."""
+        for host in list(self.hosts):
+            if host.ready and host.job is None:
+                ping = PooledCommand(":" if host.kind == "bash" else "$null", host.kind == "pwsh", timeout=5, pool=self, parent=self)
+                ping.health_check = True
+                ping.finished.connect(ping.deleteLater)
+                host.run(ping)
+
+    def shutdown(self):
+        self.health_timer.stop()
+        for job in list(self.queue):
+            self.abort(job)
+        for host in list(self.hosts):
+            host.retired = True
+            host.kill()
+            host.process.waitForFinished(1000)
+        self.hosts = []
+
+    def _spawn(self, kind):
+        host = ShellHost(kind, parent=self)
+        host.idle.connect(self._on_host_idle)
+        host.died.connect(self._on_host_died)
+        self.hosts.append(host)
+        return host
+
+    def _ensure_warm(self, kind):
+        if kind in self.unavailable:
+            return
+        while sum(1 for host in self.hosts if host.kind == kind) < self.warm_hosts:
+            self._spawn(kind)
+
+    def _dispatch(self):
+        for job in list(self.queue):
+            free = [host for host in self.hosts if host.kind == job.kind and host.ready and host.job is None]
+            if free:
+                self.queue.remove(job)
+                free[0].run(job)
+                continue
+            hosts = [host for host in self.hosts if host.kind == job.kind]
+            starting = sum(1 for host in hosts if not host.ready)
+            waiting = sum(1 for queued in self.queue if queued.kind == job.kind)
+            if len(hosts) < self.max_hosts and starting < waiting:
+                self._spawn(job.kind)
+
+    def _on_host_idle(self, host):
+        if self.max_commands_per_host and host.commands_run >= self.max_commands_per_host:
+            self._retire(host)
+            self._ensure_warm(host.kind)
+        self._dispatch()
+
+    def _on_host_died(self, host):
+        if host in self.hosts:
+            self.hosts.remove(host)
+            if not host.retired and host.process.error() == QProcess.ProcessError.FailedToStart:
+                self.unavailable.add(host.kind)
+                for job in [job for job in self.queue if job.kind == host.kind]:
+                    self.queue.remove(job)
+                    job._output("stderr", f"Failed to start shell host: {host.process.errorString()}")
+                    job._finish(1)
+        host.deleteLater()
+        if not host.retired and host.kind in self.warm_kinds:
+            self._ensure_warm(host.kind)
+        self._dispatch()
+
+    def _retire(self, host):
+        host.retired = True
+        self.hosts.remove(host)
+        host.process.closeWriteChannel() # The host loop ends at end of input
+
+_shared_pool = None
+
+def get_shell_pool():
+    """Returns the process-wide pool, configured from the [Shell] section of config.ini (None if disabled)."""
+    global _shared_pool
+    if _shared_pool is None:
+        config = read_config()
+        if not setting(config.getboolean, 'Shell', 'pooled', True):
+            return None
+        _shared_pool = ShellHostPool(
+            warm_hosts=setting(config.getint, 'Shell', 'warm_hosts', 1),
+            max_hosts=setting(config.getint, 'Shell', 'max_hosts', 4),
+            max_commands_per_host=setting(config.getint, 'Shell', 'max_commands_per_host', 100),
+            health_check_seconds=setting(config.getfloat, 'Shell', 'health_check_seconds', 30),
+        )
+    return _shared_pool
+
+def create_runner(command, is_powershell=False, timeout=30, cwd=None, parent=None):
+    """A PooledCommand when a warm host can run the command, otherwise a one-off CommandRunner."""
+    pool = get_shell_pool()
+    if pool is not None and pool.supports(is_powershell):
+        return PooledCommand(command, is_powershell, timeout=timeout, cwd=cwd, parent=parent, pool=pool)
+    return CommandRunner(command, is_powershell, timeout=timeout, cwd=cwd, parent=parent)
+
+if __name__ == "__main__":
+    # Micro-benchmark: python shell_pool.py
+    import time
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    app = QCoreApplication(sys.argv)
+
+    def run_all(factory, count=50):
+        loop = QEventLoop()
+        results = []
+        def next_command():
+            if len(results) == count:
+                loop.quit()
+                return
+            runner = factory("echo hello", False)
+            runner.finished.connect(lambda result: (results.append(result), next_command()))
+            runner.start()
+        start = time.perf_counter()
+        next_command()
+        loop.exec()
+        return (time.perf_counter() - start) / count
+
+    pool = ShellHostPool(health_check_seconds=0)
+    QTimer.singleShot(500, app.quit) # Let the warm host start
+    app.exec()
+    print(f"one-off process: {run_all(lambda c, p: CommandRunner(c, p)) * 1000:.2f} ms per command")
+    print(f"warm host:       {run_all(lambda c, p: PooledCommand(c, p, pool=pool)) * 1000:.2f} ms per command")
+    pool.shutdown()
@@ -2,26 +2,10 @@
 # This file creates the left-hand navigation sidebar.
 
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QSpacerItem, QSizePolicy, QLabel
-from PySide6.QtGui import QIcon, QPixmap, QPainter
-from PySide6.QtSvg import QSvgRenderer
 from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve
+from icon_service import get_icon_service
 
-# --- SVG Icon Data ---
-PLUS_ICON_SVG = """
-<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#e8eaed" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="12" y1="5" x2="12" y2="19"></line><line x1="5" y1="12" x2="19" y2="12"></line></svg>
-"""
-SETTINGS_ICON_SVG = """
-<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#e8eaed" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="3"></circle><path d="M19.4 15a1.65 1.65 0 0 0 .33 1.82l.06.06a2 2 0 0 1 0 2.83 2 2 0 0 1-2.83 0l-.06-.06a1.65 1.65 0 0 0-1.82-.33 1.65 1.65 0 0 0-1 1.51V21a2 2 0 0 1-2 2 2 2 0 0 1-2-2v-.09A1.65 1.65 0 0 0 9 19.4a1.65 1.65 0 0 0-1.82.33l-.06.06a2 2 0 0 1-2.83 0 2 2 0 0 1 0-2.83l.06-.06a1.65 1.65 0 0 0 .33-1.82 1.65 1.65 0 0 0-1.51-1H3a2 2 0 0 1-2-2 2 2 0 0 1 2-2h.09A1.65 1.65 0 0 0 4.6 9a1.65 1.65 0 0 0-.33-1.82l-.06-.06a2 2 0 0 1 0-2.83 2 2 0 0 1 2.83 0l.06.06a1.65 1.65 0 0 0 1.82.33H9a1.65 1.65 0 0 0 1-1.51V3a2 2 0 0 1 2-2 2 2 0 0 1 2 2v.09a1.65 1.65 0 0 0 1 1.51 1.65 1.65 0 0 0 1.82-.33l.06-.06a2 2 0 0 1 2.83 0 2 2 0 0 1 0 2.83l-.06.06a1.65 1.65 0 0 0-.33 1.82V9a1.65 1.65 0 0 0 1.51 1H21a2 2 0 0 1 2 2 2 2 0 0 1-2 2h-.09a1.65 1.65 0 0 0-1.51 1z"></path></svg>
-"""
-
-def create_icon_from_svg(svg_data):
-    renderer = QSvgRenderer(svg_data.encode('utf-8'))
-    pixmap = QPixmap(renderer.defaultSize())
-    pixmap.fill(Qt.GlobalColor.transparent)
-    painter = QPainter(pixmap)
-    renderer.render(painter)
-    painter.end()
-    return QIcon(pixmap)
+ICON_COLOR = "#e8eaed"
 
 class Sidebar(QWidget):
     def __init__(self):
@@ -41,7 +25,7 @@ class Sidebar(QWidget):
 
         # --- New Chat Button ---
         self.new_chat_button = QPushButton("  New chat")
-        self.new_chat_button.setIcon(create_icon_from_svg(PLUS_ICON_SVG))
+        self.new_chat_button.setIcon(get_icon_service().icon("plus", ICON_COLOR, 20))
         self.new_chat_button.setObjectName("sidebarButton")
         self.new_chat_button.setIconSize(QSize(20, 20))
         
@@ -60,7 +44,7 @@ class Sidebar(QWidget):
 
         # --- Bottom Settings Button ---
         self.settings_button = QPushButton("  Settings & help")
-        self.settings_button.setIcon(create_icon_from_svg(SETTINGS_ICON_SVG))
+        self.settings_button.setIcon(get_icon_service().icon("settings", ICON_COLOR, 20))
         self.settings_button.setObjectName("sidebarButton")
         self.settings_button.setIconSize(QSize(20, 20))
 
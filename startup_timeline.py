@@ -0,0 +1,106 @@
+# startup_timeline.py
+# Records how long startup takes: each module import, the first paint and the first moment input is handled.
+
+import builtins
+import sys
+import threading
+import time
+
+class StartupTimeline:
+    """
+    Create one before the heavy imports (see main.py). Until the window is ready it times every
+    module imported for the first time, then watch() adds "first paint" and "ready for input".
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = [] # (label, seconds since start)
+        self.imports = [] # [name, seconds, depth], in the order the imports started
+        self._depth = 0
+        self._thread = threading.get_ident() # Only this thread's imports are timed; warm-up threads run alongside
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or threading.get_ident() != self._thread: # Already imported, relative, or another thread
+            return self._original_import(name, globals, locals, fromlist, level)
+        entry = [name, 0.0, self._depth]
+        self.imports.append(entry)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            entry[1] = time.perf_counter() - started
+            self._depth -= 1
+
+    def stop_timing_imports(self):
+        if builtins.__import__ == self._timed_import:
+            builtins.__import__ = self._original_import
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.start))
+
+    def elapsed(self, label):
+        """Seconds from start to the mark, or None if it hasn't happened."""
+        return next((seconds for name, seconds in self.marks if name == label), None)
+
+    def watch(self, window, on_ready=None):
+        """Marks the window's first paint and, one event-loop turn later, the first moment it can take input."""
+        from PySide6.QtCore import QObject, QEvent, QTimer
+
+        timeline = self
+        class FirstPaint(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint:
+                    window.removeEventFilter(self)
+                    timeline.mark("first paint")
+                    QTimer.singleShot(0, ready)
+                return False
+
+        def ready():
+            self.mark("ready for input")
+            self.stop_timing_imports()
+            if on_ready:
+                on_ready()
+
+        self._paint_filter = FirstPaint(window) # Parented to the window, and referenced here, so it stays alive
+        window.installEventFilter(self._paint_filter)
+
+    def report(self, top=15):
+        """Prints the marks and the slowest imports made by main.py or the modules it imports directly."""
+        lines = ["Startup timeline:"]
+        lines += [f"  {seconds * 1000:8.1f} ms  {label}" for label, seconds in self.marks]
+        slowest = sorted((entry for entry in self.imports if entry[2] <= 1), key=lambda entry: -entry[1])[:top]
+        lines.append("Slowest imports (including what they import):")
+        lines += [f"  {seconds * 1000:8.1f} ms  {'  ' * depth}{name}" for name, seconds, depth in slowest]
+        print("\n".join(lines), flush=True)
+
+if __name__ == "__main__":
+    # Regression benchmark: python startup_timeline.py [budget_ms] [runs] (set QT_QPA_PLATFORM=offscreen to run headless)
+    # Starts main.py in fresh processes and exits with status 1 if the median time to first paint is over budget.
+    import os
+    import re
+    import statistics
+    import subprocess
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    results = {"first paint": [], "ready for input": []}
+    for run in range(runs):
+        output = subprocess.run([sys.executable, main_script, "--startup-timeline", "--quit-when-ready"],
+                                capture_output=True, text=True).stdout
+        for label, samples in results.items():
+            found = re.search(rf"([\d.]+) ms  {label}$", output, re.MULTILINE)
+            if found:
+                samples.append(float(found.group(1)))
+    if not results["first paint"]:
+        print("main.py never reported a first paint")
+        sys.exit(1)
+    for label, samples in results.items():
+        if samples:
+            print(f"{label:16} median {statistics.median(samples):7.1f} ms over {len(samples)} runs (min {min(samples):.1f}, max {max(samples):.1f})")
+    median_paint = statistics.median(results["first paint"])
+    if median_paint > budget_ms:
+        print(f"FAIL: first paint {median_paint:.1f} ms is over the {budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"OK: first paint {median_paint:.1f} ms is within the {budget_ms:.0f} ms budget")
@@ -0,0 +1,482 @@
+# structured_output.py
+# Runs tabular commands in a machine-readable form and shows their rows in a sortable, filterable table.
+
+import csv
+import math
+import re
+import sys
+from PySide6.QtWidgets import QHBoxLayout, QHeaderView, QLabel, QLineEdit, QTableView, QVBoxLayout, QWidget
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from output_viewer import OutputViewer
+
+CSV_CONVERSION = "ConvertTo-Csv -NoTypeInformation"
+# Format-Table switches that only affect the padded text and can be dropped
+FORMAT_TABLE_SWITCHES = {"-autosize", "-wrap", "-hidetableheaders", "-repeatheader", "-force"}
+# Unix programs whose output starts with a header row of one-word names (see HEADER_PHRASES), with
+# only the last column allowed to be blank or contain spaces. netstat (a title line first), ss and
+# who -H (multi-word headers), and free and lsof (blank columns before the last) don't qualify.
+COLUMN_TABLE_PROGRAMS = {"df", "lsblk", "ps"}
+HEADER_PHRASES = {("Mounted", "on")} # Multi-word headers of the programs above
+# Looked up once: data() runs for every visible cell and role, and Qt.* attribute access is slow
+TEXT_ROLES = {Qt.DisplayRole, Qt.ToolTipRole}
+ALIGNMENT_ROLE = Qt.TextAlignmentRole
+NUMBER_ALIGNMENT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+def _split_top_level(text, separator):
+    """Splits text at separator characters outside quotes, braces and parentheses."""
+    parts, current, quote, depth = [], "", None, 0
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "({[":
+            depth += 1
+        elif char in ")}]":
+            depth -= 1
+        elif depth == 0 and (char.isspace() if separator == " " else char == separator):
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+def structured_command(command, is_powershell):
+    """
+    Returns (command, table_format) for a command that prints a table: PowerShell's Format-Table
+    with a property list is swapped for CSV of those properties ("csv"), and known column-aligned
+    programs are parsed as they are ("columns"). Returns (None, None) for anything else, including
+    a bare Format-Table: CSV would carry every property (PSPath, PSProvider, ...) rather than the
+    few columns of the type's default table view.
+    """
+    if is_powershell:
+        stages = _split_top_level(command, "|")
+        last = stages[-1].strip()
+        tokens = [token for token in _split_top_level(last, " ") if token]
+        if len(stages) < 2 or not tokens or tokens[0].lower() not in ("format-table", "ft"):
+            return None, None
+        properties = []
+        for token in tokens[1:]:
+            lowered = token.lower()
+            if lowered in FORMAT_TABLE_SWITCHES or lowered == "-property":
+                continue
+            if token.startswith("-") and not token[1:2].isdigit():
+                return None, None # -GroupBy, -View and the like have no CSV equivalent
+            properties.append(token)
+        if not properties:
+            return None, None
+        pipeline = "|".join(stages[:-1]).rstrip()
+        return f"{pipeline} | Select-Object {' '.join(properties)} | {CSV_CONVERSION}", "csv"
+    stages = _split_top_level(command, "|")
+    words = command.split()
+    if sys.platform != "win32" and len(stages) == 1 and words and words[0].rsplit("/", 1)[-1] in COLUMN_TABLE_PROGRAMS:
+        return command, "columns"
+    return None, None
+
+class TableParser:
+    """
+    Turns output into a header and rows as it streams in. Lines that don't fit the table (an
+    error message, say) are counted, and the first few kept, in rejected_lines.
+    """
+    # Whitespace columns only line up when every row has one field per header; if any doesn't,
+    # the output is shown (and sent to the model) as text instead, see fits()
+    def __init__(self, table_format):
+        self.table_format = table_format
+        self.headers = None
+        self.rejected = 0
+        self.rejected_lines = []
+        self._partial = ""
+        self._record = ""
+
+    def feed(self, text):
+        """Parses the complete lines in text (plus any left over from before) and returns the new rows."""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        return self._parse(lines)
+
+    def finish(self):
+        lines = [self._partial] if self._partial else []
+        self._partial = ""
+        return self._parse(lines)
+
+    def _parse(self, lines):
+        if self.table_format == "csv":
+            return self._parse_csv(lines)
+        rows = []
+        for line in lines:
+            line = line.rstrip("\r")
+            if not line.strip():
+                continue
+            if self.headers is None:
+                self.headers = self._header(line.split())
+                continue
+            fields = line.split(None, len(self.headers) - 1)
+            if len(fields) == len(self.headers) - 1:
+                fields.append("") # The last column can be blank (lsblk's MOUNTPOINTS)
+            if len(fields) == len(self.headers):
+                rows.append(fields)
+            else:
+                self._reject(line)
+        return rows
+
+    def fits(self):
+        """Whether the output parsed as a table that is worth showing as one."""
+        return bool(self.headers) and not (self.table_format == "columns" and self.rejected)
+
+    def _parse_csv(self, lines):
+        records = []
+        for line in lines:
+            line = line.rstrip("\r")
+            if self._record or line.count('"') % 2:
+                self._record = f"{self._record}\n{line}" if self._record else line
+                if self._record.count('"') % 2:
+                    continue # A quoted value runs on to the next line
+                line, self._record = self._record, ""
+            if line.strip():
+                records.append(line)
+        rows = []
+        try:
+            parsed = list(csv.reader(records))
+        except csv.Error:
+            parsed = [None] * len(records)
+        for record, fields in zip(records, parsed):
+            if self.headers is None and fields:
+                self.headers = fields
+            elif fields and len(fields) == len(self.headers):
+                rows.append(fields)
+            else:
+                self._reject(record)
+        return rows
+
+    @staticmethod
+    def _header(words):
+        headers = []
+        for word in words:
+            if headers and (headers[-1], word) in HEADER_PHRASES:
+                headers[-1] += " " + word
+            else:
+                headers.append(word)
+        return headers
+
+    def _reject(self, line):
+        self.rejected += 1
+        if len(self.rejected_lines) < 20:
+            self.rejected_lines.append(line)
+
+def to_number(value):
+    """The value as a float if it reads as a number (allowing thousands separators and a % sign), else None."""
+    try:
+        number = float(value)
+    except ValueError:
+        text = value.strip().replace(",", "").rstrip("%")
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+    return number if math.isfinite(number) else None
+
+def summarize_table(headers, rows, max_chars=4000):
+    """
+    A compact, column-oriented description of a table for the model: each column's type, range
+    or distinct count, and its values in row order (runs of one value written once with a
+    count), in place of the padded text.
+    """
+    lines = [f"Table: {len(rows)} rows, {len(headers)} columns (values listed in row order)"]
+    budget = max(80, (max_chars - len(lines[0])) // max(1, len(headers)))
+    for column, name in enumerate(headers):
+        values = [row[column] for row in rows]
+        numbers = [to_number(value) for value in values if value.strip()]
+        if numbers and None not in numbers:
+            described = f"{name or '(unnamed)'} (number, min {min(numbers):.12g}, max {max(numbers):.12g}, total {sum(numbers):.12g}): "
+        else:
+            described = f"{name or '(unnamed)'} (text, {len(set(values))} distinct): "
+        # Runs of the same value are written once, with a count
+        runs = []
+        for value in values:
+            value = re.sub(r"\s+", " ", value.strip())
+            if len(value) > 60:
+                value = value[:57] + "..."
+            if runs and runs[-1][0] == value:
+                runs[-1][1] += 1
+            else:
+                runs.append([value, 1])
+        listed, covered = "", 0
+        for value, repeats in runs:
+            piece = (" | " if covered else "") + value + (f" ×{repeats}" if repeats > 1 else "")
+            if len(described) + len(listed) + len(piece) > budget:
+                listed += f" ... (+{len(values) - covered} more)"
+                break
+            listed += piece
+            covered += repeats
+        lines.append(described + listed)
+    return "\n".join(lines)
+
+def table_summary(text, table_format, max_chars=4000):
+    """summarize_table() for a command's captured output, or None if it didn't parse as a table."""
+    parser = TableParser(table_format)
+    rows = parser.feed(text) + parser.finish()
+    if not parser.fits() or not rows:
+        return None
+    summary = summarize_table(parser.headers, rows, max_chars)
+    if parser.rejected:
+        summary += f"\n({parser.rejected} lines were not part of the table, e.g. {parser.rejected_lines[0][:200]!r})"
+    return summary
+
+class TableModel(QAbstractTableModel):
+    """
+    Rows of a parsed table. Sorting and filtering happen here on plain Python lists, rather
+    than through a proxy that would call back into Python for every comparison.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.rows = []
+        self.shown = [] # Indices into rows, in display order
+        self.numeric = []
+        self.filter_text = ""
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.shown)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in TEXT_ROLES:
+            return self.rows[self.shown[index.row()]][index.column()]
+        if role == ALIGNMENT_ROLE and self.numeric[index.column()]:
+            return NUMBER_ALIGNMENT
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.headers):
+            return self.headers[section]
+        return None
+
+    def set_headers(self, headers):
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.numeric = [True] * len(headers)
+        self.rows = []
+        self.shown = []
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        start = len(self.rows)
+        self.rows.extend(rows)
+        for column, numeric in enumerate(self.numeric):
+            if numeric and any(to_number(row[column]) is None for row in rows if row[column].strip()):
+                self.numeric[column] = False
+        new = range(start, len(self.rows))
+        if self.filter_text:
+            new = [number for number in new if self._accepts(self.rows[number])]
+        if self.sort_column != -1:
+            self.layoutAboutToBeChanged.emit()
+            self.shown.extend(new)
+            self._sort_shown()
+            self.layoutChanged.emit()
+        elif new:
+            self.beginInsertRows(QModelIndex(), len(self.shown), len(self.shown) + len(new) - 1)
+            self.shown.extend(new)
+            self.endInsertRows()
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text.lower()
+        self.shown = [number for number, row in enumerate(self.rows) if self._accepts(row)]
+        self._sort_shown()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = column
+        self.sort_order = order
+        self._sort_shown()
+        self.layoutChanged.emit()
+
+    def _accepts(self, row):
+        return not self.filter_text or any(self.filter_text in value.lower() for value in row)
+
+    def _sort_shown(self):
+        column = self.sort_column
+        if column == -1 or column >= len(self.headers):
+            return
+        if self.numeric[column]:
+            def key(number):
+                value = to_number(self.rows[number][column])
+                return -math.inf if value is None else value
+        else:
+            def key(number):
+                return self.rows[number][column].lower()
+        self.shown.sort(key=key, reverse=self.sort_order == Qt.DescendingOrder)
+
+class TableOutputView(QWidget):
+    """
+    A command's output as a table: rows stream in as the command prints them, and can be sorted
+    by clicking a header or filtered by typing. If the output turns out not to be a table (or
+    the command fails) the raw text is shown in an OutputViewer instead.
+    """
+    def __init__(self, table_format, visible_rows=12):
+        super().__init__()
+        self.visible_rows = visible_rows
+        self.parser = TableParser(table_format)
+        self.model = TableModel(self)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 0, 0, 10)
+        layout.setSpacing(4)
+        toolbar_layout = QHBoxLayout()
+        self.info_label = QLabel()
+        self.info_label.setObjectName("statusLabel")
+        self.filter_input = QLineEdit()
+        self.filter_input.setObjectName("outputSearch")
+        self.filter_input.setPlaceholderText("Filter rows")
+        self.filter_input.setMaximumWidth(240)
+        self.filter_input.textChanged.connect(self._on_filter)
+        toolbar_layout.addWidget(self.info_label)
+        toolbar_layout.addStretch()
+        toolbar_layout.addWidget(self.filter_input)
+
+        self.table = QTableView()
+        self.table.setObjectName("outputTable")
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setVerticalScrollMode(QTableView.ScrollPerPixel)
+        self.table.setHorizontalScrollMode(QTableView.ScrollPerPixel)
+        self.table.setWordWrap(False)
+        self.table.setAlternatingRowColors(True)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        # Fixed row heights, and column widths measured on the first rows only, keep the view cheap for any row count
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 8)
+        self.table.horizontalHeader().setResizeContentsPrecision(50)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.rejected_label = QLabel()
+        self.rejected_label.setObjectName("statusLabel")
+        self.rejected_label.setWordWrap(True)
+        self.rejected_label.hide()
+        self.raw_view = None
+        self.omitted_rows = 0 # Rows of the original output that weren't kept
+
+        layout.addLayout(toolbar_layout)
+        layout.addWidget(self.table)
+        layout.addWidget(self.rejected_label)
+        self._update_height()
+
+    def is_empty(self):
+        return self.parser.headers is None and not self.parser.rejected and not self.parser._partial
+
+    def append_text(self, text):
+        self._add_rows(self.parser.feed(text))
+
+    def clear(self):
+        self.parser = TableParser(self.parser.table_format)
+        self.model.set_headers([])
+        self._show_table()
+        self._update_info()
+
+    def load_rows(self, headers, rows, omitted_rows=0):
+        """Shows an already parsed table, e.g. one kept by a hibernated chat (which may have dropped omitted_rows)."""
+        self.parser.headers = list(headers)
+        self.omitted_rows = omitted_rows
+        self._add_rows(rows)
+
+    def settle(self, result):
+        """Finishes parsing once the command is done, falling back to plain text when there's no table."""
+        if self.is_empty() and result.stdout:
+            self.append_text(result.stdout) # A refreshed result, which didn't stream through the view
+        self._add_rows(self.parser.finish())
+        if result.returncode != 0 or not self.model.rows or not self.parser.fits():
+            self.show_raw(result)
+
+    def show_raw(self, result):
+        if self.raw_view is None:
+            self.raw_view = OutputViewer()
+            self.layout().addWidget(self.raw_view)
+        self.raw_view.clear()
+        self.raw_view.settle(result)
+        self.table.hide()
+        self.filter_input.hide()
+        self.info_label.hide()
+        self.rejected_label.hide()
+        self.raw_view.show()
+
+    def _show_table(self):
+        if self.raw_view is not None:
+            self.raw_view.hide()
+        self.table.show()
+        self.filter_input.show()
+        self.info_label.show()
+
+    def _add_rows(self, rows):
+        if self.parser.headers and not self.model.headers:
+            self.model.set_headers(self.parser.headers)
+        if rows:
+            first_rows = not self.model.rows
+            self.model.append_rows(rows)
+            if first_rows:
+                self.table.resizeColumnsToContents()
+        if self.parser.rejected:
+            self.rejected_label.setText(f"{self.parser.rejected} lines were not part of the table:\n" + "\n".join(self.parser.rejected_lines[:3]))
+            self.rejected_label.show()
+        self._update_info()
+        self._update_height()
+
+    def _on_filter(self, text):
+        self.model.set_filter(text)
+        self._update_info()
+
+    def _update_info(self):
+        shown, total = len(self.model.shown), len(self.model.rows)
+        rows = f"{shown} of {total} rows" if shown != total else f"{total} rows"
+        omitted = f" ({self.omitted_rows} more not kept)" if self.omitted_rows else ""
+        self.info_label.setText(f"{rows} × {len(self.model.headers)} columns{omitted}")
+
+    def _update_height(self):
+        # Resizing the inner view is what tells the transcript this row changed height
+        rows = min(max(len(self.model.rows), 1), self.visible_rows)
+        height = self.table.horizontalHeader().sizeHint().height() + rows * self.table.verticalHeader().defaultSectionSize() + 4
+        if self.table.horizontalScrollBar().maximum() > 0:
+            height += self.table.horizontalScrollBar().sizeHint().height()
+        if self.table.height() != height or self.table.minimumHeight() != height:
+            self.table.setFixedHeight(height)
+
+if __name__ == "__main__":
+    # Benchmark: python structured_output.py [rows] (set QT_QPA_PLATFORM=offscreen to run headless)
+    import os
+    import sys
+    import time
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    rows = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 200000
+    chunks = ['"Name","Id","Memory (MB)","Path"\r\n'] + [
+        "".join(f'"process{number % 997}","{number}","{number * 7919 % 100003 / 10:.1f}","C:\\\\Program Files\\\\App{number % 31}\\\\app.exe"\r\n'
+                for number in range(start, min(start + 500, rows)))
+        for start in range(0, rows, 500)]
+    view = TableOutputView("csv")
+    view.resize(900, 400)
+    view.show()
+    start = time.perf_counter()
+    for chunk in chunks:
+        view.append_text(chunk)
+        app.processEvents()
+    streamed = time.perf_counter() - start
+    start = time.perf_counter()
+    view.table.sortByColumn(2, Qt.DescendingOrder)
+    app.processEvents()
+    sorted_in = time.perf_counter() - start
+    start = time.perf_counter()
+    view.filter_input.setText("process42")
+    app.processEvents()
+    filtered = time.perf_counter() - start
+    print(f"{rows} rows streamed in {streamed:.2f} s, sorted in {sorted_in:.2f} s, filtered in {filtered:.2f} s ({view.info_label.text()})")
+    os._exit(0)
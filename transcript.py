@@ -0,0 +1,443 @@
+# transcript.py
+# A virtualized chat transcript: messages are compact records in a model, painted by a delegate.
+
+from PySide6.QtWidgets import QListView, QPlainTextEdit, QStyledItemDelegate
+from PySide6.QtCore import QAbstractListModel, QEvent, QModelIndex, QObject, QRect, QSize, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter
+
+SIDE_MARGIN = 30
+BUBBLE_MIN_WIDTH = 50
+BUBBLE_MAX_WIDTH = 600
+
+class TranscriptItem(QObject):
+    """
+    A handle on one painted row. The row itself is just `record`, a small dict in the model;
+    the handle pushes changes to it and can be dropped once the row stops changing.
+    """
+    def __init__(self, kind, **fields):
+        super().__init__()
+        self.record = {"kind": kind, "text": "", "layout_text": "", "hidden": False, **fields}
+        self.model = None
+
+    def attach(self, model):
+        self.model = model
+
+    def show(self):
+        self._set_hidden(False)
+
+    def hide(self):
+        self._set_hidden(True)
+
+    def remove(self):
+        if self.model is not None:
+            self.model.remove(self.record)
+            self.model = None
+
+    def _set_hidden(self, hidden):
+        if self.record["hidden"] != hidden:
+            self.record["hidden"] = hidden
+            if self.model is not None:
+                self.model.record_hidden(self.record)
+
+    def _changed(self, resized=False):
+        if resized:
+            self.record.pop("size", None)
+        if self.model is not None:
+            self.model.record_changed(self.record, resized)
+
+class TranscriptModel(QAbstractListModel):
+    """
+    The transcript's rows, oldest first. Widget rows hold their (interactive) widget.
+    Rows added during an event-loop tick wait in `pending` until the view flushes them.
+    """
+    RecordRole = Qt.UserRole + 1
+    row_resized = Signal(QModelIndex)
+    row_hidden = Signal(int, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.pending = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == Qt.DisplayRole:
+            return record.get("text", "")
+        if role == self.RecordRole:
+            return record
+        return None
+
+    def append(self, record):
+        row = len(self.records)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.records.append(record)
+        self.endInsertRows()
+        return self.index(row)
+
+    def extend(self, records):
+        """Appends many rows with a single insert notification."""
+        if records:
+            row = len(self.records)
+            self.beginInsertRows(QModelIndex(), row, row + len(records) - 1)
+            self.records.extend(records)
+            self.endInsertRows()
+
+    def queue(self, record):
+        self.pending.append(record)
+
+    def flush(self):
+        """Inserts every queued row at once and returns them."""
+        records, self.pending = self.pending, []
+        self.extend(records)
+        return records
+
+    def row_of(self, record):
+        # Rows that still change are almost always near the end
+        for row in range(len(self.records) - 1, -1, -1):
+            if self.records[row] is record:
+                return row
+        return -1
+
+    def remove(self, record):
+        for position, queued in enumerate(self.pending):
+            if queued is record:
+                del self.pending[position]
+                return
+        row = self.row_of(record)
+        if row != -1:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.records[row]
+            self.endRemoveRows()
+
+    def record_changed(self, record, resized=False):
+        row = self.row_of(record)
+        if row == -1:
+            return
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        if resized:
+            self.row_resized.emit(index)
+
+    def record_hidden(self, record):
+        row = self.row_of(record)
+        if row != -1:
+            self.row_hidden.emit(row, record["hidden"])
+
+class TranscriptDelegate(QStyledItemDelegate):
+    """
+    Paints bubble rows and sizes every row. Sizes are cached on the record per
+    viewport width, and a bubble is measured against its final text, so typing only repaints.
+    """
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.bubble_font = QFont(view.font())
+        self.bubble_font.setPixelSize(14)
+        self.bubble_metrics = QFontMetrics(self.bubble_font)
+        self.palette = {}
+
+    def set_palette(self, palette):
+        self.palette = palette
+        self.view.viewport().update()
+
+    def _color(self, name):
+        return QColor(self.palette.get(name, "#808080"))
+
+    def _record(self, index):
+        return self.view.model().records[index.row()]
+
+    def _content_width(self):
+        return max(100, self.view.viewport().width() - 2 * SIDE_MARGIN)
+
+    def _bubble_label_width(self, record, content_width):
+        text_width = self.bubble_metrics.horizontalAdvance(record["layout_text"])
+        return min(max(text_width + 30, BUBBLE_MIN_WIDTH), BUBBLE_MAX_WIDTH, content_width - 30)
+
+    def sizeHint(self, option, index):
+        record = self._record(index)
+        width = self._content_width()
+        cached = record.get("size")
+        if cached is not None and cached[0] == width:
+            return cached[1]
+        kind = record["kind"]
+        if kind == "bubble":
+            label_width = self._bubble_label_width(record, width)
+            text_rect = self.bubble_metrics.boundingRect(QRect(0, 0, label_width, 1 << 20), Qt.TextWordWrap, record["layout_text"] or " ")
+            record["label_width"] = label_width
+            size = QSize(width, text_rect.height() + 20)
+        else:
+            widget = record["widget"]
+            height = widget.heightForWidth(width) if widget.hasHeightForWidth() else -1
+            size = QSize(width, height if height > 0 else widget.sizeHint().height())
+        record["size"] = (width, size)
+        return size
+
+    def paint(self, painter, option, index):
+        record = self._record(index)
+        kind = record["kind"]
+        if kind != "bubble" or record["hidden"]:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = option.rect.adjusted(SIDE_MARGIN, 0, -SIDE_MARGIN, 0)
+        self.sizeHint(option, index) # Makes sure label_width is current
+        bubble_width = record["label_width"] + 30
+        left = record.get("alignment") != "right"
+        x = rect.left() if left else rect.right() - bubble_width
+        bubble = QRect(x, rect.top(), bubble_width, rect.height())
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._color("bubble_left" if left else "bubble_right"))
+        painter.drawRoundedRect(bubble, 18, 18)
+        painter.setPen(self._color("bubble_text"))
+        painter.setFont(self.bubble_font)
+        painter.drawText(bubble.adjusted(15, 10, -15, -10), Qt.TextWordWrap | Qt.AlignLeft | Qt.AlignTop, record["text"])
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        # Double-clicking a painted row opens a read-only copy of its text for selecting and copying
+        if self._record(index)["kind"] == "widget":
+            return None
+        editor = QPlainTextEdit(parent)
+        editor.setObjectName("transcriptEditor")
+        editor.setReadOnly(True)
+        editor.setFont(self.bubble_font)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(self._record(index)["text"])
+
+    def setModelData(self, editor, model, index):
+        pass
+
+    def updateEditorGeometry(self, editor, option, index):
+        # Also places index widgets, which get the same side margins as painted rows
+        editor.setGeometry(option.rect.adjusted(SIDE_MARGIN, 0, -SIDE_MARGIN, 0))
+
+class TranscriptView(QListView):
+    """
+    The chat transcript. Only the visible rows are painted; interactive rows (buttons,
+    confirmations, command output) are real widgets placed with setIndexWidget().
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.transcript_model = TranscriptModel(self)
+        self.delegate = TranscriptDelegate(self)
+        self.setModel(self.transcript_model)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.Adjust)
+        self.setSpacing(7) # About 15px between rows, as the old layout had
+        self.setSelectionMode(QListView.NoSelection)
+        self.setEditTriggers(QListView.DoubleClicked)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.verticalScrollBar().setSingleStep(20)
+        self.transcript_model.row_resized.connect(self.delegate.sizeHintChanged)
+        self.transcript_model.row_hidden.connect(self.setRowHidden)
+        self._widget_records = {} # widget -> its row's record
+        self._scroll_pending = False
+        self._scroll_value = None # Where the pending scroll goes; None is the bottom
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0) # Once control returns to the event loop
+        self._flush_timer.timeout.connect(self.flush)
+
+    def add_item(self, item):
+        item.attach(self.transcript_model)
+        self._queue(item.record)
+
+    def add_widget(self, widget):
+        record = {"kind": "widget", "widget": widget, "hidden": False}
+        self._widget_records[widget] = record
+        self._queue(record)
+        widget.installEventFilter(self)
+        widget.destroyed.connect(lambda: self._forget_widget(widget, record))
+
+    def set_widget_hidden(self, widget, hidden):
+        record = self._widget_records.get(widget)
+        if record is not None and record["hidden"] != hidden:
+            record["hidden"] = hidden
+            self.transcript_model.record_hidden(record) # Queued rows pick it up when flushed
+
+    def scroll_to_bottom(self):
+        """Scrolls to the end once the rows added during this tick are in."""
+        self.scroll_to(None)
+
+    def scroll_to(self, value):
+        """Scrolls to value (or the bottom, for None) once the rows added during this tick are in."""
+        self._scroll_pending = True
+        self._scroll_value = value
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """
+        Applies this tick's inserts with updates disabled and scrolls once. A burst costs the same
+        layout work however many rows it adds (Qt lays out for the insert and again for newly placed
+        widgets), where inserting row by row cost a layout per row.
+        """
+        self._flush_timer.stop()
+        model = self.transcript_model
+        if not model.pending and not self._scroll_pending:
+            return
+        self.setUpdatesEnabled(False)
+        try:
+            first_row = len(model.records)
+            for row, record in enumerate(model.flush(), first_row):
+                if record["kind"] == "widget":
+                    self.setIndexWidget(model.index(row), record["widget"])
+                if record["hidden"]:
+                    self.setRowHidden(row, True)
+            if self._scroll_pending:
+                self._scroll_pending = False
+                if self._scroll_value is None:
+                    self.scrollToBottom() # Runs the pending layout first
+                else:
+                    self.doItemsLayout()
+                    self.verticalScrollBar().setValue(self._scroll_value)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _queue(self, record):
+        self.transcript_model.queue(record)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.LayoutRequest:
+            # An interactive row changed size (e.g. an expanded summary)
+            record = self._widget_records.get(watched)
+            if record is not None:
+                record.pop("size", None)
+                self.transcript_model.record_changed(record, resized=True)
+        return super().eventFilter(watched, event)
+
+    def _forget_widget(self, widget, record):
+        self._widget_records.pop(widget, None)
+        try:
+            self.transcript_model.remove(record)
+        except RuntimeError: # The view is being torn down too
+            pass
+
+if __name__ == "__main__":
+    # Benchmark: python transcript.py [burst] [rows] (set QT_QPA_PLATFORM=offscreen to run headless)
+    import os
+    import sys
+    import time
+    from PySide6.QtWidgets import QApplication, QHBoxLayout, QLabel, QScrollArea, QVBoxLayout, QWidget
+    app = QApplication(sys.argv)
+    variant = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    rows = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 10000
+    texts = [("short reply %d" % i) if i % 3 else ("a longer message that wraps over a few lines " * 4) for i in range(rows)]
+
+    def drain(widget=None):
+        for _ in range(3):
+            app.processEvents()
+        if isinstance(widget, QListView):
+            widget.doItemsLayout() # Item views lay out lazily; count that work too
+
+    def run_widgets():
+        """The previous transcript: a QScrollArea holding a QLabel (in a container) per message."""
+        area = QScrollArea()
+        area.setWidgetResizable(True)
+        content = QWidget()
+        layout = QVBoxLayout(content)
+        layout.setSpacing(15)
+        area.setWidget(content)
+        area.resize(900, 700)
+        area.show()
+        start = time.perf_counter()
+        for i, text in enumerate(texts):
+            row = QWidget()
+            row_layout = QHBoxLayout(row)
+            label = QLabel(text)
+            label.setWordWrap(True)
+            row_layout.addWidget(label)
+            layout.addWidget(row)
+        drain()
+        return area, area.verticalScrollBar(), start
+
+    def run_view():
+        view = TranscriptView()
+        view.delegate.set_palette({})
+        view.resize(900, 700)
+        view.show()
+        start = time.perf_counter()
+        view.transcript_model.extend([{"kind": "bubble", "text": text, "layout_text": text,
+                                       "alignment": "left" if i % 4 else "right", "hidden": False}
+                                      for i, text in enumerate(texts)])
+        drain(view)
+        return view, view.verticalScrollBar(), start
+
+    def run_burst(batched, bursts=50, burst_rows=6):
+        """Frame timings while a reply lands: a bubble plus a few interactive rows, added in one go."""
+        from PySide6.QtWidgets import QPushButton
+        passes = []
+
+        class CountingView(TranscriptView):
+            def doItemsLayout(self):
+                passes.append(time.perf_counter())
+                super().doItemsLayout()
+
+        view = CountingView()
+        view.resize(900, 700)
+        view.show()
+        drain()
+        frames = []
+        for burst in range(bursts):
+            start = time.perf_counter()
+            for row in range(burst_rows):
+                if row % 3 == 0:
+                    text = texts[(burst * 6 + row) % len(texts)]
+                    item = TranscriptItem("bubble", text=text, layout_text=text)
+                    view.add_item(item)
+                else:
+                    view.add_widget(QPushButton(f"action {burst}.{row}"))
+                if batched:
+                    view.scroll_to_bottom()
+                else: # The previous path: insert now, then a separate delayed scroll per row
+                    view.flush()
+                    QTimer.singleShot(10, lambda: view.verticalScrollBar().setValue(view.verticalScrollBar().maximum()))
+            before = len(passes)
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                app.processEvents()
+            frames.append((time.perf_counter() - start, len(passes) - before))
+        layouts = max(count for _, count in frames)
+        busy = [t - s for s, t in zip(passes, passes[1:]) if t - s < 0.016]
+        print(f"{'batched' if batched else 'per-row':8} {bursts} bursts of {burst_rows} rows: {len(passes) / bursts:4.1f} layout passes per burst, "
+              f"at most {layouts} after the burst, {len(busy)} passes less than a frame apart, "
+              f"{sum(t for t, _ in frames) / bursts * 1000 - 50:5.1f} ms per burst outside the wait", flush=True)
+
+    if variant in ("burst", "per-row", "batched"):
+        if variant == "burst":
+            import subprocess
+            for name in ("per-row", "batched"):
+                subprocess.run([sys.executable, __file__, name, str(rows)])
+        else:
+            run_burst(variant == "batched", burst_rows=rows if rows != 10000 else 6)
+        os._exit(0)
+    if variant:
+        widget, scrollbar, start = run_widgets() if variant == "widgets" else run_view()
+        filled = time.perf_counter() - start
+        start = time.perf_counter()
+        widget.resize(700, 700) # Every row re-wraps
+        drain(widget)
+        relayout = time.perf_counter() - start
+        start = time.perf_counter()
+        steps = 200
+        for step in range(steps):
+            scrollbar.setValue(scrollbar.maximum() * step // steps)
+            widget.repaint()
+        frame = (time.perf_counter() - start) / steps
+        print(f"{variant:8} {rows} rows: filled in {filled:6.2f} s, re-wrapped in {relayout:6.2f} s, {frame * 1000:6.2f} ms per scroll frame", flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so one can't warm up (or slow down) the other
+    import subprocess
+    for name in ("widgets", "view"):
+        subprocess.run([sys.executable, __file__, name, str(rows)])
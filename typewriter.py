@@ -0,0 +1,165 @@
+# typewriter.py
+# One shared, frame-paced driver for every typing animation in the chat.
+
+import time
+from PySide6.QtCore import QObject, QTimer
+
+class TypewriterDriver(QObject):
+    """
+    Reveals the text of every animating widget from a single timer. A widget taking part has a
+    `full_text` attribute and `show_typed(count)` / `typing_complete()` methods. Each frame the
+    driver advances every widget by the time that has passed (at least chars_per_second, faster
+    when needed to finish within max_seconds) and sets its text once, so the cost per frame no
+    longer depends on how many characters were typed. Work stops for the frame once
+    frame_budget_ms is spent, and the next frame starts with the first widget left over, so every
+    widget gets its turn (and catches up by the time that passed). Text longer than
+    instant_threshold is shown at once.
+    """
+    def __init__(self, frame_ms=16, frame_budget_ms=6, max_seconds=2.0, instant_threshold=4000):
+        super().__init__()
+        self.frame_budget = frame_budget_ms / 1000
+        self.max_seconds = max_seconds
+        self.instant_threshold = instant_threshold
+        self._targets = {} # widget -> {"position": float, "cps": float, "last": float}
+        self._resume_from = None # The first widget a frame ran out of budget for; the next frame starts there
+        self.timer = QTimer(self)
+        self.timer.setInterval(frame_ms)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self, target, chars_per_second=150, position=0):
+        """Animates target.full_text from `position`; calling it again for a running widget keeps its place."""
+        if target in self._targets:
+            return
+        if len(target.full_text) - position > self.instant_threshold:
+            target.show_typed(len(target.full_text))
+            target.typing_complete()
+            return
+        self._targets[target] = {"position": float(position), "cps": chars_per_second, "last": time.perf_counter()}
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def is_typing(self, target):
+        return target in self._targets
+
+    def stop(self, target):
+        """Forgets the widget without touching its text."""
+        self._targets.pop(target, None)
+
+    def finish(self, target):
+        """Shows the widget's full text now."""
+        if self._targets.pop(target, None) is not None:
+            target.show_typed(len(target.full_text))
+            target.typing_complete()
+
+    def _tick(self):
+        frame_start = time.perf_counter()
+        targets = list(self._targets)
+        start = targets.index(self._resume_from) if self._resume_from in self._targets else 0
+        self._resume_from = None
+        for target in targets[start:] + targets[:start]:
+            now = time.perf_counter()
+            if now - frame_start > self.frame_budget:
+                self._resume_from = target
+                break
+            state = self._targets.get(target)
+            if state is None: # Finished or stopped by another widget's callback this frame
+                continue
+            total = len(target.full_text)
+            remaining = total - state["position"]
+            rate = max(state["cps"], remaining / self.max_seconds)
+            state["position"] = min(total, state["position"] + rate * (now - state["last"]))
+            state["last"] = now
+            try:
+                target.show_typed(int(state["position"]))
+                if state["position"] >= total:
+                    del self._targets[target]
+                    target.typing_complete()
+            except RuntimeError: # The widget was deleted mid-animation
+                self._targets.pop(target, None)
+        if not self._targets:
+            self.timer.stop()
+
+_shared_driver = None
+
+def get_typewriter():
+    global _shared_driver
+    if _shared_driver is None:
+        _shared_driver = TypewriterDriver()
+    return _shared_driver
+
+if __name__ == "__main__":
+    # CPU benchmark: python typewriter.py (set QT_QPA_PLATFORM=offscreen to run headless)
+    import os
+    import sys
+    from PySide6.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+    from PySide6.QtGui import QFontMetrics
+    app = QApplication(sys.argv)
+
+    class LegacyLabel(QLabel):
+        """The previous approach: a timer per widget, one character per tick, re-measuring every time."""
+        def __init__(self):
+            super().__init__()
+            self.setWordWrap(True)
+            self.timer = QTimer(self)
+            self.timer.timeout.connect(self._update_text)
+
+        def type_text(self, text):
+            self.full_text, self.current_text = text, ""
+            self.timer.start(5)
+
+        def _update_text(self):
+            if len(self.current_text) < len(self.full_text):
+                self.current_text += self.full_text[len(self.current_text)]
+                self.setText(self.current_text)
+                QFontMetrics(self.font()).horizontalAdvance(self.current_text)
+            else:
+                self.timer.stop()
+
+    class DrivenLabel(QLabel):
+        def __init__(self):
+            super().__init__()
+            self.setWordWrap(True)
+            self.full_text = ""
+
+        def type_text(self, text):
+            self.full_text = text
+            get_typewriter().start(self, chars_per_second=200)
+
+        def show_typed(self, count):
+            self.setText(self.full_text[:count])
+
+        def typing_complete(self):
+            pass
+
+    def measure(label_class, widgets=10, chars=3000, seconds=3.0):
+        window = QWidget()
+        layout = QVBoxLayout(window)
+        labels = [label_class() for _ in range(widgets)]
+        for label in labels:
+            layout.addWidget(label)
+        window.show()
+        text = ("lorem ipsum dolor sit amet " * (chars // 27 + 1))[:chars]
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for label in labels:
+            label.type_text(text)
+        QTimer.singleShot(int(seconds * 1000), app.quit)
+        app.exec()
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        shown = [len(label.text()) for label in labels]
+        window.close()
+        return cpu / wall * 100, shown, widgets * chars
+
+    variants = {"per-widget timers": LegacyLabel, "shared driver": DrivenLabel, "shared, same pace": DrivenLabel}
+    if len(sys.argv) > 1:
+        if sys.argv[1] == "shared, same pace":
+            _shared_driver = TypewriterDriver(max_seconds=3600) # Never speeds up, like the old timers
+        cpu, shown, total = measure(variants[sys.argv[1]])
+        # The spread between widgets shows whether one is starved while the others type
+        print(f"{sys.argv[1]:18} {cpu:5.1f}% CPU, {sum(shown)}/{total} characters shown after 3 s "
+              f"(per widget {min(shown)} to {max(shown)})", flush=True)
+        os._exit(0)
+    # Each variant runs in a fresh process so one can't warm up (or slow down) the other
+    import subprocess
+    for name in variants:
+        subprocess.run([sys.executable, __file__, name])